@@ -1,7 +1,20 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from functools import lru_cache
 from pathlib import Path
+import os
+
+
+def config_path(name: str) -> Path:
+    """Where a state file lives: $CONFIG_DIR, the Docker config volume or the project root."""
+    override = os.environ.get("CONFIG_DIR")
+    if override:
+        return Path(override) / name
+    docker_config = Path("/app/config")
+    if docker_config.exists() and docker_config.is_dir():
+        return docker_config / name
+    return Path(__file__).parent.parent.parent / name
 
 
 class Settings(BaseSettings):
@@ -31,20 +44,31 @@ class Settings(BaseSettings):
     docker_host: Optional[str] = None
     docker_enabled: bool = True
 
+    # Calendar
+    calendar_source: str = "google"  # google, ics
+    calendar_enabled: bool = True
+
     # Google Calendar
     google_credentials_path: str = ""
     google_calendar_ids: str = "primary"
-    calendar_enabled: bool = True
+
+    # ICS / CalDAV calendars (CALENDAR_SOURCE=ics)
+    ics_calendar_urls: str = ""  # comma-separated http(s) URLs or file paths
+    caldav_urls: str = ""  # comma-separated CalDAV collection URLs
+    caldav_username: str = ""
+    caldav_password: str = ""
 
     # Weather (Open-Meteo - no API key required)
     weather_latitude: float = 0.0
     weather_longitude: float = 0.0
     weather_enabled: bool = True
+    weather_poll_interval: int = 300  # seconds; forecasts change slowly
 
     # News (NewsAPI.org)
     news_api_key: str = ""
     news_country: str = "us"
     news_enabled: bool = True
+    news_poll_interval: int = 300  # seconds; the free plan allows 100 requests a day
 
     # UNRAID
     unraid_host: str = ""
@@ -53,11 +77,91 @@ class Settings(BaseSettings):
     unraid_verify_ssl: bool = False
     unraid_enabled: bool = True
 
+    # Federation (pull other instances' dashboards into /api/federation)
+    federation_site: str = "local"  # this instance's name in the federated view
+    federation_peers: str = ""  # comma-separated name=url, e.g. lab=http://10.0.2.5:8000
+    federation_timeout: float = 5.0  # seconds per peer request until its latency is known
+
+    # Push ingest (external agents and scripts report through POST /api/ingest)
+    ingest_api_key: str = ""  # X-API-Key for /api/ingest (unset disables it)
+    ingest_max_bytes: int = 1048576  # largest request body
+    ingest_max_lines: int = 5000  # reports per request
+    ingest_queue_size: int = 64  # requests waiting to be applied before new ones get 429
+    ingest_stale_after: int = 180  # seconds without a report before an agent shows as silent
+
     # Application Settings
     poll_interval: int = 30
     cache_ttl: int = 25
+    snapshot_interval: int = 15  # min seconds between snapshot writes
+    worker_election: bool = False  # for uvicorn --workers N: one leader polls, the others serve its snapshot
+    worker_sync_interval: float = 1.0  # seconds between snapshot publishes (leader) and reloads (followers)
+    circuit_failure_threshold: int = 3  # consecutive failures before skipping an upstream
+    circuit_reset_timeout: int = 60  # seconds before an open circuit is probed again
+    upstream_timeout_multiplier: float = 3.0  # timeout = observed p99 latency * multiplier
+    upstream_timeout_min: float = 2.0
+    upstream_timeout_max: float = 30.0
+    upstream_hedging: bool = False  # resend GETs slower than the observed p95
+    upstream_mode: str = "live"  # live, record (save traffic to config/cassettes) or replay (serve it offline)
+    upstream_replay_timing: bool = True  # replay with the recorded latency; false answers immediately
+    simulate_services: str = ""  # comma-separated services served by the synthetic simulator, e.g. unifi,docker
+    simulator_clients: int = 500  # UniFi clients (access points and Plex users scale with it)
+    simulator_containers: int = 100  # Docker and Unraid containers
+    simulator_guests: int = 50  # Proxmox LXCs and VMs
+    simulator_disks: int = 12  # Unraid array disks
+    simulator_seed: int = 0
+    history_points: int = 20160  # samples kept per metric series (7 days at 30s)
+    tsdb_enabled: bool = True  # keep metric history on disk (config/metrics.db)
+    tsdb_flush_interval: int = 60  # seconds between batched writes
+    tsdb_max_size_mb: int = 200
+    anomaly_alpha: float = 0.05  # EWMA weight of each new sample
+    anomaly_zscore: float = 4.0  # deviations from the baseline that count as anomalous
+    anomaly_warmup: int = 30  # samples before a series can be anomalous
+    loop_block_threshold: float = 0.25  # seconds the event loop may block before it is logged (0 disables)
+    tracing_enabled: bool = False  # trace collections and requests, keeping only slow or failed traces
+    tracing_min_ms: int = 200  # traces faster than this are never kept
+    tracing_file_max_mb: int = 10  # traces.jsonl is rotated at this size
+    tracing_file_backups: int = 3
+    tracing_otlp_endpoint: str = ""  # e.g. http://otel-collector:4318, also receives kept traces
+    internal_api_key: str = ""  # X-API-Key for /api/internal/profile (unset disables it)
     cors_origins: str = "http://localhost:3000"
 
+    @property
+    def simulate_services_list(self) -> List[str]:
+        return [name.strip() for name in self.simulate_services.split(",") if name.strip()]
+
+    @model_validator(mode="after")
+    def _fill_simulated_connections(self) -> "Settings":
+        # Simulated services need no real address or credentials, but the
+        # services skip polling while these are unset
+        placeholders = {
+            "unifi": {"unifi_host": "http://simulator"},
+            "proxmox": {"proxmox_host": "http://simulator"},
+            "plex": {"plex_url": "http://simulator", "plex_token": "simulated"},
+            "unraid": {"unraid_host": "http://simulator"},
+        }
+        for name in self.simulate_services_list:
+            for field, value in placeholders.get(name, {}).items():
+                if not getattr(self, field):
+                    setattr(self, field, value)
+        return self
+
+    @property
+    def federation_peers_list(self) -> List[Tuple[str, str]]:
+        peers = []
+        for entry in self.federation_peers.split(","):
+            name, _, url = entry.strip().partition("=")
+            if name and url:
+                peers.append((name.strip(), url.strip().rstrip("/")))
+        return peers
+
+    @property
+    def federation_enabled(self) -> bool:
+        return bool(self.federation_peers_list)
+
+    @property
+    def agents_enabled(self) -> bool:
+        return bool(self.ingest_api_key)
+
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
@@ -69,7 +173,10 @@ class Settings(BaseSettings):
     class Config:
         # In Docker, read from persistent config volume
         # Check both locations - config volume first, then default
-        env_file = "/app/config/.env" if Path("/app/config").exists() else ".env"
+        if os.environ.get("CONFIG_DIR"):
+            env_file = str(config_path(".env"))
+        else:
+            env_file = "/app/config/.env" if Path("/app/config").exists() else ".env"
         env_file_encoding = "utf-8"
 
 
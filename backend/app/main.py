@@ -1,23 +1,30 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.config import get_settings
 from app.routers.dashboard import router as dashboard_router
 from app.routers.config import router as config_router
 from app.routers.logs import router as logs_router
+from app.routers.history import router as history_router
+from app.routers.ingest import router as ingest_router
+from app.routers.internal import router as internal_router
+from app.routers.metrics import router as metrics_router
 from app.routers.quotes import router as quotes_router
-from app.services import (
-    unifi_service,
-    proxmox_service,
-    plex_service,
-    docker_service,
-    calendar_service,
-    unraid_service,
-)
+from app.services import calendar_service
+from app.services.cassette import recorder
+from app.services.ingest import ingest_service
+from app.services.instrumentation import loop_monitor
+from app.services.job_registry import job_registry
+from app.services.leader import leader
+from app.services.loop_watchdog import loop_watchdog
+from app.services.snapshot import snapshot_store
+from app.services.tracing import TracingMiddleware, tracer
+from app.services.tsdb import tsdb_store
+from app.utils.config_store import config_store
 from app.utils.log_buffer import log_buffer
 
 # Configure logging
@@ -28,56 +35,68 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logging.getLogger().addHandler(log_buffer)
 
-# Scheduler for background tasks
-scheduler = AsyncIOScheduler()
-
-
-async def poll_services():
-    """Background task to poll all enabled services."""
-    settings = get_settings()
-    logger.info("Polling enabled services...")
-    try:
-        if settings.unifi_enabled:
-            await unifi_service.get_status(use_cache=False)
-        if settings.proxmox_enabled:
-            await proxmox_service.get_status(use_cache=False)
-        if settings.plex_enabled:
-            await plex_service.get_status(use_cache=False)
-        if settings.docker_enabled:
-            await docker_service.get_status(use_cache=False)
-        if settings.calendar_enabled:
-            await calendar_service.get_status(use_cache=False)
-        if settings.unraid_enabled:
-            await unraid_service.get_status(use_cache=False)
-        logger.info("Polling complete")
-    except Exception as e:
-        logger.error(f"Error during polling: {e}")
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     settings = get_settings()
 
-    # Start scheduler
-    scheduler.add_job(
-        poll_services,
+    # Config files may change from any thread; apply changes on the loop
+    loop = asyncio.get_running_loop()
+    config_store.subscribe(
+        lambda name, changed: loop.call_soon_threadsafe(
+            loop.create_task, job_registry.on_config_change(name, changed)
+        )
+    )
+    # Load config files now so later saves report only the keys that changed
+    config_store.get("runtime")
+    config_store.get("env")
+
+    # Refresh Google OAuth tokens ahead of expiry, outside the poll path
+    job_registry.scheduler.add_job(
+        calendar_service.refresh_credentials,
         "interval",
-        seconds=settings.poll_interval,
-        id="poll_services",
+        minutes=2,
+        id="calendar_token_refresh",
         replace_existing=True,
     )
-    scheduler.start()
-    logger.info(f"Scheduler started with {settings.poll_interval}s interval")
 
-    # Initial poll
-    await poll_services()
+    loop_monitor.start()
+    loop_watchdog.start()
+    tracer.start()
+
+    # Serve the last-known snapshot until fresh collections land
+    await snapshot_store.load()
+    await tsdb_store.start(writer=False)
+
+    async def start_collecting():
+        # Only the leader worker polls and writes the snapshot and metric store
+        snapshot_store.start()
+        await tsdb_store.start_writer()
+        # Start one collection job per enabled service. Each job's first run
+        # starts immediately in the background, so startup does not wait for
+        # upstreams; /api/ready reports when every service has been collected.
+        job_registry.start()
+        logger.info(f"Scheduler started with {settings.poll_interval}s interval")
+
+    # Agent reports are applied by the leader, spooled to it by followers
+    ingest_service.start()
+    await leader.start(start_collecting)
 
     yield
 
     # Shutdown
-    scheduler.shutdown()
-    logger.info("Scheduler stopped")
+    if leader.is_leader:
+        job_registry.shutdown()
+        logger.info("Scheduler stopped")
+    await ingest_service.stop()
+    await leader.stop()
+    await snapshot_store.stop()
+    await tsdb_store.stop()
+    await loop_monitor.stop()
+    loop_watchdog.stop()
+    await tracer.stop()
+    recorder.close()
 
 
 # Create FastAPI app
@@ -98,10 +117,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(dashboard_router)
 app.include_router(config_router)
 app.include_router(logs_router)
+app.include_router(history_router)
+app.include_router(ingest_router)
+app.include_router(internal_router)
+app.include_router(metrics_router)
 app.include_router(quotes_router)
 
 
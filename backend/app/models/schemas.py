@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -11,10 +11,21 @@ class StatusLevel(str, Enum):
     UNKNOWN = "unknown"
 
 
+class Anomaly(BaseModel):
+    series: str  # metric{label=value}
+    value: float
+    expected: float  # baseline (EWMA) mean
+    zscore: float
+
+
 class BaseStatus(BaseModel):
     status: StatusLevel = StatusLevel.UNKNOWN
     last_updated: datetime = datetime.now()
     error_message: Optional[str] = None
+    loading: bool = False  # True until the first background collection finishes
+    stale: bool = False  # True when serving last-known data instead of a fresh collection
+    stale_seconds: Optional[int] = None  # Age of stale data
+    anomalies: List[Anomaly] = []  # Metrics that deviate from their baseline
 
 
 # =============================================================================
@@ -148,6 +159,7 @@ class CalendarEvent(BaseModel):
 class CalendarStatus(BaseStatus):
     events: List[CalendarEvent] = []
     event_count: int = 0
+    calendar_errors: Dict[str, str] = {}  # calendar ID -> error message
 
 
 # =============================================================================
@@ -254,6 +266,29 @@ class UnraidStatus(BaseStatus):
     vm_running: int = 0
 
 
+# =============================================================================
+# AGENT MODELS (pushed through /api/ingest)
+# =============================================================================
+class AgentInfo(BaseModel):
+    name: str
+    status: StatusLevel = StatusLevel.HEALTHY  # last reported, ERROR once the agent went silent
+    message: Optional[str] = None
+    last_seen: Optional[datetime] = None  # timestamp of the latest report
+    silent_seconds: Optional[int] = None  # set when the agent missed ingest_stale_after
+    metrics: Dict[str, float] = {}  # latest value per series, e.g. cpu_percent{disk=sda}
+
+
+class AgentsStatus(BaseStatus):
+    agents: List[AgentInfo] = []
+    agents_reporting: int = 0
+
+
+class IngestResponse(BaseModel):
+    accepted: int = 0
+    rejected: int = 0
+    errors: List[str] = []  # first few rejected lines, as "line N: reason"
+
+
 # =============================================================================
 # DASHBOARD AGGREGATE
 # =============================================================================
@@ -264,6 +299,36 @@ class DashboardStatus(BaseModel):
     docker: DockerStatus
     calendar: CalendarStatus
     unraid: Optional[UnraidStatus] = None
+    agents: Optional[AgentsStatus] = None
+    last_updated: datetime = datetime.now()
+
+
+# =============================================================================
+# FEDERATION MODELS
+# =============================================================================
+class FederatedSite(BaseModel):
+    """One instance's dashboard in the federated view."""
+    name: str
+    url: Optional[str] = None  # None for this instance
+    status: StatusLevel = StatusLevel.UNKNOWN  # worst status of the site's services
+    reachable: bool = True
+    stale: bool = False  # True when showing the last dashboard pulled before the peer failed
+    stale_seconds: Optional[int] = None
+    error_message: Optional[str] = None
+    latency_ms: Optional[float] = None
+    last_success: Optional[datetime] = None
+    dashboard: Optional[DashboardStatus] = None
+
+
+class FederationStatus(BaseStatus):
+    """Peer dashboards as last pulled by the federation collector."""
+    peers: List[FederatedSite] = []
+    peers_reachable: int = 0
+
+
+class FederatedDashboard(BaseModel):
+    status: StatusLevel = StatusLevel.UNKNOWN
+    sites: List[FederatedSite] = []
     last_updated: datetime = datetime.now()
 
 
@@ -317,9 +382,14 @@ class ConfigUpdate(BaseModel):
     docker_host: Optional[str] = None
     docker_enabled: Optional[bool] = None
 
-    # Google Calendar
+    # Calendar
+    calendar_source: Optional[str] = None
     google_credentials_path: Optional[str] = None
     google_calendar_ids: Optional[str] = None
+    ics_calendar_urls: Optional[str] = None
+    caldav_urls: Optional[str] = None
+    caldav_username: Optional[str] = None
+    caldav_password: Optional[str] = None
     calendar_enabled: Optional[bool] = None
 
     # Weather
@@ -373,9 +443,14 @@ class ConfigResponse(BaseModel):
     docker_host: str = ""
     docker_enabled: bool = True
 
-    # Google Calendar
+    # Calendar
+    calendar_source: str = "google"
     google_credentials_path: str = ""
     google_calendar_ids: str = "primary"
+    ics_calendar_urls: str = ""
+    caldav_urls: str = ""
+    caldav_username: str = ""
+    caldav_password: str = ""  # Will be masked
     calendar_enabled: bool = True
 
     # Weather
@@ -464,3 +539,44 @@ class LogEntry(BaseModel):
 
 class LogsResponse(BaseModel):
     entries: List[LogEntry]
+
+
+# =============================================================================
+# READINESS MODELS
+# =============================================================================
+class ServiceReadiness(BaseModel):
+    enabled: bool = True
+    warm: bool = False  # first collection has completed
+    last_collected: Optional[datetime] = None
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool = False
+    services: Dict[str, ServiceReadiness] = {}
+
+
+# =============================================================================
+# HISTORY MODELS
+# =============================================================================
+class HistorySeries(BaseModel):
+    points: List[List[float]] = []  # [unix timestamp, value], oldest first
+
+
+class HistoryResponse(BaseModel):
+    range_seconds: int
+    series: Dict[str, HistorySeries] = {}
+    available: List[str] = []  # all known series keys
+
+
+class AggregateGroup(BaseModel):
+    labels: Dict[str, str] = {}
+    value: float
+    series: int = 0  # series in the group
+    samples: int = 0
+
+
+class AggregateResponse(BaseModel):
+    metric: str
+    agg: str
+    range_seconds: int
+    groups: List[AggregateGroup] = []
@@ -8,7 +8,6 @@ import logging
 from app.config import get_settings
 from app.utils.env_manager import read_env, write_env
 from app.utils.runtime_config import get_runtime_config, save_runtime_config
-from app.services.cache import cache_service
 from app.models.schemas import (
     ConfigStatus,
     ServiceConfigStatus,
@@ -39,6 +38,7 @@ MASKED_FIELDS = {
     "plex_token",
     "news_api_key",
     "unraid_password",
+    "caldav_password",
 }
 
 MASK_VALUE = "********"
@@ -83,7 +83,10 @@ async def get_config_status():
     docker_configured = _is_configured(settings.docker_host or "")
     docker_has_creds = True  # Docker doesn't need credentials
 
-    calendar_configured = _is_configured(settings.google_credentials_path)
+    if settings.calendar_source == "ics":
+        calendar_configured = _is_configured(settings.ics_calendar_urls) or _is_configured(settings.caldav_urls)
+    else:
+        calendar_configured = _is_configured(settings.google_credentials_path)
     calendar_has_creds = calendar_configured
 
     weather_configured = settings.weather_latitude != 0.0 or settings.weather_longitude != 0.0
@@ -152,8 +155,13 @@ async def get_config():
         docker_host=settings.docker_host or "",
         docker_enabled=runtime_config.get("docker_enabled", True),
         # Calendar
+        calendar_source=settings.calendar_source,
         google_credentials_path=settings.google_credentials_path,
         google_calendar_ids=settings.google_calendar_ids,
+        ics_calendar_urls=settings.ics_calendar_urls,
+        caldav_urls=settings.caldav_urls,
+        caldav_username=settings.caldav_username,
+        caldav_password=_mask_value("caldav_password", settings.caldav_password),
         calendar_enabled=runtime_config.get("calendar_enabled", True),
         # Weather
         weather_latitude=settings.weather_latitude,
@@ -226,8 +234,13 @@ async def save_config(config: ConfigUpdate):
         runtime_updates["docker_enabled"] = config.docker_enabled
 
     # Calendar
+    add_if_set("calendar_source", config.calendar_source, "CALENDAR_SOURCE")
     add_if_set("google_credentials_path", config.google_credentials_path, "GOOGLE_CREDENTIALS_PATH")
     add_if_set("google_calendar_ids", config.google_calendar_ids, "GOOGLE_CALENDAR_IDS")
+    add_if_set("ics_calendar_urls", config.ics_calendar_urls, "ICS_CALENDAR_URLS")
+    add_if_set("caldav_urls", config.caldav_urls, "CALDAV_URLS")
+    add_if_set("caldav_username", config.caldav_username, "CALDAV_USERNAME")
+    add_if_set("caldav_password", config.caldav_password, "CALDAV_PASSWORD")
     if config.calendar_enabled is not None:
         runtime_updates["calendar_enabled"] = config.calendar_enabled
 
@@ -261,15 +274,13 @@ async def save_config(config: ConfigUpdate):
         updates["CACHE_TTL"] = str(config.cache_ttl)
     add_if_set("cors_origins", config.cors_origins, "CORS_ORIGINS")
 
-    # Save runtime config (enabled flags) - this always succeeds even if empty
+    # Save runtime config (enabled flags) - this always succeeds even if empty.
+    # Saved changes reach the job registry through config_store, which starts,
+    # stops or re-polls only the affected services.
     if runtime_updates:
         current_runtime = get_runtime_config()
         current_runtime.update(runtime_updates)
-        runtime_success = save_runtime_config(current_runtime)
-        if runtime_success:
-            # Clear cache for affected services so changes take effect immediately
-            await cache_service.clear()
-        else:
+        if not save_runtime_config(current_runtime):
             logger.warning("Failed to save runtime config, but continuing with .env save")
 
     if not updates and not runtime_updates:
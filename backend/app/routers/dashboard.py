@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from datetime import datetime
+import hashlib
 
 from app.config import get_settings
 from app.models.schemas import (
@@ -12,58 +13,134 @@ from app.models.schemas import (
     WeatherStatus,
     NewsStatus,
     UnraidStatus,
+    AgentsStatus,
     StatusLevel,
+    ReadinessResponse,
+    ServiceReadiness,
+    FederatedDashboard,
+    FederatedSite,
 )
-from app.services import (
-    unifi_service,
-    proxmox_service,
-    plex_service,
-    docker_service,
-    calendar_service,
-    weather_service,
-    news_service,
-    unraid_service,
-)
+from app.services import cache_service
+from app.services.anomaly import anomaly_detector
+from app.services.federation import CACHE_KEY as FEDERATION_CACHE_KEY, dashboard_status, worst_status
+from app.services.job_registry import COLLECTORS, job_registry
+from app.services.leader import leader
 
 router = APIRouter(prefix="/api", tags=["dashboard"])
 
+# Services whose data makes up /api/dashboard
+DASHBOARD_SERVICES = ("unifi", "proxmox", "plex", "docker", "calendar", "unraid", "agents")
+
+
+async def _stale_or_loading(cache_key: str, model):
+    """The last-known data (e.g. restored from the snapshot) marked stale, or a loading placeholder."""
+    last_known = await cache_service.get_last_known(cache_key)
+    if last_known is not None:
+        value, timestamp = last_known
+        age = int((datetime.now() - timestamp).total_seconds())
+        return value.model_copy(update={"stale": True, "stale_seconds": age})
+    return model(status=StatusLevel.UNKNOWN, loading=True, last_updated=datetime.now())
+
+
+async def _service_status(name: str, model):
+    """Get a service's status; followers serve the leader's and never poll upstreams."""
+    if not leader.is_leader and job_registry.is_enabled(name):
+        value = await cache_service.get(f"{name}_status") if job_registry.is_warm(name) else None
+        if value is not None:
+            return value
+        return await _stale_or_loading(f"{name}_status", model)
+    return anomaly_detector.attach(name, await COLLECTORS[name].get_status())
+
+
+async def _collected_status(name: str, model):
+    """Get a service's status without waiting on its first collection.
+
+    Until then, serve the last-known data (e.g. restored from the snapshot)
+    marked stale, or a loading placeholder if there is none.
+    """
+    cache_key = f"{name}_status"
+    if (
+        job_registry.is_enabled(name)
+        and not job_registry.is_warm(name)
+        and await cache_service.get(cache_key) is None
+    ):
+        return await _stale_or_loading(cache_key, model)
+    return await _service_status(name, model)
+
+
+async def _dashboard_etag() -> str:
+    """Weak ETag over everything build_dashboard() depends on.
+
+    That is each service's data and whether it is still fresh (expired data
+    is served marked stale), whether the service is enabled and warm, and
+    whether this worker collects itself or follows the leader.
+    """
+    settings = get_settings()
+    state = ",".join(
+        f"{name}:{int(getattr(settings, f'{name}_enabled'))}"
+        f"{int(job_registry.is_enabled(name))}{int(job_registry.is_warm(name))}"
+        for name in DASHBOARD_SERVICES
+    )
+    fingerprint = await cache_service.fingerprint(f"{name}_status" for name in DASHBOARD_SERVICES)
+    digest = hashlib.sha1(f"{fingerprint};{state};{int(leader.is_leader)}".encode()).hexdigest()[:16]
+    return f'W/"{digest}"'
+
 
 @router.get("/dashboard", response_model=DashboardStatus)
-async def get_dashboard():
-    """Get complete dashboard status from all enabled services."""
+async def get_dashboard(request: Request, response: Response):
+    """Get complete dashboard status from all enabled services.
+
+    The ETag changes whenever the response would, so clients and federated
+    peers can send If-None-Match and get a bodyless 304 while nothing changed.
+    """
+    etag = await _dashboard_etag()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return await build_dashboard()
+
+
+async def build_dashboard() -> DashboardStatus:
+    """This instance's dashboard, without waiting on first collections."""
     settings = get_settings()
 
-    # Only fetch enabled services, return disabled status for others
+    # Only fetch enabled services, return disabled status for others.
+    # Services still waiting on their first collection are marked as loading.
     if settings.unifi_enabled:
-        unifi = await unifi_service.get_status()
+        unifi = await _collected_status("unifi", UnifiStatus)
     else:
         unifi = UnifiStatus(status=StatusLevel.UNKNOWN, error_message="Service disabled", last_updated=datetime.now())
 
     if settings.proxmox_enabled:
-        proxmox = await proxmox_service.get_status()
+        proxmox = await _collected_status("proxmox", ProxmoxStatus)
     else:
         proxmox = ProxmoxStatus(status=StatusLevel.UNKNOWN, error_message="Service disabled", last_updated=datetime.now())
 
     if settings.plex_enabled:
-        plex = await plex_service.get_status()
+        plex = await _collected_status("plex", PlexStatus)
     else:
         plex = PlexStatus(status=StatusLevel.UNKNOWN, error_message="Service disabled", last_updated=datetime.now())
 
     if settings.docker_enabled:
-        docker = await docker_service.get_status()
+        docker = await _collected_status("docker", DockerStatus)
     else:
         docker = DockerStatus(status=StatusLevel.UNKNOWN, error_message="Service disabled", last_updated=datetime.now())
 
     if settings.calendar_enabled:
-        calendar = await calendar_service.get_status()
+        calendar = await _collected_status("calendar", CalendarStatus)
     else:
         calendar = CalendarStatus(status=StatusLevel.UNKNOWN, error_message="Service disabled", last_updated=datetime.now())
 
     if settings.unraid_enabled:
-        unraid = await unraid_service.get_status()
+        unraid = await _collected_status("unraid", UnraidStatus)
     else:
         unraid = UnraidStatus(status=StatusLevel.UNKNOWN, error_message="Service disabled", last_updated=datetime.now())
 
+    if settings.agents_enabled:
+        agents = await _collected_status("agents", AgentsStatus)
+    else:
+        agents = AgentsStatus(status=StatusLevel.UNKNOWN, error_message="Service disabled", last_updated=datetime.now())
+
     return DashboardStatus(
         unifi=unifi,
         proxmox=proxmox,
@@ -71,6 +148,41 @@ async def get_dashboard():
         docker=docker,
         calendar=calendar,
         unraid=unraid,
+        agents=agents,
+        last_updated=datetime.now(),
+    )
+
+
+@router.get("/federation", response_model=FederatedDashboard)
+async def get_federation():
+    """This instance's dashboard plus every federated peer's, labelled by site.
+
+    Peers are served from the federation collector's last pull, so this is as
+    fast as /api/dashboard; unreachable peers show their last data as stale.
+    """
+    settings = get_settings()
+    local = await build_dashboard()
+    sites = [
+        FederatedSite(
+            name=settings.federation_site,
+            status=dashboard_status(local),
+            last_success=local.last_updated,
+            dashboard=local,
+        )
+    ]
+
+    last_known = await cache_service.get_last_known(FEDERATION_CACHE_KEY)
+    pulled = {site.name: site for site in last_known[0].peers} if last_known else {}
+    for name, url in settings.federation_peers_list:
+        site = pulled.get(name)
+        if site is None:
+            # Not pulled yet
+            site = FederatedSite(name=name, url=url, reachable=False, error_message="Loading")
+        sites.append(site)
+
+    return FederatedDashboard(
+        status=worst_status(site.status for site in sites),
+        sites=sites,
         last_updated=datetime.now(),
     )
 
@@ -78,72 +190,69 @@ async def get_dashboard():
 @router.get("/unifi", response_model=UnifiStatus)
 async def get_unifi():
     """Get Unifi controller status."""
-    return await unifi_service.get_status()
+    return await _service_status("unifi", UnifiStatus)
 
 
 @router.get("/proxmox", response_model=ProxmoxStatus)
 async def get_proxmox():
     """Get Proxmox status."""
-    return await proxmox_service.get_status()
+    return await _service_status("proxmox", ProxmoxStatus)
 
 
 @router.get("/plex", response_model=PlexStatus)
 async def get_plex():
     """Get Plex recently added."""
-    return await plex_service.get_status()
+    return await _service_status("plex", PlexStatus)
 
 
 @router.get("/docker", response_model=DockerStatus)
 async def get_docker():
     """Get Docker container status."""
-    return await docker_service.get_status()
+    return await _service_status("docker", DockerStatus)
 
 
 @router.get("/calendar", response_model=CalendarStatus)
 async def get_calendar():
     """Get upcoming calendar events."""
-    return await calendar_service.get_status()
+    return await _service_status("calendar", CalendarStatus)
 
 
 @router.get("/weather", response_model=WeatherStatus)
 async def get_weather():
     """Get weather forecast from Open-Meteo."""
-    return await weather_service.get_status()
+    return await _service_status("weather", WeatherStatus)
 
 
 @router.get("/news", response_model=NewsStatus)
 async def get_news():
     """Get top headlines from NewsAPI."""
-    return await news_service.get_status()
+    return await _service_status("news", NewsStatus)
 
 
 @router.get("/unraid", response_model=UnraidStatus)
 async def get_unraid():
     """Get Unraid server status."""
-    return await unraid_service.get_status()
+    return await _service_status("unraid", UnraidStatus)
+
+
+@router.get("/agents", response_model=AgentsStatus)
+async def get_agents():
+    """Get the latest reports of agents pushing to /api/ingest."""
+    return await _service_status("agents", AgentsStatus)
 
 
 @router.post("/refresh")
 async def refresh_all():
     """Force refresh all cached data for enabled services."""
-    from app.services.cache import cache_service
+    if not leader.is_leader:
+        # Only the leader worker polls; new data arrives with its next snapshot
+        requested = leader.request_refresh()
+        return {"status": "requested" if requested else "unavailable", "timestamp": datetime.now().isoformat()}
 
-    settings = get_settings()
     await cache_service.clear()
 
     # Fetch fresh data for enabled services only
-    if settings.unifi_enabled:
-        await unifi_service.get_status(use_cache=False)
-    if settings.proxmox_enabled:
-        await proxmox_service.get_status(use_cache=False)
-    if settings.plex_enabled:
-        await plex_service.get_status(use_cache=False)
-    if settings.docker_enabled:
-        await docker_service.get_status(use_cache=False)
-    if settings.calendar_enabled:
-        await calendar_service.get_status(use_cache=False)
-    if settings.unraid_enabled:
-        await unraid_service.get_status(use_cache=False)
+    await job_registry.poll_all()
 
     return {"status": "refreshed", "timestamp": datetime.now().isoformat()}
 
@@ -152,3 +261,20 @@ async def refresh_all():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """Readiness: 200 once every enabled service has been collected, else 503."""
+    services = {
+        name: ServiceReadiness(
+            enabled=job_registry.is_enabled(name),
+            warm=job_registry.is_warm(name),
+            last_collected=job_registry.last_collected(name),
+        )
+        for name in COLLECTORS
+    }
+    ready = all(s.warm for s in services.values() if s.enabled)
+    if not ready:
+        response.status_code = 503
+    return ReadinessResponse(ready=ready, services=services)
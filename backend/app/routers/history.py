@@ -0,0 +1,102 @@
+import asyncio
+import re
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.models.schemas import (
+    AggregateGroup,
+    AggregateResponse,
+    HistoryResponse,
+    HistorySeries,
+)
+from app.services.aggregate import aggregate, is_valid_aggregation
+from app.services.history import history_store, parse_series_key
+from app.services.tsdb import tsdb_store
+
+router = APIRouter(prefix="/api/history", tags=["history"])
+
+RANGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_range(value: str) -> int:
+    """Parse a range like 30m, 6h or 7d into seconds."""
+    match = re.fullmatch(r"(\d+)([smhd])", value.strip())
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(status_code=400, detail=f"Invalid range: {value}")
+    return int(match.group(1)) * RANGE_UNITS[match.group(2)]
+
+
+@router.get("", response_model=HistoryResponse)
+async def get_history(
+    series: List[str] = Query(default=[]),
+    range: str = "1h",
+    points: int = Query(default=120, ge=1, le=2000),
+):
+    """Downsampled history for the requested series.
+
+    A series may be a full key (`metric{label=value}`) or a bare metric name,
+    which selects every series of that metric. Ranges the in-memory history
+    does not reach back to are read from the on-disk store.
+    """
+    range_seconds = parse_range(range)
+    since = time.time() - range_seconds
+    # The store's lock is held by compaction in a worker thread; don't wait for it on the loop
+    stored = await asyncio.to_thread(tsdb_store.series_keys)
+    available = sorted(set(history_store.series_names()) | set(stored))
+
+    keys = []
+    for name in series:
+        if name in available:
+            keys.append(name)
+        else:
+            keys.extend(k for k in available if parse_series_key(k)[0] == name)
+
+    result = {}
+    for key in dict.fromkeys(keys):
+        if history_store.covers(key, since):
+            data = history_store.query(key, since, points)
+        else:
+            data = await tsdb_store.query(key, since, points)
+        if data:
+            result[key] = HistorySeries(points=[[t, v] for t, v in data])
+
+    return HistoryResponse(range_seconds=range_seconds, series=result, available=available)
+
+
+@router.get("/aggregate", response_model=AggregateResponse)
+async def get_aggregate(
+    metric: str,
+    agg: str = "avg",
+    range: str = "24h",
+    group_by: str = "",
+    threshold: Optional[float] = None,
+    top: Optional[int] = Query(default=None, ge=1),
+    order: str = "desc",
+):
+    """Aggregate all series of a metric over the in-memory history.
+
+    agg is avg, min, max, last, count, pNN (percentile) or time_above
+    (seconds above threshold). group_by is a comma-separated list of labels;
+    top keeps the N groups with the highest (order=desc) or lowest values.
+    """
+    if not is_valid_aggregation(agg):
+        raise HTTPException(status_code=400, detail=f"Unknown aggregation: {agg}")
+    if agg == "time_above" and threshold is None:
+        raise HTTPException(status_code=400, detail="time_above requires a threshold")
+
+    range_seconds = parse_range(range)
+    labels = [label.strip() for label in group_by.split(",") if label.strip()]
+    groups = await asyncio.to_thread(aggregate, metric, time.time() - range_seconds, agg, labels, threshold)
+
+    groups.sort(key=lambda g: g["value"], reverse=order != "asc")
+    if top is not None:
+        groups = groups[:top]
+
+    return AggregateResponse(
+        metric=metric,
+        agg=agg,
+        range_seconds=range_seconds,
+        groups=[AggregateGroup(**g) for g in groups],
+    )
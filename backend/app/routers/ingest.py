@@ -0,0 +1,56 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app.config import get_settings
+from app.models.schemas import IngestResponse
+from app.services.ingest import ingest_service, parse_lines
+from app.utils.auth import require_ingest_key
+
+router = APIRouter(prefix="/api", tags=["ingest"])
+
+# Rejected lines reported back per request
+MAX_ERRORS = 20
+
+
+def _throttled() -> HTTPException:
+    return HTTPException(status_code=429, detail="Too many reports queued, retry later", headers={"Retry-After": "1"})
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > limit:
+        raise HTTPException(status_code=413, detail=f"Request body is larger than {limit} bytes")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail=f"Request body is larger than {limit} bytes")
+    return bytes(body)
+
+
+@router.post("/ingest", response_model=IngestResponse, status_code=202, dependencies=[Depends(require_ingest_key)])
+async def ingest(request: Request):
+    """Accept a batch of agent reports, one JSON object per line (NDJSON).
+
+    Valid lines are accepted even when others are rejected. Reports are
+    applied in the background; while too many batches are waiting the
+    request gets 429 with Retry-After and should be sent again.
+    """
+    # Refuse bursts before spending time on the body
+    if ingest_service.is_full():
+        ingest_service.throttled += 1
+        raise _throttled()
+
+    settings = get_settings()
+    lines = (await _read_body(request, settings.ingest_max_bytes)).splitlines()
+    if len(lines) > settings.ingest_max_lines:
+        raise HTTPException(status_code=413, detail=f"More than {settings.ingest_max_lines} lines")
+
+    # Off the event loop: a full batch takes tens of milliseconds to validate
+    reports, errors = await asyncio.to_thread(parse_lines, lines)
+    if not reports:
+        raise HTTPException(status_code=400, detail=errors[:MAX_ERRORS] or "No reports in the request body")
+    if not ingest_service.submit(reports, rejected=len(errors)):
+        raise _throttled()
+    return IngestResponse(accepted=len(reports), rejected=len(errors), errors=errors[:MAX_ERRORS])
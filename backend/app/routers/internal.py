@@ -0,0 +1,102 @@
+import asyncio
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.services.cache import cache_service
+from app.services.cassette import library
+from app.services.circuit_breaker import all_breakers
+from app.services.ingest import ingest_service
+from app.services.instrumentation import loop_monitor
+from app.services.job_registry import job_registry
+from app.services.leader import leader
+from app.services.loop_watchdog import loop_watchdog
+from app.services.memory import allocation_tracker, memory_report
+from app.services.profiler import profiler
+from app.services.tracing import tracer
+from app.services.upstream import all_upstreams
+from app.utils.auth import require_internal_key
+
+router = APIRouter(prefix="/api/internal", tags=["internal"])
+
+# Upper bound for a profile waiting on poll cycles
+MAX_PROFILE_SECONDS = 300
+
+
+@router.get("/stats")
+async def get_internal_stats():
+    """Performance counters: collectors, upstreams, cache, event loop and tasks."""
+    return {
+        "collectors": job_registry.poll_stats(),
+        "upstreams": {name: upstream.stats() for name, upstream in sorted(all_upstreams().items())},
+        "breakers": {
+            name: {"state": breaker.state.value, "failures": breaker.failures}
+            for name, breaker in sorted(all_breakers().items())
+        },
+        "cache": await cache_service.stats(),
+        "event_loop": {"lag": loop_monitor.stats(), "blocking": loop_watchdog.stats()},
+        "tracing": tracer.stats(),
+        "worker": leader.stats(),
+        "cassettes": library.stats(),
+        "ingest": ingest_service.stats(),
+        "tasks": {
+            "asyncio": len(asyncio.all_tasks()),
+            "collections_in_flight": sorted(job_registry.in_flight),
+            "upstream_requests_in_flight": sum(u.in_flight for u in all_upstreams().values()),
+        },
+    }
+
+
+@router.get("/profile", dependencies=[Depends(require_internal_key)])
+async def get_profile(
+    seconds: Optional[float] = Query(default=None, gt=0, le=60),
+    polls: Optional[int] = Query(default=None, ge=1, le=10),
+    interval_ms: int = Query(default=10, ge=1, le=100),
+    format: Literal["collapsed", "json"] = "collapsed",
+):
+    """Sample the event loop for a window of seconds, or the next N poll cycles.
+
+    Returns collapsed stacks (one "frame;frame count" line per stack) for
+    flamegraph tools, or a JSON summary with per-service sample counts.
+    """
+    if (seconds is None) == (polls is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of seconds or polls")
+    if profiler.active:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    if seconds is not None:
+        until = asyncio.sleep(seconds)
+    else:
+        until = job_registry.wait_for_collections(polls, MAX_PROFILE_SECONDS)
+    result = await profiler.profile(until, interval_ms / 1000)
+
+    if format == "json":
+        return result.to_dict()
+    return PlainTextResponse(result.collapsed())
+
+
+@router.get("/memory", dependencies=[Depends(require_internal_key)])
+async def get_memory(
+    tracemalloc: Optional[Literal["start", "diff", "stop"]] = None,
+    top: int = Query(default=20, ge=1, le=200),
+):
+    """Approximate retained memory per cache key, service, buffer and history metric.
+
+    tracemalloc=start begins tracing allocations; each tracemalloc=diff returns
+    the top allocation changes since the previous diff (or start), attributed
+    to the service whose code allocated them; tracemalloc=stop ends tracing.
+    """
+    # Snapshots and their comparison take a while with many live objects
+    allocations = None
+    if tracemalloc == "start":
+        await asyncio.to_thread(allocation_tracker.start)
+    elif tracemalloc == "diff":
+        allocations = await asyncio.to_thread(allocation_tracker.diff, top)
+    elif tracemalloc == "stop":
+        await asyncio.to_thread(allocation_tracker.stop)
+
+    report = await memory_report()
+    if allocations is not None:
+        report["allocations"] = allocations
+    return report
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.services.prometheus import CONTENT_TYPE, prometheus_exporter
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(content=await prometheus_exporter.render(), media_type=CONTENT_TYPE)
@@ -7,3 +7,5 @@ from app.services.calendar import calendar_service
 from app.services.weather import weather_service
 from app.services.news import news_service
 from app.services.unraid import unraid_service
+from app.services.federation import federation_service
+from app.services.ingest import ingest_service
@@ -0,0 +1,217 @@
+"""
+Aggregations over the in-memory metric history.
+
+The series of a metric are copied into one NumPy array, each group into a
+row of a matrix, so avg/min/max/percentiles are a single row-wise reduction
+(or sort) instead of a loop over samples. Rows are padded with a value that
+cannot change the result: 0 for avg, -inf for max, +inf for min and
+percentiles (it sorts last). When groups are too uneven for rows, the series
+of each group are placed next to each other in a flat array and reduced per
+group with ufunc.reduceat. Timestamps are only copied for time_above, and
+the buffers are reused between queries: fresh arrays of a few million samples
+spend most of the copy page-faulting.
+"""
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.history import history_store
+
+# Aggregations without a parameter; percentiles are written p50, p95, p99.9 ...
+SIMPLE_AGGREGATIONS = ("avg", "min", "max", "last", "count", "time_above")
+PERCENTILE_PATTERN = re.compile(r"p(\d{1,2}(?:\.\d+)?|100)")
+
+# Gather buffers shared by all queries; one query uses them at a time
+_buffer_lock = threading.Lock()
+_buffers: Dict[str, np.ndarray] = {}
+
+
+def is_valid_aggregation(agg: str) -> bool:
+    return agg in SIMPLE_AGGREGATIONS or PERCENTILE_PATTERN.fullmatch(agg) is not None
+
+
+def _buffer(name: str, dtype, size: int) -> np.ndarray:
+    buffer = _buffers.get(name)
+    if buffer is None or len(buffer) < size:
+        # Headroom so a slowly growing history does not reallocate every query
+        buffer = _buffers[name] = np.empty(size + size // 4, dtype=dtype)
+    return buffer[:size]
+
+
+def _row_percentile(matrix: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Linear-interpolated percentile of the first counts[i] values of each row.
+
+    Sorts the rows in place (faster than partitioning them); padding past a
+    row's count must sort last.
+    """
+    pos = (q / 100.0) * (counts - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    matrix.sort(axis=1)
+    rows = np.arange(len(counts))
+    low_values = matrix[rows, lo].astype(np.float64)
+    high_values = matrix[rows, hi].astype(np.float64)
+    return low_values + (high_values - low_values) * (pos - lo)
+
+
+def aggregate(
+    metric: str,
+    since: float,
+    agg: str,
+    group_by: Optional[List[str]] = None,
+    threshold: Optional[float] = None,
+) -> List[Dict]:
+    """
+    Aggregate every series of a metric since a time.
+
+    Series are grouped by the values of the group_by labels (each series is its
+    own group when group_by is empty). Returns one dict per group with its
+    labels, value, series and sample counts. CPU-bound: call it from a worker
+    thread.
+    """
+    with _buffer_lock:
+        return _aggregate(metric, since, agg, group_by, threshold)
+
+
+def _aggregate(
+    metric: str,
+    since: float,
+    agg: str,
+    group_by: Optional[List[str]],
+    threshold: Optional[float],
+) -> List[Dict]:
+    percentile = PERCENTILE_PATTERN.fullmatch(agg)
+    plan = {}
+
+    def layout(series: List[Tuple[Dict[str, str], int]]):
+        # Map series to groups
+        group_index: Dict[Tuple, int] = {}
+        group_labels: List[Dict[str, str]] = []
+        series_groups_list = []
+        for labels, _ in series:
+            if group_by:
+                key = tuple(labels.get(label, "") for label in group_by)
+                key_labels = dict(zip(group_by, key))
+            else:
+                key = tuple(sorted(labels.items()))
+                key_labels = labels
+            index = group_index.get(key)
+            if index is None:
+                index = group_index[key] = len(group_labels)
+                group_labels.append(key_labels)
+            series_groups_list.append(index)
+
+        n_groups = len(group_labels)
+        series_groups = np.array(series_groups_list, dtype=np.int64)
+        lengths = np.array([count for _, count in series], dtype=np.int64)
+        total = int(lengths.sum())
+        group_counts = np.bincount(series_groups, weights=lengths, minlength=n_groups).astype(np.int64)
+        group_starts = np.cumsum(group_counts) - group_counts
+
+        # Place the series of each group one after the other
+        order = np.argsort(series_groups, kind="stable")
+        flat_offsets = np.empty_like(lengths)
+        flat_offsets[order] = np.cumsum(lengths[order]) - lengths[order]
+
+        width = int(group_counts.max())
+        # One row per group, unless padding would dominate
+        rows = agg not in ("count", "last", "time_above") and n_groups * width <= 2 * total
+        if rows:
+            offsets = flat_offsets - group_starts[series_groups] + series_groups * width
+            size = n_groups * width
+        else:
+            offsets = flat_offsets
+            size = total
+
+        times = _buffer("times", np.float64, size) if agg == "time_above" else None
+        values = _buffer("values", np.float32, size)
+        plan.update(
+            group_labels=group_labels,
+            series_groups=series_groups,
+            lengths=lengths,
+            offsets=offsets,
+            group_counts=group_counts,
+            group_starts=group_starts,
+            width=width,
+            rows=rows,
+            times=times,
+            values=values,
+        )
+        return times, values, offsets.tolist()
+
+    gathered = history_store.gather(metric, since, layout)
+    if not gathered:
+        return []
+    group_labels = plan["group_labels"]
+    series_groups = plan["series_groups"]
+    group_counts = plan["group_counts"]
+    group_starts = plan["group_starts"]
+    times = plan["times"]
+    values = plan["values"]
+    series_ends = plan["offsets"] + plan["lengths"] - 1
+    n_groups = len(group_labels)
+    group_series = np.bincount(series_groups, minlength=n_groups)
+
+    if plan["rows"]:
+        width = plan["width"]
+        matrix = values.reshape(n_groups, width)
+        padded = np.flatnonzero(group_counts < width)
+        if agg == "avg":
+            pad = 0.0
+        elif agg == "max":
+            pad = -np.inf
+        else:
+            # Sorts after every sample
+            pad = np.inf
+        for group in padded:
+            matrix[group, group_counts[group]:] = pad
+        if agg == "avg":
+            result = matrix.sum(axis=1, dtype=np.float64) / group_counts
+        elif agg == "min":
+            result = matrix.min(axis=1).astype(np.float64)
+        elif agg == "max":
+            result = matrix.max(axis=1).astype(np.float64)
+        else:
+            result = _row_percentile(matrix, group_counts, float(percentile.group(1)))
+    elif agg == "avg":
+        result = np.add.reduceat(values, group_starts, dtype=np.float64) / group_counts
+    elif agg == "min":
+        result = np.minimum.reduceat(values, group_starts).astype(np.float64)
+    elif agg == "max":
+        result = np.maximum.reduceat(values, group_starts).astype(np.float64)
+    elif agg == "count":
+        result = group_counts.astype(np.float64)
+    elif agg == "last":
+        # Latest sample of each series, then the latest series per group
+        newest = np.array([item[3] for item in gathered], dtype=np.float64)
+        order = np.lexsort((newest, series_groups))
+        group_last = np.cumsum(group_series) - 1
+        result = values[series_ends][order][group_last].astype(np.float64)
+    elif agg == "time_above":
+        # Each sample counts until the next sample of its series
+        durations = _buffer("durations", np.float64, len(times))
+        np.subtract(times[1:], times[:-1], out=durations[:-1])
+        durations[series_ends] = 0.0
+        above = _buffer("above", np.bool_, len(values))
+        np.greater(values, threshold if threshold is not None else 0.0, out=above)
+        durations *= above
+        result = np.add.reduceat(durations, group_starts)
+    else:
+        # Few, very uneven groups: one at a time
+        q = float(percentile.group(1))
+        result = np.array([
+            _row_percentile(values[start:start + count].reshape(1, -1), group_counts[i:i + 1], q)[0]
+            for i, (start, count) in enumerate(zip(group_starts, group_counts))
+        ])
+
+    return [
+        {
+            "labels": group_labels[i],
+            "value": round(float(result[i]), 3),
+            "series": int(group_series[i]),
+            "samples": int(group_counts[i]),
+        }
+        for i in range(n_groups)
+    ]
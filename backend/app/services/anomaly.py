@@ -0,0 +1,95 @@
+"""
+Streaming anomaly detection for collected metrics.
+
+Each series keeps an exponentially weighted mean and variance, updated in O(1)
+per sample with three floats of state. A sample whose distance from the
+baseline exceeds anomaly_zscore standard deviations (after anomaly_warmup
+samples) is reported as an anomaly.
+
+The anomalies of each service's latest collection are kept here and attached
+to its status wherever it is cached or served, so a status rebuilt on the
+request path still carries them.
+"""
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import get_settings
+from app.models.schemas import Anomaly, BaseStatus
+from app.services.history import Labels, series_key
+
+# Deviation floor relative to the baseline, so series that never changed
+# (e.g. a constant container count) don't flag on float noise
+RELATIVE_STD_FLOOR = 0.05
+ABSOLUTE_STD_FLOOR = 1e-3
+
+
+class AnomalyDetector:
+    def __init__(self):
+        # series key -> [mean, variance, samples seen]
+        self._baselines: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        # Anomalies of each service's latest collection
+        self._flagged: Dict[str, List[Anomaly]] = {}
+
+    def observe(self, samples: Iterable[Tuple[str, Labels, float]]) -> List[Anomaly]:
+        """Update baselines with (metric, labels, value) samples; return anomalies."""
+        settings = get_settings()
+        alpha = settings.anomaly_alpha
+        anomalies = []
+        with self._lock:
+            for metric, labels, value in samples:
+                key = series_key(metric, labels)
+                value = float(value)
+                state = self._baselines.get(key)
+                if state is None:
+                    self._baselines[key] = [value, 0.0, 1]
+                    continue
+
+                mean, variance, count = state
+                diff = value - mean
+                if count >= settings.anomaly_warmup:
+                    std = max(math.sqrt(variance), abs(mean) * RELATIVE_STD_FLOOR, ABSOLUTE_STD_FLOOR)
+                    zscore = diff / std
+                    if abs(zscore) >= settings.anomaly_zscore:
+                        anomalies.append(Anomaly(
+                            series=key,
+                            value=round(value, 3),
+                            expected=round(mean, 3),
+                            zscore=round(zscore, 2),
+                        ))
+
+                increment = alpha * diff
+                state[0] = mean + increment
+                state[1] = (1 - alpha) * (variance + diff * increment)
+                state[2] = count + 1
+        return anomalies
+
+    def flag(self, service: str, anomalies: List[Anomaly]) -> bool:
+        """Set a service's current anomalies; returns whether they changed."""
+        with self._lock:
+            changed = self._flagged.get(service, []) != anomalies
+            self._flagged[service] = anomalies
+        return changed
+
+    def attach(self, service: str, status: Optional[BaseStatus]) -> Optional[BaseStatus]:
+        """The status with the service's current anomalies."""
+        anomalies = self._flagged.get(service)
+        if status is None or anomalies is None or status.anomalies == anomalies:
+            return status
+        return status.model_copy(update={"anomalies": anomalies})
+
+    def baseline(self, key: str) -> Tuple[float, float, int]:
+        """(mean, std, samples) for a series, or zeros if it was never seen."""
+        with self._lock:
+            state = self._baselines.get(key)
+            if state is None:
+                return 0.0, 0.0, 0
+            return state[0], math.sqrt(state[1]), int(state[2])
+
+    def __len__(self) -> int:
+        return len(self._baselines)
+
+
+# Singleton instance
+anomaly_detector = AnomalyDetector()
@@ -1,37 +1,178 @@
 from cachetools import TTLCache
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 from datetime import datetime
 import asyncio
+import hashlib
 
 from app.config import get_settings
+from app.models.schemas import BaseStatus
+from app.services.anomaly import anomaly_detector
+from app.services.tracing import span
+
+STATUS_SUFFIX = "_status"
+
+
+def _with_anomalies(key: str, value: Any) -> Any:
+    # Service statuses carry the anomalies of the latest collection
+    if isinstance(value, BaseStatus) and key.endswith(STATUS_SUFFIX):
+        return anomaly_detector.attach(key[:-len(STATUS_SUFFIX)], value)
+    return value
 
 
 class CacheService:
-    """Simple in-memory cache with TTL support."""
+    """Simple in-memory cache with TTL support.
+
+    Besides the TTL cache, the latest value of every key is kept as
+    "last known" data that never expires; it backs the persisted snapshot.
+    """
 
     def __init__(self):
         settings = get_settings()
         self._cache = TTLCache(maxsize=100, ttl=settings.cache_ttl)
         self._lock = asyncio.Lock()
         self._timestamps: dict[str, datetime] = {}
+        self._last_known: dict[str, Tuple[Any, datetime]] = {}
+        # Incremented on every change so consumers can tell if data is new
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        # Follower workers serve the leader's data, which never expires locally
+        self._mirroring = False
+        # Keys set by this process rather than mirrored from the leader
+        self._local: set[str] = set()
+
+    @property
+    def version(self) -> int:
+        return self._version
 
     async def get(self, key: str) -> Optional[Any]:
+        with span("cache.get", key=key) as get_span:
+            async with self._lock:
+                value = self._cache.get(key)
+                if value is None and self._mirroring and key in self._last_known:
+                    value = self._last_known[key][0]
+                if value is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            if get_span is not None:
+                get_span.set(hit=value is not None)
+            return value
+
+    async def peek(self, key: str) -> Optional[Any]:
+        """Fresh value for key without counting a hit or miss."""
         async with self._lock:
             return self._cache.get(key)
 
     async def set(self, key: str, value: Any) -> None:
+        value = _with_anomalies(key, value)
+        with span("cache.set", key=key):
+            async with self._lock:
+                now = datetime.now()
+                self._cache[key] = value
+                self._timestamps[key] = now
+                self._last_known[key] = (value, now)
+                self._local.add(key)
+                self._version += 1
+
+    async def delete(self, key: str) -> None:
+        async with self._lock:
+            self._cache.pop(key, None)
+            self._timestamps.pop(key, None)
+            self._last_known.pop(key, None)
+            self._local.discard(key)
+            self._version += 1
+
+    async def get_within(self, key: str, max_age: float) -> Optional[Any]:
+        """Value for key if it was stored less than max_age seconds ago, regardless of TTL."""
         async with self._lock:
-            self._cache[key] = value
-            self._timestamps[key] = datetime.now()
+            entry = self._last_known.get(key)
+        if entry is None or (datetime.now() - entry[1]).total_seconds() >= max_age:
+            return None
+        return entry[0]
 
     async def get_timestamp(self, key: str) -> Optional[datetime]:
         async with self._lock:
             return self._timestamps.get(key)
 
+    async def get_last_known(self, key: str) -> Optional[Tuple[Any, datetime]]:
+        """Latest value for key and when it was stored, regardless of TTL."""
+        async with self._lock:
+            return self._last_known.get(key)
+
+    async def last_known_items(self) -> Dict[str, Tuple[Any, datetime]]:
+        async with self._lock:
+            return dict(self._last_known)
+
+    async def fingerprint(self, keys: Iterable[str]) -> str:
+        """Short hash that changes whenever any of keys is set, deleted or expires."""
+        async with self._lock:
+            parts = []
+            for key in keys:
+                entry = self._last_known.get(key)
+                fresh = int(key in self._cache)
+                parts.append(f"{key}={entry[1].isoformat() if entry else ''}:{fresh}")
+        return hashlib.sha1(";".join(parts).encode()).hexdigest()[:16]
+
+    async def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts and the age of every entry, in seconds."""
+        async with self._lock:
+            now = datetime.now()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "entries": {
+                    key: {
+                        "age": round((now - timestamp).total_seconds(), 1),
+                        "fresh": key in self._cache,
+                    }
+                    for key, (_, timestamp) in sorted(self._last_known.items())
+                },
+            }
+
+    async def restore(self, entries: Dict[str, Tuple[Any, datetime]]) -> None:
+        """Load last-known values (e.g. from a snapshot) without making them fresh."""
+        async with self._lock:
+            for key, entry in entries.items():
+                self._last_known.setdefault(key, entry)
+
+    async def mirror(self, entries: Dict[str, Tuple[Any, datetime]]) -> Dict[str, Tuple[Any, datetime]]:
+        """Take over another process's entries; returns those newer than ours.
+
+        Entries the other process no longer has (it deleted them) are dropped,
+        unless this process set them itself.
+        """
+        async with self._lock:
+            self._mirroring = True
+            changed = {}
+            for key, (value, timestamp) in entries.items():
+                current = self._last_known.get(key)
+                if current is not None and current[1] >= timestamp:
+                    continue
+                self._cache[key] = value
+                self._timestamps[key] = timestamp
+                self._last_known[key] = (value, timestamp)
+                changed[key] = (value, timestamp)
+            deleted = [key for key in self._last_known if key not in entries and key not in self._local]
+            for key in deleted:
+                self._cache.pop(key, None)
+                self._timestamps.pop(key, None)
+                del self._last_known[key]
+            if changed or deleted:
+                self._version += 1
+            return changed
+
+    def stop_mirroring(self) -> None:
+        """Entries expire again (this process now collects them itself)."""
+        self._mirroring = False
+
     async def clear(self) -> None:
         async with self._lock:
             self._cache.clear()
             self._timestamps.clear()
+            self._version += 1
 
 
 # Singleton instance
@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta, date, time, timezone
+from typing import Dict, List, Tuple
+import asyncio
 import logging
 import os.path
+import threading
 
 from google.oauth2.credentials import Credentials
 from google.oauth2 import service_account
@@ -11,6 +14,8 @@ from googleapiclient.discovery import build
 from app.config import get_settings
 from app.models.schemas import CalendarStatus, CalendarEvent, StatusLevel
 from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker, serve_last_known
+from app.services.ics_calendar import ics_calendar_service
 from app.utils.runtime_config import get_service_enabled
 
 logger = logging.getLogger(__name__)
@@ -18,10 +23,55 @@ logger = logging.getLogger(__name__)
 CACHE_KEY = "calendar_status"
 SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
 
+# Google batch requests accept at most 50 calls; each calendar needs two
+CALENDARS_PER_BATCH = 25
+# Refresh OAuth tokens this long before they expire
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def _parse_event(event: dict, calendar_name: str) -> CalendarEvent:
+    """Normalize a Google Calendar API event into a CalendarEvent."""
+    start = event.get("start", {})
+    end = event.get("end", {})
+
+    # Handle all-day events vs timed events
+    if "date" in start:
+        # All-day event: date-only -> make it UTC-aware at midnight
+        start_d = date.fromisoformat(start["date"])
+        end_d = date.fromisoformat(end["date"])
+        start_dt = datetime.combine(start_d, time.min, tzinfo=timezone.utc)
+        end_dt = datetime.combine(end_d, time.min, tzinfo=timezone.utc)
+        all_day = True
+    else:
+        start_str = start.get("dateTime", "")
+        end_str = end.get("dateTime", "")
+        # Handle timezone offset
+        start_dt = datetime.fromisoformat(
+            start_str.replace("Z", "+00:00")
+        ).astimezone(timezone.utc)
+        end_dt = datetime.fromisoformat(
+            end_str.replace("Z", "+00:00")
+        ).astimezone(timezone.utc)
+        all_day = False
+
+    return CalendarEvent(
+        id=event.get("id", ""),
+        summary=event.get("summary", "No Title"),
+        start=start_dt,
+        end=end_dt,
+        all_day=all_day,
+        location=event.get("location"),
+        calendar_name=calendar_name,
+    )
+
 
 class CalendarService:
     def __init__(self):
         self._service = None
+        self._credentials = None
+        # googleapiclient/httplib2 objects are not thread-safe; the poll and
+        # the background token refresh both run in worker threads
+        self._lock = threading.Lock()
 
     def _get_credentials(self):
         """Get Google API credentials."""
@@ -64,11 +114,88 @@ class CalendarService:
 
     def _get_service(self):
         """Get Google Calendar API service."""
-        if self._service is None:
-            creds = self._get_credentials()
-            if creds:
-                self._service = build("calendar", "v3", credentials=creds)
-        return self._service
+        with self._lock:
+            if self._service is None:
+                creds = self._get_credentials()
+                if creds:
+                    self._credentials = creds
+                    self._service = build(
+                        "calendar", "v3", credentials=creds, cache_discovery=False
+                    )
+            return self._service
+
+    def _refresh_credentials(self) -> None:
+        """Refresh credentials if they expire within TOKEN_REFRESH_MARGIN."""
+        with self._lock:
+            creds = self._credentials
+            if creds is None:
+                return
+
+            # google-auth stores expiry as a naive UTC datetime
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            if creds.valid and creds.expiry and creds.expiry - now > TOKEN_REFRESH_MARGIN:
+                return
+
+            try:
+                creds.refresh(Request())
+                if isinstance(creds, Credentials):
+                    creds_path = get_settings().google_credentials_path
+                    token_path = creds_path.replace(".json", "_token.json")
+                    with open(token_path, "w") as token:
+                        token.write(creds.to_json())
+                logger.debug("Refreshed Google Calendar credentials")
+            except Exception as e:
+                logger.warning(f"Google Calendar token refresh failed: {e}")
+
+    async def refresh_credentials(self) -> None:
+        """Background job: refresh OAuth tokens before the poll needs them."""
+        await asyncio.to_thread(self._refresh_credentials)
+
+    def _fetch_calendars(
+        self, service, calendar_ids: List[str], time_min: str, time_max: str
+    ) -> Tuple[Dict[str, dict], Dict[str, dict], Dict[str, str]]:
+        """
+        Fetch metadata and events for every calendar using batched requests.
+
+        Returns (calendars, events, errors), each keyed by calendar ID.
+        """
+        calendars: Dict[str, dict] = {}
+        events: Dict[str, dict] = {}
+        errors: Dict[str, str] = {}
+
+        def callback(request_id, response, exception):
+            kind, _, index = request_id.partition("-")
+            calendar_id = calendar_ids[int(index)]
+            if exception is not None:
+                errors.setdefault(calendar_id, str(exception))
+            elif kind == "cal":
+                calendars[calendar_id] = response
+            else:
+                events[calendar_id] = response
+
+        with self._lock:
+            for offset in range(0, len(calendar_ids), CALENDARS_PER_BATCH):
+                batch = service.new_batch_http_request(callback=callback)
+                chunk = calendar_ids[offset:offset + CALENDARS_PER_BATCH]
+                for index, calendar_id in enumerate(chunk, start=offset):
+                    batch.add(
+                        service.calendars().get(calendarId=calendar_id),
+                        request_id=f"cal-{index}",
+                    )
+                    batch.add(
+                        service.events().list(
+                            calendarId=calendar_id,
+                            timeMin=time_min,
+                            timeMax=time_max,
+                            maxResults=50,
+                            singleEvents=True,
+                            orderBy="startTime",
+                        ),
+                        request_id=f"events-{index}",
+                    )
+                batch.execute()
+
+        return calendars, events, errors
 
     async def get_status(self, use_cache: bool = True) -> CalendarStatus:
         """Get upcoming calendar events for the next 7 days."""
@@ -82,6 +209,9 @@ class CalendarService:
 
         settings = get_settings()
 
+        if settings.calendar_source == "ics":
+            return await ics_calendar_service.get_status(use_cache=use_cache)
+
         if use_cache:
             cached = await cache_service.get(CACHE_KEY)
             if cached:
@@ -94,101 +224,75 @@ class CalendarService:
                 last_updated=datetime.now(),
             )
 
+        breaker = get_breaker("calendar")
+        if not breaker.allow_request():
+            return await serve_last_known(CACHE_KEY, CalendarStatus, breaker)
+
         try:
-            service = self._get_service()
+            # Credential loading and discovery are blocking; keep them off the loop
+            service = await asyncio.to_thread(self._get_service)
             if service is None:
-                return CalendarStatus(
-                    status=StatusLevel.ERROR,
-                    error_message="Failed to initialize Google Calendar service",
-                    last_updated=datetime.now(),
-                )
+                breaker.record_failure("Failed to initialize Google Calendar service")
+                return await serve_last_known(CACHE_KEY, CalendarStatus, breaker)
 
             now = datetime.now(timezone.utc)
             time_min = now.isoformat()
             time_max = (now + timedelta(days=7)).isoformat()
+            calendar_ids = settings.calendar_ids_list
 
-            all_events = []
+            calendars, events_by_calendar, calendar_errors = await asyncio.to_thread(
+                self._fetch_calendars, service, calendar_ids, time_min, time_max
+            )
 
-            for calendar_id in settings.calendar_ids_list:
-                try:
-                    # Get calendar name
-                    calendar = service.calendars().get(calendarId=calendar_id).execute()
-                    calendar_name = calendar.get("summary", calendar_id)
+            all_events = []
 
-                    # Get events
-                    events_result = (
-                        service.events()
-                        .list(
-                            calendarId=calendar_id,
-                            timeMin=time_min,
-                            timeMax=time_max,
-                            maxResults=50,
-                            singleEvents=True,
-                            orderBy="startTime",
-                        )
-                        .execute()
-                    )
+            for calendar_id in calendar_ids:
+                if calendar_id not in events_by_calendar:
+                    continue
+                calendar_name = calendars.get(calendar_id, {}).get("summary", calendar_id)
+                for event in events_by_calendar[calendar_id].get("items", []):
+                    try:
+                        all_events.append(_parse_event(event, calendar_name))
+                    except Exception as e:
+                        calendar_errors.setdefault(calendar_id, f"Invalid event: {e}")
 
-                    events = events_result.get("items", [])
-
-                    for event in events:
-                        start = event.get("start", {})
-                        end = event.get("end", {})
-
-                        # Handle all-day events vs timed events
-                        if "date" in start:
-                            # All-day event: date-only -> make it UTC-aware at midnight
-                            start_d = date.fromisoformat(start["date"])
-                            end_d = date.fromisoformat(end["date"])
-                            start_dt = datetime.combine(start_d, time.min, tzinfo=timezone.utc)
-                            end_dt = datetime.combine(end_d, time.min, tzinfo=timezone.utc)
-                            all_day = True
-                        else: 
-                            start_str = start.get("dateTime", "")
-                            end_str = end.get("dateTime", "")
-                            # Handle timezone offset
-                            start_dt = datetime.fromisoformat(
-                                start_str.replace("Z", "+00:00")
-                            ).astimezone(timezone.utc)
-                            end_dt = datetime.fromisoformat(
-                                end_str.replace("Z", "+00:00")
-                            ).astimezone(timezone.utc)
-                            all_day = False
-
-                        calendar_event = CalendarEvent(
-                            id=event.get("id", ""),
-                            summary=event.get("summary", "No Title"),
-                            start=start_dt,
-                            end=end_dt,
-                            all_day=all_day,
-                            location=event.get("location"),
-                            calendar_name=calendar_name,
-                        )
-                        all_events.append(calendar_event)
-
-                except Exception as e:
-                    logger.warning(f"Error fetching calendar {calendar_id}: {e}")
+            for calendar_id, error in calendar_errors.items():
+                logger.warning(f"Error fetching calendar {calendar_id}: {error}")
 
             # Sort by start time
             all_events.sort(key=lambda x: x.start)
 
+            if calendar_errors and len(calendar_errors) == len(calendar_ids):
+                # Nothing came back; keep showing the last events we had
+                breaker.record_failure(
+                    f"{len(calendar_errors)} of {len(calendar_ids)} calendars failed"
+                )
+                return await serve_last_known(CACHE_KEY, CalendarStatus, breaker)
+            elif calendar_errors:
+                status = StatusLevel.WARNING
+            elif all_events:
+                status = StatusLevel.HEALTHY
+            else:
+                status = StatusLevel.UNKNOWN
+
             result = CalendarStatus(
-                status=StatusLevel.HEALTHY if all_events else StatusLevel.UNKNOWN,
+                status=status,
                 events=all_events,
                 event_count=len(all_events),
+                calendar_errors=calendar_errors,
                 last_updated=datetime.now(timezone.utc),
             )
 
+            breaker.record_success()
             await cache_service.set(CACHE_KEY, result)
             return result
 
         except Exception as e:
             logger.error(f"Calendar error: {e}")
-            return CalendarStatus(
-                status=StatusLevel.ERROR,
-                error_message=str(e),
-                last_updated=datetime.now(),
-            )
+            breaker.record_failure(str(e))
+            return await serve_last_known(CACHE_KEY, CalendarStatus, breaker)
+        finally:
+            breaker.release()
 
 
 calendar_service = CalendarService()
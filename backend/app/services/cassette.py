@@ -0,0 +1,309 @@
+"""
+Record and replay of upstream HTTP traffic.
+
+With upstream_mode=record, every request an upstream client sends and the
+response it gets back are appended to a gzip-compressed JSON-lines cassette
+per upstream (config/cassettes/<name>.jsonl.gz). With upstream_mode=replay, no
+network requests are made: responses come from the cassette, matched on
+method, path, query and body, in the order they were recorded (wrapping
+around, so a demo keeps polling forever). Replay waits for each response's
+recorded latency unless upstream_replay_timing is off.
+
+Secrets are redacted before anything is written: the configured passwords and
+tokens wherever they appear, credential headers and cookie values, and
+password/token/csrf fields in query strings, form and JSON bodies and HTML
+login forms. Requests are redacted the same way before matching, so replay
+does not need the real credentials. Redaction is best effort; check a
+cassette before sharing it.
+"""
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import re
+import time
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.config import config_path, get_settings
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "REDACTED"
+
+# Settings whose values never reach a cassette
+SECRET_SETTINGS = (
+    "unifi_password",
+    "proxmox_token_value",
+    "plex_token",
+    "news_api_key",
+    "unraid_password",
+    "caldav_password",
+    "internal_api_key",
+    "ingest_api_key",
+)
+SECRET_HEADERS = {
+    "authorization",
+    "proxy-authorization",
+    "x-api-key",
+    "x-plex-token",
+    "x-csrf-token",
+    "csrf-token",
+    "x-xsrf-token",
+}
+COOKIE_HEADERS = {"cookie", "set-cookie"}
+# Bodies are stored decoded, so the transfer framing no longer applies
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+_SECRET_NAME = r"[\w-]*(?:pass(?:word|wd)?|token|secret|api[_-]?key|csrf|session)[\w-]*"
+# key=value in query strings and form bodies
+_FORM_FIELD = re.compile(rf"(?i)((?:^|[?&;]){_SECRET_NAME}=)[^&;\s]*")
+# "key": "value" in JSON and JavaScript
+_QUOTED_FIELD = re.compile(rf"""(?i)(["']{_SECRET_NAME}["']\s*[:=]\s*["'])[^"']*""")
+# var csrf_token = "value"
+_VAR_FIELD = re.compile(rf"""(?i)(\b{_SECRET_NAME}\s*=\s*["'])[^"']*""")
+# name=value pairs in Cookie, the first one in Set-Cookie
+_COOKIE_VALUE = re.compile(r"((?:^|;\s*)[^=;\s]+=)[^;]*")
+# <input name="csrf_token" value="..."> and <meta name="csrf-token" content="...">
+_HTML_FIELD = re.compile(rf"""(?i)(name=["']{_SECRET_NAME}["'][^>]*?(?:value|content)=["'])[^"']*""")
+
+
+# $CONFIG_DIR, the persistent config volume in Docker, or the project root
+CASSETTE_DIR = config_path("cassettes")
+
+
+class Redactor:
+    """Replaces secrets in URLs, headers and bodies with REDACTED."""
+
+    def __init__(self, secrets: Iterable[str]):
+        # Longest first, so a secret containing another is replaced whole
+        self._secrets = sorted({s for s in secrets if s and len(s) >= 4}, key=len, reverse=True)
+
+    @classmethod
+    def from_settings(cls) -> "Redactor":
+        settings = get_settings()
+        return cls(getattr(settings, name, "") for name in SECRET_SETTINGS)
+
+    def text(self, value: str) -> str:
+        for secret in self._secrets:
+            value = value.replace(secret, REDACTED)
+        value = _FORM_FIELD.sub(rf"\g<1>{REDACTED}", value)
+        value = _QUOTED_FIELD.sub(rf"\g<1>{REDACTED}", value)
+        value = _VAR_FIELD.sub(rf"\g<1>{REDACTED}", value)
+        return _HTML_FIELD.sub(rf"\g<1>{REDACTED}", value)
+
+    def headers(self, headers: httpx.Headers) -> List[Tuple[str, str]]:
+        result = []
+        for name, value in headers.multi_items():
+            lower = name.lower()
+            if lower in DROPPED_HEADERS:
+                continue
+            if lower in SECRET_HEADERS:
+                value = REDACTED
+            elif lower in COOKIE_HEADERS:
+                # Keep cookie names (and Set-Cookie attributes), drop the values
+                value = _COOKIE_VALUE.sub(rf"\g<1>{REDACTED}", value, count=0 if lower == "cookie" else 1)
+            else:
+                value = self.text(value)
+            result.append((name, value))
+        return result
+
+
+def _encode_body(content: bytes, redactor: Redactor) -> Dict[str, str]:
+    try:
+        return {"text": redactor.text(content.decode("utf-8"))}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(body: Dict[str, str]) -> bytes:
+    if "base64" in body:
+        return base64.b64decode(body["base64"])
+    return body.get("text", "").encode("utf-8")
+
+
+def _match_key(method: str, target: str, body: Dict[str, str]) -> str:
+    """Identity of a recorded request: method, path with query and a body digest."""
+    digest = hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()[:16]
+    return f"{method} {target} {digest}"
+
+
+def _request_parts(request: httpx.Request, redactor: Redactor) -> Tuple[str, Dict[str, str]]:
+    # The host is left out so a cassette replays against any configured address
+    target = redactor.text(request.url.raw_path.decode("ascii", "replace"))
+    return target, _encode_body(request.content, redactor)
+
+
+class CassetteRecorder:
+    """Appends redacted interactions to one gzip cassette per upstream."""
+
+    def __init__(self, directory: Path = CASSETTE_DIR):
+        self.directory = directory
+        self._files: Dict[str, gzip.GzipFile] = {}
+        self._lock = asyncio.Lock()
+        self.recorded: Dict[str, int] = defaultdict(int)
+
+    def _write(self, name: str, line: str) -> None:
+        f = self._files.get(name)
+        if f is None:
+            # Each run records a fresh cassette
+            self.directory.mkdir(parents=True, exist_ok=True)
+            f = self._files[name] = gzip.open(self.directory / f"{name}.jsonl.gz", "wb")
+        f.write(line.encode("utf-8") + b"\n")
+        # Sync flush keeps the file readable if the process is killed
+        f.flush()
+
+    async def record(self, name: str, interaction: Dict[str, Any]) -> None:
+        line = json.dumps(interaction, separators=(",", ":"))
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._write, name, line)
+                self.recorded[name] += 1
+            except Exception as e:
+                logger.error(f"Failed to record {name} interaction: {e}")
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+class Cassette:
+    """Recorded interactions of one upstream, served in recorded order per request."""
+
+    def __init__(self, interactions: List[Dict[str, Any]]):
+        self._by_key: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for interaction in interactions:
+            request = interaction["request"]
+            key = _match_key(request["method"], request["target"], request["body"])
+            self._by_key[key].append(interaction)
+        self._next: Dict[str, int] = defaultdict(int)
+        self.size = len(interactions)
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        interactions = []
+        if path.exists():
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        interactions.append(json.loads(line))
+            except (EOFError, zlib.error, json.JSONDecodeError):
+                # Recording was interrupted; keep what was fully written
+                logger.warning(f"Cassette {path} is truncated, using {len(interactions)} interactions")
+        return cls(interactions)
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        recorded = self._by_key.get(key)
+        if not recorded:
+            return None
+        index = self._next[key]
+        self._next[key] = (index + 1) % len(recorded)
+        return recorded[index]
+
+
+class CassetteLibrary:
+    """Cassettes loaded for replay, plus record/replay counters."""
+
+    def __init__(self, directory: Path = CASSETTE_DIR):
+        self.directory = directory
+        self._cassettes: Dict[str, Cassette] = {}
+        self.replayed: Dict[str, int] = defaultdict(int)
+        self.missed: Dict[str, int] = defaultdict(int)
+
+    def get(self, name: str) -> Cassette:
+        cassette = self._cassettes.get(name)
+        if cassette is None:
+            path = self.directory / f"{name}.jsonl.gz"
+            cassette = self._cassettes[name] = Cassette.load(path)
+            logger.info(f"Loaded {cassette.size} recorded {name} interactions from {path}")
+        return cassette
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": get_settings().upstream_mode,
+            "recorded": dict(recorder.recorded),
+            "replayed": dict(self.replayed),
+            "missed": dict(self.missed),
+        }
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests through and records each interaction, redacted."""
+
+    def __init__(self, name: str, transport: httpx.AsyncBaseTransport):
+        self._name = name
+        self._transport = transport
+        self._redactor = Redactor.from_settings()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - start
+
+        redactor = self._redactor
+        target, body = _request_parts(request, redactor)
+        await recorder.record(self._name, {
+            "recorded_at": time.time(),
+            "elapsed": round(elapsed, 6),
+            "request": {
+                "method": request.method,
+                "target": target,
+                "headers": redactor.headers(request.headers),
+                "body": body,
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": redactor.headers(response.headers),
+                "body": _encode_body(content, redactor),
+            },
+        })
+
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in DROPPED_HEADERS]
+        return httpx.Response(
+            response.status_code, headers=headers, content=content, request=request, extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves responses from the upstream's cassette without touching the network."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._redactor = Redactor.from_settings()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        target, body = _request_parts(request, self._redactor)
+        interaction = library.get(self._name).next(_match_key(request.method, target, body))
+        if interaction is None:
+            library.missed[self._name] += 1
+            raise httpx.ConnectError(f"No recorded {self._name} response for {request.method} {target}", request=request)
+
+        library.replayed[self._name] += 1
+        if get_settings().upstream_replay_timing:
+            await asyncio.sleep(interaction["elapsed"])
+        response = interaction["response"]
+        return httpx.Response(
+            response["status"],
+            headers=[tuple(h) for h in response["headers"]],
+            content=_decode_body(response["body"]),
+            request=request,
+        )
+
+
+# Singleton instances
+recorder = CassetteRecorder()
+library = CassetteLibrary()
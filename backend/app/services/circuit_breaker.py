@@ -0,0 +1,137 @@
+"""
+Per-upstream circuit breakers.
+
+After circuit_failure_threshold consecutive failures a breaker opens and the
+service stops calling its upstream, serving the last known good data (flagged
+stale, with the error) instead. After circuit_reset_timeout seconds one probe
+request is let through (half-open); its result closes or re-opens the breaker.
+"""
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional, Type
+
+from app.config import get_settings
+from app.models.schemas import BaseStatus, StatusLevel
+from app.services.cache import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_owner: Optional[asyncio.Task] = None
+
+    def retry_in(self) -> int:
+        """Seconds until the next half-open probe (0 unless open)."""
+        if self.state != BreakerState.OPEN:
+            return 0
+        elapsed = time.monotonic() - self._opened_at
+        return max(math.ceil(get_settings().circuit_reset_timeout - elapsed), 0)
+
+    def allow_request(self) -> bool:
+        """Whether the upstream may be called now."""
+        if self.state == BreakerState.CLOSED:
+            return True
+
+        if self.state == BreakerState.OPEN:
+            if time.monotonic() - self._opened_at < get_settings().circuit_reset_timeout:
+                return False
+            self.state = BreakerState.HALF_OPEN
+            logger.info(f"Circuit for {self.name} half-open, probing upstream")
+
+        # Half-open: a single probe at a time
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        self._probe_owner = asyncio.current_task()
+        return True
+
+    def release(self) -> None:
+        """End the current task's probe if it recorded no result (e.g. it was cancelled).
+
+        Call it in a finally after allow_request(); otherwise the breaker
+        would wait for the abandoned probe forever.
+        """
+        if self._probe_in_flight and self._probe_owner is asyncio.current_task():
+            self._probe_in_flight = False
+            self._probe_owner = None
+
+    def record_success(self) -> None:
+        if self.state != BreakerState.CLOSED:
+            logger.info(f"Circuit for {self.name} closed, upstream recovered")
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.last_error = None
+        self._probe_in_flight = False
+
+    def record_failure(self, error: str) -> None:
+        self.failures += 1
+        self.last_error = error
+        self._probe_in_flight = False
+
+        threshold = get_settings().circuit_failure_threshold
+        if self.state == BreakerState.HALF_OPEN or (
+            self.state == BreakerState.CLOSED and self.failures >= threshold
+        ):
+            self.state = BreakerState.OPEN
+            self._opened_at = time.monotonic()
+            logger.warning(
+                f"Circuit for {self.name} opened after {self.failures} failures: {error}"
+            )
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get (or create) the breaker for an upstream."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def all_breakers() -> Dict[str, CircuitBreaker]:
+    return dict(_breakers)
+
+
+async def serve_last_known(cache_key: str, model: Type[BaseStatus], breaker: CircuitBreaker) -> BaseStatus:
+    """
+    Result for a failed or skipped collection: the last known good data flagged
+    stale with the error, or a bare error status if nothing was collected yet.
+    """
+    error = breaker.last_error or "Upstream unavailable"
+    if breaker.state == BreakerState.OPEN:
+        error = f"{error} (retrying in {breaker.retry_in()}s)"
+
+    last_known = await cache_service.get_last_known(cache_key)
+    if last_known is None:
+        return model(
+            status=StatusLevel.ERROR,
+            error_message=error,
+            last_updated=datetime.now(),
+        )
+
+    value, timestamp = last_known
+    return value.model_copy(update={
+        "status": StatusLevel.ERROR,
+        "error_message": error,
+        "stale": True,
+        "stale_seconds": int((datetime.now() - timestamp).total_seconds()),
+    })
@@ -1,10 +1,13 @@
 import docker
 from datetime import datetime
+from typing import List
 import logging
 
 from app.config import get_settings
 from app.models.schemas import DockerStatus, DockerContainer, StatusLevel
 from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker, serve_last_known
+from app.services.simulator import simulator
 from app.utils.runtime_config import get_service_enabled
 
 logger = logging.getLogger(__name__)
@@ -12,6 +15,34 @@ logger = logging.getLogger(__name__)
 CACHE_KEY = "docker_status"
 
 
+def _parse_ports(attrs: dict) -> List[str]:
+    """Published ports as host:container entries from a container's attrs."""
+    ports = []
+    port_bindings = attrs.get("NetworkSettings", {}).get("Ports", {})
+    if port_bindings:
+        for container_port, host_bindings in port_bindings.items():
+            if host_bindings:
+                for binding in host_bindings:
+                    host_port = binding.get("HostPort", "")
+                    ports.append(f"{host_port}:{container_port}")
+    return ports
+
+
+def _parse_container(c) -> DockerContainer:
+    """Build the model from a Docker SDK container."""
+    return DockerContainer(
+        id=c.short_id,
+        name=c.name,
+        image=c.image.tags[0] if c.image.tags else c.image.short_id,
+        status=c.status,
+        state=c.attrs.get("State", {}).get("Status", "unknown"),
+        created=datetime.fromisoformat(
+            c.attrs.get("Created", "").replace("Z", "+00:00")
+        ),
+        ports=_parse_ports(c.attrs),
+    )
+
+
 class DockerService:
     def __init__(self):
         self._client = None
@@ -19,6 +50,8 @@ class DockerService:
     def _get_client(self):
         """Get Docker client, connecting to remote or local socket."""
         settings = get_settings()
+        if "docker" in settings.simulate_services_list:
+            return simulator.service("docker")
         if self._client is None:
             try:
                 if settings.docker_host:
@@ -47,6 +80,8 @@ class DockerService:
             if cached:
                 return cached
 
+        breaker = get_breaker("docker")
+
         try:
             client = self._get_client()
             if client is None:
@@ -56,6 +91,9 @@ class DockerService:
                     last_updated=datetime.now(),
                 )
 
+            if not breaker.allow_request():
+                return await serve_last_known(CACHE_KEY, DockerStatus, breaker)
+
             # Get all containers
             all_containers = client.containers.list(all=True)
 
@@ -64,28 +102,7 @@ class DockerService:
             stopped_count = 0
 
             for c in all_containers:
-                # Parse port mappings
-                ports = []
-                port_bindings = c.attrs.get("NetworkSettings", {}).get("Ports", {})
-                if port_bindings:
-                    for container_port, host_bindings in port_bindings.items():
-                        if host_bindings:
-                            for binding in host_bindings:
-                                host_port = binding.get("HostPort", "")
-                                ports.append(f"{host_port}:{container_port}")
-
-                container = DockerContainer(
-                    id=c.short_id,
-                    name=c.name,
-                    image=c.image.tags[0] if c.image.tags else c.image.short_id,
-                    status=c.status,
-                    state=c.attrs.get("State", {}).get("Status", "unknown"),
-                    created=datetime.fromisoformat(
-                        c.attrs.get("Created", "").replace("Z", "+00:00")
-                    ),
-                    ports=ports,
-                )
-                containers.append(container)
+                containers.append(_parse_container(c))
 
                 if c.status == "running":
                     running_count += 1
@@ -114,16 +131,16 @@ class DockerService:
                 last_updated=datetime.now(),
             )
 
+            breaker.record_success()
             await cache_service.set(CACHE_KEY, result)
             return result
 
         except Exception as e:
             logger.error(f"Docker error: {e}")
-            return DockerStatus(
-                status=StatusLevel.ERROR,
-                error_message=str(e),
-                last_updated=datetime.now(),
-            )
+            breaker.record_failure(str(e))
+            return await serve_last_known(CACHE_KEY, DockerStatus, breaker)
+        finally:
+            breaker.release()
 
 
 docker_service = DockerService()
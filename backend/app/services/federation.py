@@ -0,0 +1,157 @@
+"""
+Federation: other dashboard instances (one per site) pulled into this one.
+
+The federation collector fetches every peer's /api/dashboard concurrently
+through the shared upstream layer, so each peer gets its own adaptive timeout
+and latency stats. Requests are conditional (If-None-Match with the peer's
+last ETag), so an unchanged peer answers 304 without a body. A peer that fails
+or times out keeps its last pulled dashboard, flagged stale. The result is
+cached like any other collection, so /api/federation never waits on a peer.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from app.config import get_settings
+from app.models.schemas import (
+    BaseStatus,
+    DashboardStatus,
+    FederatedSite,
+    FederationStatus,
+    StatusLevel,
+)
+from app.services.cache import cache_service
+from app.services.upstream import get_upstream
+from app.utils.runtime_config import get_service_enabled
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "federation_status"
+
+# Most severe first
+SEVERITY = (StatusLevel.ERROR, StatusLevel.WARNING, StatusLevel.HEALTHY)
+
+
+def worst_status(statuses: Iterable[StatusLevel]) -> StatusLevel:
+    statuses = set(statuses)
+    for level in SEVERITY:
+        if level in statuses:
+            return level
+    return StatusLevel.UNKNOWN
+
+
+def dashboard_status(dashboard: DashboardStatus) -> StatusLevel:
+    """Worst status among a dashboard's enabled services."""
+    services = [getattr(dashboard, name) for name in DashboardStatus.model_fields if name != "last_updated"]
+    return worst_status(
+        s.status for s in services
+        if isinstance(s, BaseStatus) and s.error_message != "Service disabled"
+    )
+
+
+class FederationService:
+    def __init__(self):
+        # Peer name -> ETag of the dashboard last pulled from it
+        self._etags: Dict[str, str] = {}
+
+    async def _pull(self, name: str, url: str, previous: Optional[FederatedSite]) -> FederatedSite:
+        settings = get_settings()
+        headers = {}
+        if previous is not None and previous.dashboard is not None and name in self._etags:
+            headers["If-None-Match"] = self._etags[name]
+
+        start = time.perf_counter()
+        try:
+            async with get_upstream(f"peer_{name}", default_timeout=settings.federation_timeout).client() as client:
+                response = await client.get(f"{url}/api/dashboard", headers=headers)
+            latency = round((time.perf_counter() - start) * 1000, 1)
+
+            if response.status_code == 304 and previous is not None:
+                return previous.model_copy(update={
+                    "reachable": True,
+                    "stale": False,
+                    "stale_seconds": None,
+                    "error_message": None,
+                    "latency_ms": latency,
+                    "last_success": datetime.now(),
+                })
+            response.raise_for_status()
+
+            dashboard = DashboardStatus.model_validate(response.json())
+            etag = response.headers.get("etag")
+            if etag:
+                self._etags[name] = etag
+            return FederatedSite(
+                name=name,
+                url=url,
+                status=dashboard_status(dashboard),
+                latency_ms=latency,
+                last_success=datetime.now(),
+                dashboard=dashboard,
+            )
+
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logger.warning(f"Federation peer {name} failed: {error}")
+            if previous is not None and previous.dashboard is not None:
+                age = (datetime.now() - previous.last_success).total_seconds() if previous.last_success else None
+                return previous.model_copy(update={
+                    "reachable": False,
+                    "stale": True,
+                    "stale_seconds": int(age) if age is not None else None,
+                    "error_message": error,
+                    "latency_ms": None,
+                })
+            return FederatedSite(name=name, url=url, status=StatusLevel.ERROR, reachable=False, error_message=error)
+
+    async def get_status(self, use_cache: bool = True) -> FederationStatus:
+        """Pull every peer's dashboard."""
+        if not get_service_enabled("federation"):
+            return FederationStatus(
+                status=StatusLevel.UNKNOWN,
+                error_message="Service disabled",
+                last_updated=datetime.now(),
+            )
+
+        settings = get_settings()
+
+        if use_cache:
+            cached = await cache_service.get(CACHE_KEY)
+            if cached:
+                return cached
+
+        peers = settings.federation_peers_list
+        if not peers:
+            return FederationStatus(
+                status=StatusLevel.UNKNOWN,
+                error_message="No federation peers configured",
+                last_updated=datetime.now(),
+            )
+
+        last_known = await cache_service.get_last_known(CACHE_KEY)
+        previous = {site.name: site for site in last_known[0].peers} if last_known else {}
+        sites = await asyncio.gather(*(self._pull(name, url, previous.get(name)) for name, url in peers))
+
+        reachable = sum(1 for site in sites if site.reachable)
+        if reachable == len(sites):
+            status = StatusLevel.HEALTHY
+        elif reachable:
+            status = StatusLevel.WARNING
+        else:
+            status = StatusLevel.ERROR
+
+        result = FederationStatus(
+            status=status,
+            peers=list(sites),
+            peers_reachable=reachable,
+            error_message=None if reachable else "No peer reachable",
+            last_updated=datetime.now(),
+        )
+        await cache_service.set(CACHE_KEY, result)
+        return result
+
+
+# Singleton instance
+federation_service = FederationService()
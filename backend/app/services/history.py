@@ -0,0 +1,237 @@
+"""
+In-memory metric history.
+
+Every series is a fixed-capacity ring buffer of (timestamp, value) pairs held
+in two `array`s (float64 timestamps, float32 values), so a full series costs
+12 bytes per point regardless of how long the app runs. Series are keyed as
+`metric{label=value,...}`.
+"""
+import bisect
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import get_settings
+
+Labels = Dict[str, str]
+
+
+def series_key(metric: str, labels: Optional[Labels] = None) -> str:
+    """Build a series key; labels are sorted so the key is stable."""
+    if not labels:
+        return metric
+    parts = ",".join(
+        f"{k}={str(v).replace(',', '_').replace('}', '_')}" for k, v in sorted(labels.items())
+    )
+    return f"{metric}{{{parts}}}"
+
+
+def parse_series_key(key: str) -> Tuple[str, Labels]:
+    """Split a series key into its metric name and labels."""
+    if not key.endswith("}") or "{" not in key:
+        return key, {}
+    metric, _, rest = key.partition("{")
+    labels = dict(part.split("=", 1) for part in rest[:-1].split(",") if "=" in part)
+    return metric, labels
+
+
+class RingSeries:
+    """Fixed-capacity ring buffer of samples, oldest overwritten first."""
+
+    __slots__ = ("capacity", "_times", "_values", "_head")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._times = array("d")
+        self._values = array("f")
+        # Index of the oldest sample once the buffer is full
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def append(self, timestamp: float, value: float) -> None:
+        if len(self._times) < self.capacity:
+            self._times.append(timestamp)
+            self._values.append(value)
+            return
+        self._times[self._head] = timestamp
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+
+    def ordered(self) -> Tuple[array, array]:
+        """Timestamps and values, oldest first."""
+        head = self._head
+        if head == 0:
+            return self._times[:], self._values[:]
+        return (
+            self._times[head:] + self._times[:head],
+            self._values[head:] + self._values[:head],
+        )
+
+    def window(self, since: float) -> Tuple[array, array]:
+        """Samples with timestamp >= since, oldest first."""
+        times, values = self.ordered()
+        start = bisect.bisect_left(times, since)
+        return times[start:], values[start:]
+
+    def segments(self, since: float) -> List[Tuple[int, int]]:
+        """Storage index ranges holding samples >= since, oldest first."""
+        n = len(self._times)
+        head = self._head
+        ranges = [(0, n)] if head == 0 else [(head, n), (0, head)]
+        return [
+            (bisect.bisect_left(self._times, since, start, end), end)
+            for start, end in ranges
+        ]
+
+    def copy_into(self, segments: List[Tuple[int, int]], times_out, values_out, pos: int) -> int:
+        """Copy segments into writable buffers at pos; returns samples copied.
+
+        times_out may be None to copy only the values.
+        """
+        times_view = memoryview(self._times) if times_out is not None else None
+        values_view = memoryview(self._values)
+        try:
+            for start, end in segments:
+                count = end - start
+                if times_view is not None:
+                    times_out[pos:pos + count] = times_view[start:end]
+                values_out[pos:pos + count] = values_view[start:end]
+                pos += count
+        finally:
+            # Release the buffer exports so the arrays can grow again
+            if times_view is not None:
+                times_view.release()
+            values_view.release()
+        return sum(end - start for start, end in segments)
+
+    def oldest(self) -> Optional[float]:
+        if not self._times:
+            return None
+        return self._times[self._head]
+
+    def newest(self) -> Optional[float]:
+        if not self._times:
+            return None
+        return self._times[self._head - 1]
+
+    def nbytes(self) -> int:
+        return (
+            self._times.buffer_info()[1] * self._times.itemsize
+            + self._values.buffer_info()[1] * self._values.itemsize
+        )
+
+
+def downsample(
+    times: array, values: array, since: float, until: float, points: int
+) -> List[Tuple[float, float]]:
+    """Average samples into at most `points` equal-width time buckets."""
+    if len(times) <= points:
+        return [(t, round(v, 3)) for t, v in zip(times, values)]
+
+    # Bucket edges are found by bisection and sums run over array slices,
+    # so the cost is O(points * log n) plus C-level summing
+    width = (until - since) / points
+    result = []
+    start = 0
+    for b in range(1, points + 1):
+        end = len(times) if b == points else bisect.bisect_left(times, since + b * width, start)
+        if end > start:
+            result.append((times[end - 1], round(sum(values[start:end]) / (end - start), 3)))
+            start = end
+    return result
+
+
+class HistoryStore:
+    def __init__(self):
+        self._series: Dict[str, RingSeries] = {}
+        # Series keys and parsed labels per metric name
+        self._by_metric: Dict[str, Dict[str, Labels]] = {}
+        # Collectors run on the loop, but reads may come from worker threads
+        self._lock = threading.Lock()
+
+    def record(self, samples: Iterable[Tuple[str, Labels, float]], timestamp: Optional[float] = None) -> None:
+        """Append (metric, labels, value) samples taken at timestamp."""
+        timestamp = timestamp if timestamp is not None else time.time()
+        capacity = get_settings().history_points
+        with self._lock:
+            for metric, labels, value in samples:
+                key = series_key(metric, labels)
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = RingSeries(capacity)
+                    self._by_metric.setdefault(metric, {})[key] = dict(labels or {})
+                series.append(timestamp, float(value))
+
+    def series_names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._series)
+
+    def gather(self, metric: str, since: float, layout) -> List[Tuple[str, Labels, int, float]]:
+        """
+        Copy every series of a metric since a time into caller-provided buffers.
+
+        layout(series) gets (labels, sample count) per series and returns
+        (times, values, offsets): writable float64 and float32 buffers (times
+        may be None to skip timestamps) and where each series starts in them.
+        Returns (key, labels, sample count, newest timestamp) per series, in
+        the order given to layout.
+        """
+        with self._lock:
+            selected = []
+            for key, labels in self._by_metric.get(metric, {}).items():
+                series = self._series[key]
+                segments = series.segments(since)
+                count = sum(end - start for start, end in segments)
+                if count:
+                    selected.append((key, labels, series, segments, count))
+            if not selected:
+                return []
+
+            times_out, values_out, offsets = layout([(labels, count) for _, labels, _, _, count in selected])
+            for (_, _, series, segments, _), pos in zip(selected, offsets):
+                series.copy_into(segments, times_out, values_out, pos)
+            return [(key, labels, count, series.newest()) for key, labels, series, _, count in selected]
+
+    def window(self, key: str, since: float) -> Optional[Tuple[array, array]]:
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return None
+            return series.window(since)
+
+    def covers(self, key: str, since: float) -> bool:
+        """Whether the in-memory series reaches back to since."""
+        with self._lock:
+            series = self._series.get(key)
+            oldest = series.oldest() if series is not None else None
+            return oldest is not None and oldest <= since
+
+    def query(self, key: str, since: float, points: int) -> Optional[List[Tuple[float, float]]]:
+        """Downsampled (timestamp, value) points for one series since a time."""
+        data = self.window(key, since)
+        if data is None:
+            return None
+        times, values = data
+        return downsample(times, values, since, time.time(), points)
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(s.nbytes() for s in self._series.values())
+
+    def memory_by_metric(self) -> Dict[str, Dict[str, int]]:
+        """Series count and buffer bytes per metric."""
+        with self._lock:
+            return {
+                metric: {
+                    "series": len(keys),
+                    "bytes": sum(self._series[key].nbytes() for key in keys),
+                }
+                for metric, keys in sorted(self._by_metric.items())
+            }
+
+
+# Singleton instance
+history_store = HistoryStore()
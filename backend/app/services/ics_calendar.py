@@ -0,0 +1,735 @@
+"""
+ICS / CalDAV calendar source.
+
+Alternative to the Google Calendar client for iCalendar feeds (http(s) URLs or
+local files) and CalDAV collections. Feeds are fetched with conditional
+requests, parsed line-by-line as they stream in, and recurring events are
+expanded only inside the display window. Parsed feeds and their expansions are
+cached until the feed changes.
+"""
+import asyncio
+import logging
+import os
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, date, time, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import httpx
+
+from app.config import get_settings
+from app.models.schemas import CalendarStatus, CalendarEvent, StatusLevel
+from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker
+from app.services.upstream import get_upstream
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "calendar_status"
+
+# Display window, matching the Google Calendar source
+WINDOW_DAYS = 7
+# Extra days parsed beyond the window so an unchanged feed stays valid for a while
+PARSE_HORIZON_DAYS = 14
+
+# Consecutive periods without an occurrence before a MONTHLY/YEARLY rule is
+# given up on (Feb 29 yearly goes 8 years without one around 2100)
+MAX_EMPTY_PERIODS = 100
+
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+DAV_NS = "DAV:"
+CALDAV_NS = "urn:ietf:params:xml:ns:caldav"
+CS_NS = "http://calendarserver.org/ns/"
+
+PROPFIND_BODY = """<?xml version="1.0" encoding="utf-8"?>
+<d:propfind xmlns:d="DAV:" xmlns:cs="http://calendarserver.org/ns/">
+  <d:prop><d:displayname/><cs:getctag/><d:sync-token/></d:prop>
+</d:propfind>"""
+
+REPORT_BODY = """<?xml version="1.0" encoding="utf-8"?>
+<c:calendar-query xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">
+  <d:prop><c:calendar-data/></d:prop>
+  <c:filter>
+    <c:comp-filter name="VCALENDAR">
+      <c:comp-filter name="VEVENT">
+        <c:time-range start="{start}" end="{end}"/>
+      </c:comp-filter>
+    </c:comp-filter>
+  </c:filter>
+</c:calendar-query>"""
+
+_DURATION_RE = re.compile(
+    r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$"
+)
+
+
+# =============================================================================
+# ICALENDAR PARSING
+# =============================================================================
+def _unescape(value: str) -> str:
+    """Undo iCalendar TEXT escaping."""
+    if "\\" not in value:
+        return value
+    return (
+        value.replace("\\n", "\n")
+        .replace("\\N", "\n")
+        .replace("\\,", ",")
+        .replace("\\;", ";")
+        .replace("\\\\", "\\")
+    )
+
+
+def _split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    """Split a content line into (NAME, params, value)."""
+    in_quotes = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == ":" and not in_quotes:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        return line.upper(), {}, ""
+
+    parts = head.split(";")
+    params = {}
+    for part in parts[1:]:
+        key, _, val = part.partition("=")
+        params[key.upper()] = val.strip('"')
+    return parts[0].upper(), params, value
+
+
+def _parse_datetime(value: str, params: Dict[str, str]) -> Tuple[datetime, bool]:
+    """Parse DATE / DATE-TIME values. Returns (aware datetime, is_all_day)."""
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        d = date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+        return datetime.combine(d, time.min, tzinfo=timezone.utc), True
+
+    dt = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return dt.replace(tzinfo=timezone.utc), False
+
+    tzid = params.get("TZID")
+    if tzid:
+        try:
+            return dt.replace(tzinfo=ZoneInfo(tzid)), False
+        except Exception:
+            logger.debug(f"Unknown TZID {tzid}, treating as UTC")
+    # Floating time: no zone information, treat as UTC
+    return dt.replace(tzinfo=timezone.utc), False
+
+
+def _parse_duration(value: str) -> Optional[timedelta]:
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        return None
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(
+        weeks=int(weeks or 0),
+        days=int(days or 0),
+        hours=int(hours or 0),
+        minutes=int(minutes or 0),
+        seconds=int(seconds or 0),
+    )
+    return -delta if sign == "-" else delta
+
+
+def _parse_rrule(value: str) -> Dict[str, str]:
+    rule = {}
+    for part in value.split(";"):
+        key, _, val = part.partition("=")
+        if key:
+            rule[key.upper()] = val
+    return rule
+
+
+class IcsEvent:
+    """A VEVENT as parsed from the feed, before recurrence expansion."""
+
+    __slots__ = (
+        "uid", "summary", "location", "start", "end", "all_day",
+        "rrule", "exdates", "recurrence_id",
+    )
+
+    def __init__(self):
+        self.uid = ""
+        self.summary = "No Title"
+        self.location: Optional[str] = None
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        self.all_day = False
+        self.rrule: Optional[Dict[str, str]] = None
+        self.exdates: set = set()
+        self.recurrence_id: Optional[datetime] = None
+
+
+class IcsStreamParser:
+    """
+    Incremental iCalendar parser.
+
+    Lines are fed one at a time (folded or not) as they arrive, so a feed is
+    never held in memory as a whole. Only events that can occur inside
+    [window_start, window_end) are retained, plus the uid and RECURRENCE-ID of
+    overrides moved out of it.
+    """
+
+    def __init__(self, window_start: datetime, window_end: datetime):
+        self.window_start = window_start
+        self.window_end = window_end
+        self.calendar_name: Optional[str] = None
+        self.events: List[IcsEvent] = []
+        self._pending: Optional[str] = None
+        self._event: Optional[IcsEvent] = None
+        self._depth = 0  # nesting inside the current VEVENT (VALARM etc.)
+        self._duration: Optional[timedelta] = None
+
+    def feed(self, line: str) -> None:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            # Folded continuation of the previous line
+            if self._pending is not None:
+                self._pending += line[1:]
+            return
+        if self._pending is not None:
+            self._process(self._pending)
+        self._pending = line or None
+
+    def feed_text(self, text: str) -> None:
+        for line in text.splitlines():
+            self.feed(line)
+
+    def close(self) -> List[IcsEvent]:
+        if self._pending is not None:
+            self._process(self._pending)
+            self._pending = None
+        return self.events
+
+    def _process(self, line: str) -> None:
+        name, params, value = _split_property(line)
+
+        if name == "BEGIN":
+            if self._event is not None:
+                self._depth += 1
+            elif value.upper() == "VEVENT":
+                self._event = IcsEvent()
+                self._duration = None
+            return
+
+        if name == "END":
+            if self._event is None:
+                return
+            if self._depth:
+                self._depth -= 1
+            elif value.upper() == "VEVENT":
+                self._finish_event()
+            return
+
+        if self._event is None:
+            if name == "X-WR-CALNAME" and not self.calendar_name:
+                self.calendar_name = _unescape(value)
+            return
+        if self._depth:
+            return
+
+        event = self._event
+        try:
+            if name == "UID":
+                event.uid = value
+            elif name == "SUMMARY":
+                event.summary = _unescape(value) or "No Title"
+            elif name == "LOCATION":
+                event.location = _unescape(value) or None
+            elif name == "DTSTART":
+                event.start, event.all_day = _parse_datetime(value, params)
+            elif name == "DTEND":
+                event.end, _ = _parse_datetime(value, params)
+            elif name == "DURATION":
+                self._duration = _parse_duration(value)
+            elif name == "RRULE":
+                event.rrule = _parse_rrule(value)
+            elif name == "EXDATE":
+                for item in value.split(","):
+                    exdate, _ = _parse_datetime(item, params)
+                    event.exdates.add(exdate.astimezone(timezone.utc))
+            elif name == "RECURRENCE-ID":
+                recurrence_id, _ = _parse_datetime(value, params)
+                event.recurrence_id = recurrence_id.astimezone(timezone.utc)
+        except (ValueError, IndexError) as e:
+            logger.debug(f"Skipping malformed {name} in event {event.uid}: {e}")
+
+    def _finish_event(self) -> None:
+        event, self._event = self._event, None
+        if event.start is None:
+            return
+
+        if event.end is None:
+            if self._duration is not None:
+                event.end = event.start + self._duration
+            elif event.all_day:
+                event.end = event.start + timedelta(days=1)
+            else:
+                event.end = event.start
+
+        if event.start >= self.window_end or (event.rrule is None and event.end <= self.window_start):
+            if event.recurrence_id is not None and event.recurrence_id < self.window_end:
+                # Moved out of the window, but it still hides the original
+                # occurrence; keep only what identifies it
+                tombstone = IcsEvent()
+                tombstone.uid, tombstone.recurrence_id = event.uid, event.recurrence_id
+                self.events.append(tombstone)
+            return
+        if event.rrule is not None:
+            until = event.rrule.get("UNTIL")
+            if until:
+                try:
+                    until_dt, _ = _parse_datetime(until, {})
+                    if until_dt < self.window_start - (event.end - event.start):
+                        return
+                except (ValueError, IndexError):
+                    pass
+
+        self.events.append(event)
+
+
+# =============================================================================
+# RECURRENCE EXPANSION
+# =============================================================================
+def _add_months(d: date, months: int) -> Tuple[int, int]:
+    total = d.year * 12 + (d.month - 1) + months
+    return total // 12, total % 12 + 1
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> Optional[date]:
+    """Return the n-th (1-based, negative from the end) weekday of a month."""
+    if n > 0:
+        first = date(year, month, 1)
+        day = first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    else:
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        last = date(next_year, next_month, 1) - timedelta(days=1)
+        day = last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+    return day if day.month == month else None
+
+
+def _iter_rule_dates(start: datetime, rule: Dict[str, str], skip_before: Optional[datetime]) -> Iterator[datetime]:
+    """Yield naive local occurrence starts for an RRULE, in order."""
+    freq = rule.get("FREQ", "").upper()
+    interval = max(int(rule.get("INTERVAL", "1") or 1), 1)
+    byday = [d for d in rule.get("BYDAY", "").split(",") if d]
+    clock = start.time()
+
+    if freq == "DAILY":
+        weekdays = {WEEKDAYS[d[-2:]] for d in byday}
+        step = timedelta(days=interval)
+        current = start
+        if skip_before is not None and skip_before > start:
+            current = start + step * ((skip_before - start) // step)
+        while True:
+            if not weekdays or current.weekday() in weekdays:
+                yield current
+            current += step
+
+    elif freq == "WEEKLY":
+        weekdays = sorted(WEEKDAYS[d[-2:]] for d in byday) or [start.weekday()]
+        week = start.date() - timedelta(days=start.weekday())
+        step = timedelta(weeks=interval)
+        if skip_before is not None and skip_before > start:
+            week += step * ((skip_before.date() - week) // step)
+        while True:
+            for weekday in weekdays:
+                candidate = datetime.combine(week + timedelta(days=weekday), clock)
+                if candidate >= start:
+                    yield candidate
+            week += step
+
+    elif freq == "MONTHLY":
+        bymonthday = [int(d) for d in rule.get("BYMONTHDAY", "").split(",") if d]
+        months = 0
+        if skip_before is not None and skip_before > start:
+            elapsed = (skip_before.year - start.year) * 12 + skip_before.month - start.month
+            months = elapsed - elapsed % interval
+        empty = 0
+        while empty < MAX_EMPTY_PERIODS:
+            year, month = _add_months(start.date(), months)
+            if year >= date.max.year:
+                return
+            days = []
+            if byday:
+                for spec in byday:
+                    n = int(spec[:-2]) if len(spec) > 2 else 0
+                    if n:
+                        day = _nth_weekday(year, month, WEEKDAYS[spec[-2:]], n)
+                        if day:
+                            days.append(day)
+                    else:
+                        day = date(year, month, 1)
+                        while day.month == month:
+                            if day.weekday() == WEEKDAYS[spec[-2:]]:
+                                days.append(day)
+                            day += timedelta(days=1)
+            else:
+                for monthday in bymonthday or [start.day]:
+                    try:
+                        if monthday < 0:
+                            ny, nm = _add_months(date(year, month, 1), 1)
+                            days.append(date(ny, nm, 1) + timedelta(days=monthday))
+                        else:
+                            days.append(date(year, month, monthday))
+                    except ValueError:
+                        continue  # e.g. the 31st in a 30-day month
+            empty += 1
+            for day in sorted(days):
+                candidate = datetime.combine(day, clock)
+                if candidate >= start:
+                    empty = 0
+                    yield candidate
+            months += interval
+
+    elif freq == "YEARLY":
+        year = start.year
+        if skip_before is not None and skip_before > start:
+            elapsed = skip_before.year - start.year
+            year += elapsed - elapsed % interval
+        empty = 0
+        while empty < MAX_EMPTY_PERIODS:
+            try:
+                candidate = start.replace(year=year)
+            except ValueError:
+                empty += 1  # Feb 29 in a non-leap year
+            else:
+                empty = 0
+                yield candidate
+            year += interval
+
+    else:
+        yield start
+
+
+def expand_event(event: IcsEvent, window_start: datetime, window_end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Expand an event into (start, end) UTC pairs overlapping the window."""
+    duration = event.end - event.start
+    if event.rrule is None:
+        if event.start < window_end and event.end > window_start:
+            return [(event.start.astimezone(timezone.utc), event.end.astimezone(timezone.utc))]
+        return []
+
+    rule = event.rrule
+    tz = event.start.tzinfo
+    count = int(rule["COUNT"]) if rule.get("COUNT") else None
+    until = None
+    if rule.get("UNTIL"):
+        try:
+            until, _ = _parse_datetime(rule["UNTIL"], {})
+        except (ValueError, IndexError):
+            pass
+
+    # Work in local wall-clock time so occurrences keep their time across DST
+    local_start = event.start.replace(tzinfo=None)
+    skip_before = None
+    if count is None:
+        # Without COUNT we can jump straight to the window
+        skip_before = (window_start - duration).astimezone(tz).replace(tzinfo=None)
+
+    occurrences = []
+    seen = 0
+    for local in _iter_rule_dates(local_start, rule, skip_before):
+        start = local.replace(tzinfo=tz)
+        if start >= window_end:
+            break
+        if until is not None and start > until:
+            break
+        seen += 1
+        if count is not None and seen > count:
+            break
+        start_utc = start.astimezone(timezone.utc)
+        if start_utc in event.exdates:
+            continue
+        end = start + duration
+        if end > window_start:
+            occurrences.append((start_utc, end.astimezone(timezone.utc)))
+    return occurrences
+
+
+def build_events(events: Iterable[IcsEvent], calendar_name: str, window_start: datetime, window_end: datetime) -> List[CalendarEvent]:
+    """Expand parsed events into CalendarEvent models for the window."""
+    events = list(events)
+    overrides = {
+        (e.uid, e.recurrence_id) for e in events if e.recurrence_id is not None
+    }
+    result = []
+    for event in events:
+        if event.start is None:
+            continue  # an override moved out of the window
+        if event.recurrence_id is not None:
+            occurrences = expand_event(event, window_start, window_end)
+        else:
+            occurrences = [
+                (start, end)
+                for start, end in expand_event(event, window_start, window_end)
+                if (event.uid, start) not in overrides
+            ]
+        for start, end in occurrences:
+            event_id = event.uid
+            if event.rrule is not None or event.recurrence_id is not None:
+                event_id = f"{event.uid}_{start:%Y%m%dT%H%M%SZ}"
+            result.append(CalendarEvent(
+                id=event_id,
+                summary=event.summary,
+                start=start,
+                end=end,
+                all_day=event.all_day,
+                location=event.location,
+                calendar_name=calendar_name,
+            ))
+    return result
+
+
+# =============================================================================
+# FEED SOURCES
+# =============================================================================
+class _FeedState:
+    """Cached validators, parsed events and expansion for one source."""
+
+    def __init__(self):
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.file_signature: Optional[Tuple[float, int]] = None
+        self.ctag: Optional[str] = None
+        self.calendar_name: Optional[str] = None
+        self.events: List[IcsEvent] = []
+        self.parsed_until: Optional[datetime] = None
+        self.version = 0
+        self.expanded_key: Optional[Tuple[int, date]] = None
+        self.expanded: List[CalendarEvent] = []
+
+
+def _window(now: datetime) -> Tuple[datetime, datetime]:
+    """Day-aligned expansion window covering the display window."""
+    day_start = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+    return day_start, day_start + timedelta(days=WINDOW_DAYS + 1)
+
+
+def _source_label(source: str) -> str:
+    name = source.rstrip("/").rsplit("/", 1)[-1]
+    return name.rsplit(".", 1)[0] if name else source
+
+
+class IcsCalendarService:
+    def __init__(self):
+        self._feeds: Dict[str, _FeedState] = {}
+
+    def _state(self, source: str) -> _FeedState:
+        state = self._feeds.get(source)
+        if state is None:
+            state = self._feeds[source] = _FeedState()
+        return state
+
+    @staticmethod
+    def _needs_full_fetch(state: _FeedState, window_end: datetime) -> bool:
+        return state.parsed_until is None or state.parsed_until < window_end
+
+    def _store(self, state: _FeedState, parser: IcsStreamParser) -> None:
+        state.calendar_name = parser.calendar_name
+        state.events = parser.close()
+        state.parsed_until = parser.window_end
+        state.version += 1
+
+    def _parse_file(self, path: str, window_start: datetime, parse_end: datetime) -> IcsStreamParser:
+        parser = IcsStreamParser(window_start, parse_end)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parser.feed(line)
+        return parser
+
+    async def _load_file(self, path: str, state: _FeedState, window_start: datetime, window_end: datetime) -> None:
+        stat = await asyncio.to_thread(os.stat, path)
+        signature = (stat.st_mtime, stat.st_size)
+        if state.file_signature == signature and not self._needs_full_fetch(state, window_end):
+            return
+        parse_end = window_end + timedelta(days=PARSE_HORIZON_DAYS)
+        parser = await asyncio.to_thread(self._parse_file, path, window_start, parse_end)
+        self._store(state, parser)
+        state.file_signature = signature
+
+    async def _load_url(self, client: httpx.AsyncClient, url: str, state: _FeedState, window_start: datetime, window_end: datetime) -> None:
+        headers = {}
+        if not self._needs_full_fetch(state, window_end):
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return
+            response.raise_for_status()
+
+            parser = IcsStreamParser(window_start, window_end + timedelta(days=PARSE_HORIZON_DAYS))
+            async for line in response.aiter_lines():
+                parser.feed(line)
+            self._store(state, parser)
+            state.etag = response.headers.get("ETag")
+            state.last_modified = response.headers.get("Last-Modified")
+
+    async def _load_caldav(self, client: httpx.AsyncClient, url: str, auth: Optional[httpx.BasicAuth], state: _FeedState, window_start: datetime, window_end: datetime) -> None:
+        # The collection's ctag changes whenever any resource in it changes
+        response = await client.request(
+            "PROPFIND",
+            url,
+            content=PROPFIND_BODY,
+            headers={"Depth": "0", "Content-Type": "application/xml; charset=utf-8"},
+            auth=auth,
+        )
+        response.raise_for_status()
+        root = ET.fromstring(response.content)
+        ctag = root.findtext(f".//{{{CS_NS}}}getctag") or root.findtext(f".//{{{DAV_NS}}}sync-token")
+        display_name = root.findtext(f".//{{{DAV_NS}}}displayname")
+
+        if ctag and ctag == state.ctag and not self._needs_full_fetch(state, window_end):
+            return
+
+        parse_end = window_end + timedelta(days=PARSE_HORIZON_DAYS)
+        body = REPORT_BODY.format(
+            start=window_start.strftime("%Y%m%dT%H%M%SZ"),
+            end=parse_end.strftime("%Y%m%dT%H%M%SZ"),
+        )
+        parser = IcsStreamParser(window_start, parse_end)
+        xml_parser = ET.XMLPullParser(events=("end",))
+        calendar_data_tag = f"{{{CALDAV_NS}}}calendar-data"
+        response_tag = f"{{{DAV_NS}}}response"
+
+        async with client.stream(
+            "REPORT",
+            url,
+            content=body,
+            headers={"Depth": "1", "Content-Type": "application/xml; charset=utf-8"},
+            auth=auth,
+        ) as report:
+            report.raise_for_status()
+            async for chunk in report.aiter_bytes():
+                xml_parser.feed(chunk)
+                for _, element in xml_parser.read_events():
+                    if element.tag == calendar_data_tag and element.text:
+                        parser.feed_text(element.text)
+                        # Flush the parser's pending line between resources
+                        parser.feed("")
+                    elif element.tag == response_tag:
+                        element.clear()
+        xml_parser.close()
+
+        self._store(state, parser)
+        if display_name:
+            state.calendar_name = display_name
+        state.ctag = ctag
+
+    def _expanded(self, source: str, state: _FeedState, window_start: datetime, window_end: datetime) -> List[CalendarEvent]:
+        key = (state.version, window_start.date())
+        if state.expanded_key != key:
+            name = state.calendar_name or _source_label(source)
+            state.expanded = build_events(state.events, name, window_start, window_end)
+            state.expanded_key = key
+        return state.expanded
+
+    async def get_status(self, use_cache: bool = True) -> CalendarStatus:
+        """Get upcoming events from ICS feeds and CalDAV collections.
+
+        Called by CalendarService when CALENDAR_SOURCE=ics.
+        """
+        settings = get_settings()
+
+        if use_cache:
+            cached = await cache_service.get(CACHE_KEY)
+            if cached:
+                return cached
+
+        ics_sources = [s.strip() for s in settings.ics_calendar_urls.split(",") if s.strip()]
+        caldav_sources = [s.strip() for s in settings.caldav_urls.split(",") if s.strip()]
+        if not ics_sources and not caldav_sources:
+            return CalendarStatus(
+                status=StatusLevel.UNKNOWN,
+                error_message="ICS calendar not configured",
+                last_updated=datetime.now(),
+            )
+
+        now = datetime.now(timezone.utc)
+        window_start, window_end = _window(now)
+        display_end = now + timedelta(days=WINDOW_DAYS)
+        calendar_errors: Dict[str, str] = {}
+        all_events: List[CalendarEvent] = []
+
+        auth = None
+        if settings.caldav_username:
+            auth = httpx.BasicAuth(settings.caldav_username, settings.caldav_password)
+
+        async with get_upstream("calendar").client(follow_redirects=True) as client:
+            async def load(source: str, caldav: bool) -> None:
+                state = self._state(source)
+                # Each feed has its own breaker; while it is open the feed's
+                # previously parsed events are shown without fetching it
+                breaker = get_breaker(f"calendar:{source}")
+                if not breaker.allow_request():
+                    calendar_errors[source] = (
+                        f"{breaker.last_error} (retrying in {breaker.retry_in()}s)"
+                    )
+                    return
+                try:
+                    if caldav:
+                        await self._load_caldav(client, source, auth, state, window_start, window_end)
+                    elif source.startswith(("http://", "https://")):
+                        await self._load_url(client, source, state, window_start, window_end)
+                    else:
+                        path = source[len("file://"):] if source.startswith("file://") else source
+                        await self._load_file(path, state, window_start, window_end)
+                    breaker.record_success()
+                except Exception as e:
+                    breaker.record_failure(str(e))
+                    calendar_errors[source] = str(e)
+                    logger.warning(f"Error fetching calendar {source}: {e}")
+                finally:
+                    breaker.release()
+
+            await asyncio.gather(
+                *(load(source, False) for source in ics_sources),
+                *(load(source, True) for source in caldav_sources),
+            )
+
+        for source in ics_sources + caldav_sources:
+            state = self._feeds.get(source)
+            if state is None or state.parsed_until is None:
+                continue
+            for event in self._expanded(source, state, window_start, window_end):
+                if event.end > now and event.start < display_end:
+                    all_events.append(event)
+
+        all_events.sort(key=lambda x: x.start)
+
+        total = len(ics_sources) + len(caldav_sources)
+        if calendar_errors and len(calendar_errors) == total:
+            status = StatusLevel.ERROR
+        elif calendar_errors:
+            status = StatusLevel.WARNING
+        elif all_events:
+            status = StatusLevel.HEALTHY
+        else:
+            status = StatusLevel.UNKNOWN
+
+        result = CalendarStatus(
+            status=status,
+            events=all_events,
+            event_count=len(all_events),
+            calendar_errors=calendar_errors,
+            error_message=(
+                f"{len(calendar_errors)} of {total} calendars failed"
+                if status == StatusLevel.ERROR else None
+            ),
+            last_updated=datetime.now(timezone.utc),
+        )
+
+        await cache_service.set(CACHE_KEY, result)
+        return result
+
+
+ics_calendar_service = IcsCalendarService()
@@ -0,0 +1,440 @@
+"""
+Push ingest: status and metric reports from external agents and scripts.
+
+Hosts without an API the dashboard can poll (bare-metal servers, a NAS, cron
+jobs) POST batches of reports to /api/ingest, one JSON object per line:
+
+    {"agent": "nas", "status": "healthy", "metrics": {"cpu_percent": 12.5}}
+    {"agent": "nas", "ts": 1760000000, "labels": {"pool": "tank"}, "metrics": {"pool_used_percent": 71}}
+
+Lines are validated in the request and queued; a background task applies them
+to the same pipeline as a collection: samples go to the in-memory history and
+the metric store (as agent_<metric>{agent=...}), and each agent's latest state
+is cached as the "agents" service, which the snapshot persists and the
+dashboard shows. The queue is bounded, so a burst gets 429 instead of growing
+memory.
+
+With worker_election, followers append their reports to a spool file
+(config/ingest.spool) that the leader applies every worker_sync_interval.
+"""
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from datetime import datetime
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.config import config_path, get_settings
+from app.models.schemas import AgentInfo, AgentsStatus, StatusLevel
+from app.services.cache import cache_service
+from app.services.federation import worst_status
+from app.services.history import history_store, series_key
+from app.services.tsdb import tsdb_store
+from app.utils.runtime_config import get_service_enabled
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "agents_status"
+
+AGENT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+METRIC_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]{0,99}")
+STATUS_LEVELS = {level.value: level for level in StatusLevel}
+
+# Limits per report line
+MAX_METRICS = 200
+MAX_LABELS = 8
+MAX_LABEL_LENGTH = 100
+MAX_MESSAGE_LENGTH = 200
+# Accepted report timestamps, relative to now (backfill, clock skew)
+MAX_AGE = 86400
+MAX_SKEW = 300
+# Bounds on what misbehaving agents can make us keep
+MAX_AGENTS = 1000
+MAX_SERIES_PER_AGENT = 500
+# Reports applied between yields to the event loop
+APPLY_CHUNK = 250
+
+
+# $CONFIG_DIR, the persistent config volume in Docker, or the project root
+SPOOL_PATH = config_path("ingest.spool")
+
+
+class Report(NamedTuple):
+    agent: str
+    timestamp: Optional[float]  # None: when the report is applied
+    status: Optional[StatusLevel]
+    message: Optional[str]
+    labels: Dict[str, str]
+    metrics: Dict[str, float]
+
+
+def _is_number(value) -> bool:
+    # Exact types: bool is an int subclass
+    return type(value) is float or type(value) is int
+
+
+def parse_report(line: bytes, now: float) -> Report:
+    """Validate one NDJSON line; raises ValueError with the reason."""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise ValueError("invalid JSON")
+    if not isinstance(data, dict):
+        raise ValueError("expected an object")
+
+    agent = data.get("agent")
+    if not isinstance(agent, str) or not AGENT_NAME.fullmatch(agent):
+        raise ValueError("agent must be 1-64 letters, digits, '.', '_' or '-'")
+
+    timestamp = data.get("ts")
+    if timestamp is not None and (not _is_number(timestamp) or not now - MAX_AGE <= timestamp <= now + MAX_SKEW):
+        raise ValueError("ts must be a unix timestamp within the last day")
+
+    status = data.get("status")
+    if status is not None:
+        status = STATUS_LEVELS.get(status) if isinstance(status, str) else None
+        if status is None:
+            raise ValueError(f"status must be one of {', '.join(STATUS_LEVELS)}")
+
+    message = data.get("message")
+    if message is not None and not isinstance(message, str):
+        raise ValueError("message must be a string")
+
+    labels = data.get("labels") or {}
+    if not isinstance(labels, dict) or len(labels) > MAX_LABELS:
+        raise ValueError(f"labels must be an object with at most {MAX_LABELS} entries")
+    for name, value in labels.items():
+        if name == "agent" or not METRIC_NAME.fullmatch(name):
+            raise ValueError(f"invalid label name {name!r}")
+        if not isinstance(value, str) or len(value) > MAX_LABEL_LENGTH:
+            raise ValueError(f"label {name} must be a string of at most {MAX_LABEL_LENGTH} characters")
+
+    metrics = data.get("metrics") or {}
+    if not isinstance(metrics, dict) or len(metrics) > MAX_METRICS:
+        raise ValueError(f"metrics must be an object with at most {MAX_METRICS} entries")
+    values = {}
+    for name, value in metrics.items():
+        if not _is_number(value):
+            raise ValueError(f"metric {name} must be a number")
+        if not METRIC_NAME.fullmatch(name):
+            raise ValueError(f"invalid metric name {name!r}")
+        try:
+            value = float(value)
+        except OverflowError:
+            value = math.inf
+        if not math.isfinite(value):
+            raise ValueError(f"metric {name} must be a finite number")
+        values[name] = value
+
+    if status is None and not values:
+        raise ValueError("a report needs a status or metrics")
+
+    return Report(
+        agent=agent,
+        timestamp=float(timestamp) if timestamp is not None else None,
+        status=status,
+        message=message[:MAX_MESSAGE_LENGTH] if message else None,
+        labels=labels,
+        metrics=values,
+    )
+
+
+def parse_lines(lines: List[bytes]) -> Tuple[List[Report], List[str]]:
+    """Valid reports, and "line N: reason" for every rejected line."""
+    now = time.time()
+    reports = []
+    errors = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            reports.append(parse_report(line, now))
+        except ValueError as e:
+            errors.append(f"line {number}: {e}")
+    return reports, errors
+
+
+def _to_line(report: Report) -> bytes:
+    return json.dumps({
+        "agent": report.agent,
+        "ts": report.timestamp,
+        "status": report.status.value if report.status else None,
+        "message": report.message,
+        "labels": report.labels,
+        "metrics": report.metrics,
+    }, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _append_spool(path: Path, data: bytes) -> None:
+    import fcntl
+
+    with open(path, "ab") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(data)
+
+
+def _take_spool(path: Path) -> bytes:
+    import fcntl
+
+    try:
+        f = open(path, "r+b")
+    except FileNotFoundError:
+        return b""
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        data = f.read()
+        if data:
+            f.truncate(0)
+    return data
+
+
+class _Agent:
+    __slots__ = ("name", "status", "message", "last_seen", "metrics", "sampled")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = StatusLevel.HEALTHY
+        self.message: Optional[str] = None
+        self.last_seen = 0.0
+        # Latest value and its timestamp per series key (without the agent label)
+        self.metrics: Dict[str, float] = {}
+        self.sampled: Dict[str, float] = {}
+
+
+class IngestService:
+    def __init__(self, spool_path: Path = SPOOL_PATH):
+        self.spool_path = spool_path
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=get_settings().ingest_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._agents: Dict[str, _Agent] = {}
+        self._restored = False
+        # The leader (or only) worker applies reports, followers spool them
+        self.applying = False
+        self.accepted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.applied = 0
+        self.spooled = 0
+        self.late = 0  # samples older than their series' latest, kept on disk only
+        self.dropped = 0  # reports over MAX_AGENTS, samples over MAX_SERIES_PER_AGENT
+
+    def is_full(self) -> bool:
+        return self._queue.full()
+
+    def submit(self, reports: List[Report], rejected: int = 0) -> bool:
+        """Queue a validated batch; False when the queue is full."""
+        self.rejected += rejected
+        try:
+            self._queue.put_nowait(reports)
+        except asyncio.QueueFull:
+            self.throttled += 1
+            return False
+        self.accepted += len(reports)
+        return True
+
+    async def _restore(self) -> None:
+        """Pick up the agents known before a restart (from the snapshot)."""
+        if self._restored:
+            return
+        self._restored = True
+        last_known = await cache_service.get_last_known(CACHE_KEY)
+        if last_known is None:
+            return
+        for info in last_known[0].agents:
+            if info.last_seen is None or info.name in self._agents:
+                continue
+            agent = self._agents[info.name] = _Agent(info.name)
+            agent.last_seen = info.last_seen.timestamp()
+            agent.metrics = dict(info.metrics)
+            agent.sampled = dict.fromkeys(info.metrics, agent.last_seen)
+            if info.silent_seconds is None:
+                agent.status = info.status
+                agent.message = info.message
+
+    async def _apply(self, reports: List[Report]) -> None:
+        await self._restore()
+        now = time.time()
+        # Clocks running ahead (within MAX_SKEW) count as now, so they do not
+        # make the agent's next reports look late
+        reports = sorted(reports, key=lambda report: now if report.timestamp is None else min(report.timestamp, now))
+        dropped = self.dropped
+        for index, report in enumerate(reports):
+            if index and index % APPLY_CHUNK == 0:
+                # Large batches must not hold up requests
+                await asyncio.sleep(0)
+            timestamp = now if report.timestamp is None else min(report.timestamp, now)
+            agent = self._agents.get(report.agent)
+            if agent is None:
+                if len(self._agents) >= MAX_AGENTS:
+                    self.dropped += 1
+                    continue
+                agent = self._agents[report.agent] = _Agent(report.agent)
+            # A backfilled report does not replace the latest state
+            if timestamp >= agent.last_seen:
+                agent.last_seen = timestamp
+                if report.status is not None:
+                    agent.status = report.status
+                    agent.message = report.message
+                elif report.message is not None:
+                    agent.message = report.message
+
+            labels = {"agent": report.agent, **report.labels}
+            samples = []
+            late = []
+            for metric, value in report.metrics.items():
+                key = series_key(metric, report.labels)
+                if key not in agent.sampled and len(agent.sampled) >= MAX_SERIES_PER_AGENT:
+                    self.dropped += 1
+                    continue
+                sample = (f"agent_{metric}", labels, value)
+                # History series take samples in time order; older ones only go to disk
+                if timestamp < agent.sampled.get(key, 0.0):
+                    late.append(sample)
+                    continue
+                agent.metrics[key] = value
+                agent.sampled[key] = timestamp
+                samples.append(sample)
+            if samples:
+                history_store.record(samples, timestamp)
+            if samples or late:
+                tsdb_store.append(samples + late, timestamp)
+            self.late += len(late)
+            self.applied += 1
+        if self.dropped > dropped:
+            logger.warning(
+                f"Dropped {self.dropped - dropped} agent reports or samples over the limits "
+                f"({MAX_AGENTS} agents, {MAX_SERIES_PER_AGENT} series per agent)"
+            )
+        await cache_service.set(CACHE_KEY, self._build_status())
+
+    async def _handle(self, reports: List[Report]) -> None:
+        if self.applying:
+            await self._apply(reports)
+            return
+        data = b"".join(_to_line(report) for report in reports)
+        await asyncio.to_thread(_append_spool, self.spool_path, data)
+        self.spooled += len(reports)
+
+    async def _drain_spool(self) -> None:
+        data = await asyncio.to_thread(_take_spool, self.spool_path)
+        if data:
+            reports, errors = parse_lines(data.splitlines())
+            if errors:
+                logger.warning(f"Skipped {len(errors)} spooled agent reports: {errors[0]}")
+            await self._apply(reports)
+
+    async def _run(self) -> None:
+        last_drain = 0.0
+        while True:
+            settings = get_settings()
+            # Followers' reports arrive through the spool, checked between batches
+            timeout = settings.worker_sync_interval if settings.worker_election else None
+            try:
+                reports = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                reports = None
+            try:
+                if reports is not None:
+                    await self._handle(reports)
+                if self.applying and settings.worker_election and time.monotonic() - last_drain >= timeout:
+                    last_drain = time.monotonic()
+                    await self._drain_spool()
+            except Exception as e:
+                logger.error(f"Failed to apply agent reports: {e}")
+
+    def _build_status(self) -> AgentsStatus:
+        now = time.time()
+        stale_after = get_settings().ingest_stale_after
+        agents = []
+        for agent in sorted(self._agents.values(), key=attrgetter("name")):
+            age = int(now - agent.last_seen)
+            silent = age > stale_after
+            agents.append(AgentInfo(
+                name=agent.name,
+                status=StatusLevel.ERROR if silent else agent.status,
+                message=f"No report for {age}s" if silent else agent.message,
+                last_seen=datetime.fromtimestamp(agent.last_seen),
+                silent_seconds=age if silent else None,
+                metrics=dict(agent.metrics),
+            ))
+
+        if not agents:
+            return AgentsStatus(
+                status=StatusLevel.UNKNOWN,
+                error_message="No agent has reported yet",
+                last_updated=datetime.now(),
+            )
+        return AgentsStatus(
+            status=worst_status(agent.status for agent in agents),
+            agents=agents,
+            agents_reporting=sum(1 for agent in agents if agent.silent_seconds is None),
+            last_updated=datetime.now(),
+        )
+
+    async def get_status(self, use_cache: bool = True) -> AgentsStatus:
+        """Latest report of every agent, with silent agents flagged."""
+        if not get_service_enabled("agents"):
+            return AgentsStatus(
+                status=StatusLevel.UNKNOWN,
+                error_message="Service disabled",
+                last_updated=datetime.now(),
+            )
+
+        if use_cache:
+            cached = await cache_service.get(CACHE_KEY)
+            if cached:
+                return cached
+
+        if not get_settings().agents_enabled:
+            return AgentsStatus(
+                status=StatusLevel.UNKNOWN,
+                error_message="Set INGEST_API_KEY to accept agent reports",
+                last_updated=datetime.now(),
+            )
+
+        await self._restore()
+        result = self._build_status()
+        await cache_service.set(CACHE_KEY, result)
+        return result
+
+    def take_over(self) -> None:
+        """Apply reports here (this worker became the leader)."""
+        self.applying = True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the consumer and apply (or spool) what is still queued."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        while not self._queue.empty():
+            try:
+                await self._handle(self._queue.get_nowait())
+            except Exception as e:
+                logger.error(f"Failed to apply agent reports: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "applying": self.applying,
+            "queued": self._queue.qsize(),
+            "agents": len(self._agents),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "applied": self.applied,
+            "spooled": self.spooled,
+            "late": self.late,
+            "dropped": self.dropped,
+        }
+
+
+# Singleton instance
+ingest_service = IngestService()
@@ -0,0 +1,115 @@
+"""
+Lightweight performance instrumentation.
+
+Latencies go into fixed-bucket histograms (one bisect and two increments per
+observation), and event-loop lag is measured by a task that sleeps for a fixed
+interval and records how late it woke up. Everything here is cheap enough to
+stay on in production; /api/internal/stats reports it.
+"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; observations above the last bound land in +Inf
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# How often the loop monitor wakes up
+LOOP_INTERVAL = 0.5
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed bucket bounds."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile (0-1) by interpolating within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(low + (high - low) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def cumulative(self) -> List[int]:
+        """Counts of observations <= each bound, then the total (+Inf)."""
+        totals = []
+        running = 0
+        for bucket_count in self.counts:
+            running += bucket_count
+            totals.append(running)
+        return totals
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 4),
+            "p95": round(self.quantile(0.95), 4),
+            "p99": round(self.quantile(0.99), 4),
+            "max": round(self.max, 4),
+        }
+
+
+class LoopMonitor:
+    """Measures event-loop lag: how late a sleep of LOOP_INTERVAL wakes up."""
+
+    def __init__(self):
+        self.lag = Histogram()
+        self.last_lag = 0.0
+        # perf_counter of the last wake-up; read by the blocking watchdog
+        self.last_tick: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            self.last_tick = start
+            await asyncio.sleep(LOOP_INTERVAL)
+            lag = max(time.perf_counter() - start - LOOP_INTERVAL, 0.0)
+            self.last_lag = lag
+            self.lag.observe(lag)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.last_tick = None
+
+    def stats(self) -> Dict:
+        return {"last": round(self.last_lag, 4), **self.lag.to_dict()}
+
+
+# Singleton instance
+loop_monitor = LoopMonitor()
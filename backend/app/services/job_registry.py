@@ -0,0 +1,253 @@
+"""
+Background collection jobs.
+
+Each enabled service gets its own APScheduler job. Jobs are added, removed or
+rescheduled when the runtime config or .env changes, and a change to one
+service's settings re-polls only that service.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.config import get_settings
+from app.models.schemas import StatusLevel
+from app.services.anomaly import anomaly_detector
+from app.services.cache import cache_service
+from app.services.history import history_store
+from app.services.instrumentation import Histogram
+from app.services.metric_extractors import extract_metrics
+from app.services.tracing import Span, span
+from app.services.tsdb import tsdb_store
+from app.services.unifi import unifi_service
+from app.services.proxmox import proxmox_service
+from app.services.plex import plex_service
+from app.services.docker_service import docker_service
+from app.services.calendar import calendar_service
+from app.services.weather import weather_service
+from app.services.news import news_service
+from app.services.unraid import unraid_service
+from app.services.federation import federation_service
+from app.services.ingest import ingest_service
+from app.utils.runtime_config import get_service_enabled
+
+logger = logging.getLogger(__name__)
+
+# Services polled in the background, keyed by their config name
+COLLECTORS = {
+    "unifi": unifi_service,
+    "proxmox": proxmox_service,
+    "plex": plex_service,
+    "docker": docker_service,
+    "calendar": calendar_service,
+    "weather": weather_service,
+    "news": news_service,
+    "unraid": unraid_service,
+    "federation": federation_service,
+    "agents": ingest_service,
+}
+
+# .env key prefixes that belong to each collector
+ENV_PREFIXES = {
+    "unifi": ("UNIFI_",),
+    "proxmox": ("PROXMOX_",),
+    "plex": ("PLEX_",),
+    "docker": ("DOCKER_",),
+    "calendar": ("CALENDAR_", "GOOGLE_", "ICS_", "CALDAV_"),
+    "weather": ("WEATHER_",),
+    "news": ("NEWS_",),
+    "unraid": ("UNRAID_",),
+    "federation": ("FEDERATION_",),
+    "agents": ("INGEST_",),
+}
+
+
+def _job_id(name: str) -> str:
+    return f"poll_{name}"
+
+
+class JobRegistry:
+    def __init__(self):
+        self.scheduler = AsyncIOScheduler(
+            job_defaults={"coalesce": True, "max_instances": 1}
+        )
+        # When each service last finished a collection (success or error)
+        self._last_collected: Dict[str, datetime] = {}
+        # Per service: collection durations, failed collections, last duration
+        self.poll_durations: Dict[str, Histogram] = {}
+        self.poll_errors: Dict[str, int] = {}
+        self.poll_last: Dict[str, float] = {}
+        # Services being collected right now
+        self.in_flight: Set[str] = set()
+
+    def is_enabled(self, name: str) -> bool:
+        """A service is collected if enabled in both .env and runtime config."""
+        settings = get_settings()
+        return getattr(settings, f"{name}_enabled", True) and get_service_enabled(name)
+
+    def interval(self, name: str) -> int:
+        """Seconds between a service's collections."""
+        settings = get_settings()
+        return getattr(settings, f"{name}_poll_interval", settings.poll_interval)
+
+    async def collect(self, name: str) -> None:
+        """Poll one service, refresh its cache entry and record its metrics."""
+        with span("collect", root=True, service=name) as collect_span:
+            await self._collect(name, collect_span)
+
+    async def _collect(self, name: str, collect_span: Optional[Span]) -> None:
+        start = time.perf_counter()
+        failed = False
+        self.in_flight.add(name)
+        try:
+            result = await COLLECTORS[name].get_status(use_cache=False)
+            failed = result.stale or (result.status == StatusLevel.ERROR and bool(result.error_message))
+            if failed and collect_span is not None:
+                collect_span.error = result.error_message or "stale data"
+            samples = extract_metrics(name, result)
+            history_store.record(samples)
+            tsdb_store.append(samples)
+            anomalies = anomaly_detector.observe(samples)
+            if anomalies:
+                logger.info(f"{name}: {len(anomalies)} anomalous metrics")
+            if anomaly_detector.flag(name, anomalies):
+                # Re-cache so the dashboard and the snapshot carry the new anomalies
+                await cache_service.set(f"{name}_status", result)
+        except Exception as e:
+            failed = True
+            if collect_span is not None:
+                collect_span.error = str(e)
+            logger.error(f"Error polling {name}: {e}")
+        finally:
+            self.in_flight.discard(name)
+            duration = time.perf_counter() - start
+            histogram = self.poll_durations.get(name)
+            if histogram is None:
+                histogram = self.poll_durations[name] = Histogram()
+            histogram.observe(duration)
+            self.poll_errors[name] = self.poll_errors.get(name, 0) + int(failed)
+            self.poll_last[name] = duration
+            if name not in self._last_collected:
+                logger.info(f"First collection of {name} complete")
+            self._last_collected[name] = datetime.now()
+
+    def poll_stats(self) -> Dict[str, Dict]:
+        """Collection latency and error counts per service."""
+        return {
+            name: {
+                **histogram.to_dict(),
+                "errors": self.poll_errors.get(name, 0),
+                "last": round(self.poll_last.get(name, 0.0), 4),
+            }
+            for name, histogram in sorted(self.poll_durations.items())
+        }
+
+    def is_warm(self, name: str) -> bool:
+        """Whether a service's first background collection has finished."""
+        return name in self._last_collected
+
+    def mark_collected(self, name: str, when: datetime) -> None:
+        """Record a collection made by another process (the leader worker)."""
+        self._last_collected[name] = when
+
+    def last_collected(self, name: str) -> Optional[datetime]:
+        return self._last_collected.get(name)
+
+    async def wait_for_collections(self, cycles: int, timeout: float) -> None:
+        """Wait until every enabled service has finished `cycles` more collections."""
+        targets = {
+            name: (self.poll_durations[name].count if name in self.poll_durations else 0) + cycles
+            for name in COLLECTORS
+            if self.is_enabled(name)
+        }
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(
+                name in self.poll_durations and self.poll_durations[name].count >= target
+                for name, target in targets.items()
+            ):
+                return
+            await asyncio.sleep(0.2)
+
+    async def poll_all(self) -> None:
+        """Poll every enabled service concurrently."""
+        logger.info("Polling enabled services...")
+        await asyncio.gather(
+            *(self.collect(name) for name in COLLECTORS if self.is_enabled(name))
+        )
+        logger.info("Polling complete")
+
+    def sync(self) -> None:
+        """Add, remove or reschedule jobs to match the current config."""
+        for name in COLLECTORS:
+            job = self.scheduler.get_job(_job_id(name))
+            interval = self.interval(name)
+
+            if not self.is_enabled(name):
+                if job is not None:
+                    job.remove()
+                    logger.info(f"Stopped polling {name}")
+                continue
+
+            if job is None:
+                # First run happens right away, in the background
+                self.scheduler.add_job(
+                    self.collect,
+                    "interval",
+                    seconds=interval,
+                    args=[name],
+                    id=_job_id(name),
+                    next_run_time=datetime.now(self.scheduler.timezone),
+                )
+                logger.info(f"Polling {name} every {interval}s")
+            elif job.trigger.interval.total_seconds() != interval:
+                job.reschedule("interval", seconds=interval)
+                logger.info(f"Polling {name} every {interval}s")
+
+    def repoll(self, name: str) -> None:
+        """Run a service's job now instead of waiting for its next interval."""
+        job = self.scheduler.get_job(_job_id(name))
+        if job is not None:
+            job.modify(next_run_time=datetime.now(self.scheduler.timezone))
+
+    async def on_config_change(self, name: str, changed: Dict[str, Any]) -> None:
+        """Apply a runtime_config.json / .env change to the running jobs."""
+        if name == "env":
+            # Settings are lru_cached; drop them so the new .env values are used
+            get_settings.cache_clear()
+            affected = {
+                service
+                for key in changed
+                for service, prefixes in ENV_PREFIXES.items()
+                if key.startswith(prefixes)
+            }
+        elif name == "runtime":
+            affected = {
+                key[: -len("_enabled")] for key in changed if key.endswith("_enabled")
+            }
+        else:
+            return
+
+        self.sync()
+
+        for service in affected:
+            # Drop data collected with the old settings; the card shows as
+            # loading until the re-poll below lands
+            await cache_service.delete(f"{service}_status")
+            self._last_collected.pop(service, None)
+            if service in COLLECTORS and self.is_enabled(service):
+                self.repoll(service)
+
+    def start(self) -> None:
+        self.sync()
+        self.scheduler.start()
+
+    def shutdown(self) -> None:
+        self.scheduler.shutdown()
+
+
+# Singleton instance
+job_registry = JobRegistry()
@@ -0,0 +1,145 @@
+"""
+Leader election between uvicorn worker processes.
+
+With worker_election enabled, every worker tries to take an exclusive flock on
+config/leader.lock. The one that gets it is the leader: it runs the collection
+jobs, writes the metric store and publishes the snapshot every
+worker_sync_interval seconds. The others are followers: they never poll
+upstreams, but mirror the published snapshot into their cache (and replay new
+collections into their in-memory history), so every worker serves the same
+data and request handling scales across cores without multiplying upstream
+load. The kernel releases the lock when the leader exits, and the next
+follower to try the lock takes over.
+
+Without worker_election the process is always the leader.
+"""
+import asyncio
+import logging
+import os
+import signal
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.config import config_path, get_settings
+from app.services.cache import cache_service
+from app.services.history import history_store
+from app.services.ingest import ingest_service
+from app.services.job_registry import COLLECTORS, job_registry
+from app.services.metric_extractors import extract_metrics
+from app.services.snapshot import snapshot_store
+
+logger = logging.getLogger(__name__)
+
+
+# $CONFIG_DIR, the persistent config volume in Docker, or the project root
+LOCK_PATH = config_path("leader.lock")
+
+
+class LeaderElection:
+    def __init__(self, path: Path = LOCK_PATH):
+        self.path = path
+        self.is_leader = False
+        self._lock_fd: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._on_promote: Optional[Callable[[], Awaitable[None]]] = None
+        self._started = datetime.now()
+        self.mirrored = 0
+
+    def _try_acquire(self) -> bool:
+        import fcntl
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # The leader's pid, so followers can forward refresh requests
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+        return True
+
+    async def _promote(self) -> None:
+        self.is_leader = True
+        cache_service.stop_mirroring()
+        ingest_service.take_over()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self._refresh)
+        except (NotImplementedError, RuntimeError, AttributeError):
+            pass
+        await self._on_promote()
+
+    async def start(self, on_promote: Callable[[], Awaitable[None]]) -> None:
+        """Become the leader (and run on_promote) or start following it."""
+        self._on_promote = on_promote
+        self._started = datetime.now()
+        if not get_settings().worker_election:
+            await self._promote()
+            return
+        if self._try_acquire():
+            logger.info(f"Worker {os.getpid()} is the leader")
+            await self._promote()
+            return
+        logger.info(f"Worker {os.getpid()} is a follower")
+        await self._sync(initial=True)
+        self._task = asyncio.create_task(self._follow())
+
+    async def _sync(self, initial: bool = False) -> None:
+        changed = await snapshot_store.follow()
+        if initial:
+            # Entries already restored from the snapshot at startup count too
+            changed = await cache_service.last_known_items()
+        for key, (value, timestamp) in changed.items():
+            name = key[: -len("_status")]
+            if name in COLLECTORS:
+                history_store.record(extract_metrics(name, value), timestamp.timestamp())
+                # Data from before this worker started (e.g. a snapshot left by
+                # a previous run) is served as stale until the leader collects
+                if timestamp > self._started:
+                    job_registry.mark_collected(name, timestamp)
+        self.mirrored += len(changed)
+
+    async def _follow(self) -> None:
+        while True:
+            await asyncio.sleep(get_settings().worker_sync_interval)
+            try:
+                await self._sync()
+                if self._try_acquire():
+                    logger.warning(f"Worker {os.getpid()} took over as leader")
+                    self._task = None
+                    await self._promote()
+                    return
+            except Exception as e:
+                logger.error(f"Follower sync failed: {e}")
+
+    def _refresh(self) -> None:
+        for name in COLLECTORS:
+            if job_registry.is_enabled(name):
+                job_registry.repoll(name)
+
+    def request_refresh(self) -> bool:
+        """Ask the leader to re-poll every service now (from a follower)."""
+        try:
+            pid = int(self.path.read_text().strip())
+            os.kill(pid, signal.SIGUSR1)
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not reach the leader worker: {e}")
+            return False
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def stats(self) -> Dict[str, object]:
+        return {"pid": os.getpid(), "leader": self.is_leader, "mirrored": self.mirrored}
+
+
+# Singleton instance
+leader = LeaderElection()
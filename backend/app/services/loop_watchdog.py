@@ -0,0 +1,154 @@
+"""
+Detects synchronous code blocking the event loop.
+
+A watchdog thread posts a no-op callback to the loop every CHECK_INTERVAL and
+waits for it to run. If it hasn't run within loop_block_threshold seconds, the
+loop is stuck in a callback: the loop thread's stack is captured right then,
+and once the loop resumes the block is logged (with the stack) and counted
+against the collector or router whose code was running. Blocks inside shared
+code (app.utils, the cache, ...) are counted against the collector or router
+that called it, with the shared module as the detail.
+"""
+import asyncio
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 0.1
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTERS_DIR = os.path.join(APP_DIR, "routers")
+
+
+def service_of(filename: str) -> str:
+    """Service name for an app module's file, e.g. docker_service.py -> docker."""
+    module = os.path.splitext(os.path.basename(filename))[0]
+    return module[: -len("_service")] if module.endswith("_service") else module
+
+
+@functools.lru_cache(maxsize=None)
+def _collector_files() -> FrozenSet[str]:
+    # Imported here: the job registry imports every service module
+    from app.services.job_registry import COLLECTORS
+
+    return frozenset(
+        os.path.abspath(sys.modules[type(service).__module__].__file__)
+        for service in COLLECTORS.values()
+    )
+
+
+def attribute(frame) -> Tuple[str, Optional[str]]:
+    """Collector or router running on a stack, and the shared app module it was in.
+
+    Walks outward from the innermost app frame to the first collector or
+    router frame; the detail is the innermost app module (e.g.
+    utils/config_store) when that is not the collector or router itself.
+    Falls back to the innermost app module.
+    """
+    owners = _collector_files()
+    innermost = None
+    while frame is not None:
+        path = os.path.abspath(frame.f_code.co_filename)
+        frame = frame.f_back
+        if not path.startswith(APP_DIR + os.sep) or path == os.path.abspath(__file__):
+            continue
+        if innermost is None:
+            innermost = path
+        if path in owners or os.path.dirname(path) == ROUTERS_DIR:
+            if path == innermost:
+                return service_of(path), None
+            return service_of(path), os.path.splitext(os.path.relpath(innermost, APP_DIR))[0]
+    if innermost is None:
+        return "unknown", None
+    return service_of(innermost), None
+
+
+class LoopWatchdog:
+    def __init__(self):
+        self.blocks = 0
+        self.by_service: Counter = Counter()
+        self.longest = 0.0
+        self.last_block: Optional[Dict] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Watch the running loop; must be called from the loop's thread."""
+        threshold = get_settings().loop_block_threshold
+        if threshold <= 0 or self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(threshold,), name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+
+    def _run(self, threshold: float) -> None:
+        while not self._stop.wait(CHECK_INTERVAL):
+            ran = threading.Event()
+            posted = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(ran.set)
+            except RuntimeError:
+                return  # loop closed
+            if ran.wait(threshold):
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            service, detail = attribute(frame) if frame is not None else ("unknown", None)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            del frame
+
+            while not ran.wait(0.5):
+                if self._stop.is_set():
+                    return
+            self._record(service, detail, time.perf_counter() - posted, stack)
+
+    def _record(self, service: str, detail: Optional[str], duration: float, stack: str) -> None:
+        self.blocks += 1
+        self.by_service[service] += 1
+        self.longest = max(self.longest, duration)
+        self.last_block = {
+            "service": service,
+            "detail": detail,
+            "duration": round(duration, 3),
+            "at": time.time(),
+        }
+        where = f"{service} ({detail})" if detail else service
+        logger.warning(
+            f"Event loop blocked for {duration:.2f}s in {where}",
+            extra={"details": stack.strip()},
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "threshold": get_settings().loop_block_threshold,
+            "blocks": self.blocks,
+            "by_service": dict(self.by_service),
+            "longest": round(self.longest, 3),
+            "last": self.last_block,
+        }
+
+
+# Singleton instance
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,179 @@
+"""
+Memory footprint introspection.
+
+Retained sizes are approximate: objects are walked recursively and each
+object is counted once (sys.getsizeof), so data shared between a cache entry
+and its last-known copy is attributed to whichever was measured first.
+tracemalloc is only running between an explicit start and stop, and each diff
+compares against the previous call so growth can be pinned to a code line.
+Both walk a lot of objects, so they run in a worker thread; a container that
+changes while it is walked is counted without its contents.
+"""
+import asyncio
+import os
+import sys
+import threading
+import tracemalloc
+from collections import deque
+from typing import Any, Dict, List, Optional, Set
+
+from app.services.cache import cache_service
+from app.services.history import history_store
+from app.services.loop_watchdog import APP_DIR, service_of
+from app.services.snapshot import snapshot_store
+from app.utils.log_buffer import log_buffer
+
+# Objects visited per measurement before it gives up (large client objects
+# like the Google API client reference big graphs)
+MAX_OBJECTS = 200_000
+TRACEMALLOC_FRAMES = 10
+
+# Shared or immortal objects that are never attributed to a single owner
+_SKIP_TYPES = (type, type(sys), type(len), type(lambda: None))
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Approximate bytes retained by obj and everything it references."""
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack and len(seen) < MAX_OBJECTS:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIP_TYPES):
+            continue
+        seen.add(id(current))
+        try:
+            total += sys.getsizeof(current)
+        except TypeError:
+            continue
+
+        if isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        try:
+            if isinstance(current, dict):
+                for key, value in list(current.items()):
+                    stack.append(key)
+                    stack.append(value)
+            elif isinstance(current, (list, tuple, set, frozenset, deque)):
+                stack.extend(list(current))
+        except RuntimeError:
+            # Changed size while being copied (the event loop keeps running)
+            continue
+        if hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        for slot in getattr(type(current), "__slots__", ()):
+            value = getattr(current, slot, None)
+            if value is not None:
+                stack.append(value)
+    return total
+
+
+def _process_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _measure(entries: Dict[str, Any], fresh: Dict[str, Any], collectors: Dict[str, Any]) -> Dict[str, Any]:
+    cache = {}
+    seen: Set[int] = set()
+    for key in sorted(entries):
+        last_known, _ = entries[key]
+        cache[key] = {
+            "cache": deep_sizeof(fresh[key], seen) if fresh.get(key) is not None else 0,
+            "last_known": deep_sizeof(last_known, seen),
+        }
+    log_entries = log_buffer.get_entries()
+
+    return {
+        "rss": _process_rss(),
+        "cache": cache,
+        "cache_total": sum(v["cache"] + v["last_known"] for v in cache.values()),
+        "services": {name: deep_sizeof(service) for name, service in collectors.items()},
+        "snapshot_file": snapshot_store.last_size,
+        "log_buffer": {
+            "entries": len(log_entries),
+            "bytes": deep_sizeof(log_entries),
+        },
+        "history": {
+            "bytes": history_store.memory_usage(),
+            "metrics": history_store.memory_by_metric(),
+        },
+        "tracemalloc": tracemalloc.is_tracing(),
+    }
+
+
+async def memory_report() -> Dict[str, Any]:
+    """Approximate retained bytes per cache key, service snapshot and buffer."""
+    # Imported here: the job registry imports every service module
+    from app.services.job_registry import COLLECTORS
+
+    entries = await cache_service.last_known_items()
+    fresh = {key: await cache_service.peek(key) for key in entries}
+    return await asyncio.to_thread(_measure, entries, fresh, COLLECTORS)
+
+
+class AllocationTracker:
+    """tracemalloc snapshots diffed between calls; call it from a worker thread."""
+
+    def __init__(self):
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+
+    def start(self) -> None:
+        with self._lock:
+            self._start()
+
+    def _start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._previous = self._snapshot()
+
+    def stop(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+    def diff(self, top: int = 20) -> List[Dict[str, Any]]:
+        """Largest allocation changes by line since the last diff (or start)."""
+        with self._lock:
+            if not tracemalloc.is_tracing() or self._previous is None:
+                self._start()
+                return []
+            current = self._snapshot()
+            stats = current.compare_to(self._previous, "traceback")
+            self._previous = current
+
+        result = []
+        for stat in stats[:top]:
+            # Oldest frame first; the innermost app frame says which service allocated
+            frames = list(stat.traceback)
+            service = next(
+                (service_of(f.filename) for f in reversed(frames)
+                 if os.path.abspath(f.filename).startswith(APP_DIR + os.sep)),
+                "other",
+            )
+            result.append({
+                "location": f"{frames[-1].filename}:{frames[-1].lineno}",
+                "service": service,
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff,
+                "traceback": [f"{f.filename}:{f.lineno}" for f in frames],
+            })
+        return result
+
+
+# Singleton instance
+allocation_tracker = AllocationTracker()
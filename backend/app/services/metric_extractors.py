@@ -0,0 +1,128 @@
+"""
+Numeric metrics extracted from service statuses for the history store.
+
+Each extractor turns a freshly collected status model into
+(metric, labels, value) samples.
+"""
+from typing import Callable, Dict, List, Tuple
+
+from app.models.schemas import (
+    AgentsStatus,
+    BaseStatus,
+    CalendarStatus,
+    DockerStatus,
+    FederationStatus,
+    PlexStatus,
+    ProxmoxStatus,
+    UnifiStatus,
+    UnraidStatus,
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _unifi(status: UnifiStatus) -> List[Sample]:
+    return [
+        ("unifi_wan_latency_ms", {}, status.wan_latency),
+        ("unifi_clients", {}, status.client_count),
+        ("unifi_wireless_clients", {}, status.wireless_clients),
+        ("unifi_devices_online", {}, status.devices_online),
+        ("unifi_devices_offline", {}, status.devices_offline),
+    ] + [
+        ("unifi_device_online", {"device": d.name}, 1.0 if d.status == "online" else 0.0)
+        for d in status.devices
+    ]
+
+
+def _proxmox(status: ProxmoxStatus) -> List[Sample]:
+    samples: List[Sample] = [
+        ("proxmox_running", {}, status.total_running),
+        ("proxmox_stopped", {}, status.total_stopped),
+    ]
+    if status.node:
+        labels = {"node": status.node.name}
+        samples.append(("proxmox_node_cpu_percent", labels, status.node.cpu_usage))
+        samples.append(("proxmox_node_memory_percent", labels, status.node.memory_usage))
+    for guest in status.containers + status.vms:
+        if guest.status != "running":
+            continue
+        labels = {"guest": guest.name, "type": guest.type}
+        samples.append(("proxmox_guest_cpu_percent", labels, guest.cpu_usage))
+        samples.append(("proxmox_guest_memory_percent", labels, guest.memory_usage))
+    return samples
+
+
+def _plex(status: PlexStatus) -> List[Sample]:
+    return [("plex_sessions", {}, len(status.active_sessions))]
+
+
+def _docker(status: DockerStatus) -> List[Sample]:
+    return [
+        ("docker_running", {}, status.running_count),
+        ("docker_stopped", {}, status.stopped_count),
+    ] + [
+        ("docker_container_running", {"container": c.name}, 1.0 if c.status == "running" else 0.0)
+        for c in status.containers
+    ]
+
+
+def _calendar(status: CalendarStatus) -> List[Sample]:
+    return [("calendar_events", {}, status.event_count)]
+
+
+def _unraid(status: UnraidStatus) -> List[Sample]:
+    samples: List[Sample] = [
+        ("unraid_containers_running", {}, status.container_running),
+        ("unraid_vms_running", {}, status.vm_running),
+    ]
+    if status.system:
+        samples.append(("unraid_cpu_percent", {}, status.system.cpu_usage))
+        samples.append(("unraid_memory_percent", {}, status.system.memory_percent))
+        if status.system.cpu_temp is not None:
+            samples.append(("unraid_cpu_temp_celsius", {}, status.system.cpu_temp))
+    if status.array:
+        if status.array.total_size:
+            used = status.array.used_size / status.array.total_size * 100
+            samples.append(("unraid_array_used_percent", {}, round(used, 2)))
+        for disk in status.array.disks:
+            if disk.temp is not None:
+                samples.append(("unraid_disk_temp_celsius", {"disk": disk.name}, disk.temp))
+    return samples
+
+
+def _federation(status: FederationStatus) -> List[Sample]:
+    samples: List[Sample] = []
+    for site in status.peers:
+        labels = {"site": site.name}
+        samples.append(("federation_peer_reachable", labels, 1.0 if site.reachable else 0.0))
+        if site.latency_ms is not None:
+            samples.append(("federation_peer_latency_ms", labels, site.latency_ms))
+    return samples
+
+
+def _agents(status: AgentsStatus) -> List[Sample]:
+    # Reported metrics are recorded as they arrive (see ingest)
+    return [
+        ("agent_up", {"agent": agent.name}, 0.0 if agent.silent_seconds is not None else 1.0)
+        for agent in status.agents
+    ]
+
+
+EXTRACTORS: Dict[str, Callable[[BaseStatus], List[Sample]]] = {
+    "unifi": _unifi,
+    "proxmox": _proxmox,
+    "plex": _plex,
+    "docker": _docker,
+    "calendar": _calendar,
+    "unraid": _unraid,
+    "federation": _federation,
+    "agents": _agents,
+}
+
+
+def extract_metrics(name: str, status: BaseStatus) -> List[Sample]:
+    """Samples for a service's status; none unless it is freshly collected data."""
+    extractor = EXTRACTORS.get(name)
+    if extractor is None or status.stale or status.loading or status.error_message:
+        return []
+    return extractor(status)
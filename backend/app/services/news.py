@@ -1,10 +1,11 @@
-import httpx
 from datetime import datetime
 import logging
 
 from app.config import get_settings
 from app.models.schemas import NewsStatus, NewsHeadline, StatusLevel
 from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker, serve_last_known
+from app.services.upstream import get_upstream
 from app.utils.runtime_config import get_service_enabled
 
 logger = logging.getLogger(__name__)
@@ -26,13 +27,14 @@ class NewsService:
                 last_updated=datetime.now(),
             )
 
+        settings = get_settings()
+
         if use_cache:
-            cached = await cache_service.get(CACHE_KEY)
+            # Collected every news_poll_interval, which outlives the cache TTL
+            cached = await cache_service.get_within(CACHE_KEY, settings.news_poll_interval)
             if cached:
                 return cached
 
-        settings = get_settings()
-
         if not settings.news_api_key:
             return NewsStatus(
                 status=StatusLevel.UNKNOWN,
@@ -40,8 +42,12 @@ class NewsService:
                 last_updated=datetime.now(),
             )
 
+        breaker = get_breaker("news")
+        if not breaker.allow_request():
+            return await serve_last_known(CACHE_KEY, NewsStatus, breaker)
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with get_upstream("news").client() as client:
                 params = {
                     "apiKey": settings.news_api_key,
                     "country": settings.news_country,
@@ -72,16 +78,16 @@ class NewsService:
                     last_updated=datetime.now(),
                 )
 
+                breaker.record_success()
                 await cache_service.set(CACHE_KEY, result)
                 return result
 
         except Exception as e:
             logger.error(f"News error: {e}")
-            return NewsStatus(
-                status=StatusLevel.ERROR,
-                error_message=str(e),
-                last_updated=datetime.now(),
-            )
+            breaker.record_failure(str(e))
+            return await serve_last_known(CACHE_KEY, NewsStatus, breaker)
+        finally:
+            breaker.release()
 
 
 news_service = NewsService()
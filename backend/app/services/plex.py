@@ -1,10 +1,11 @@
-import httpx
 from datetime import datetime
 import logging
 
 from app.config import get_settings
 from app.models.schemas import PlexStatus, PlexItem, PlexSession, StatusLevel
 from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker, serve_last_known
+from app.services.upstream import get_upstream
 from app.utils.runtime_config import get_service_enabled
 
 logger = logging.getLogger(__name__)
@@ -40,8 +41,12 @@ class PlexService:
                 last_updated=datetime.now(),
             )
 
+        breaker = get_breaker("plex")
+        if not breaker.allow_request():
+            return await serve_last_known(CACHE_KEY, PlexStatus, breaker)
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with get_upstream("plex").client() as client:
                 headers = {
                     "X-Plex-Token": settings.plex_token,
                     "Accept": "application/json",
@@ -148,16 +153,16 @@ class PlexService:
                     last_updated=datetime.now(),
                 )
 
+                breaker.record_success()
                 await cache_service.set(CACHE_KEY, result)
                 return result
 
         except Exception as e:
             logger.error(f"Plex error: {e}")
-            return PlexStatus(
-                status=StatusLevel.ERROR,
-                error_message=str(e),
-                last_updated=datetime.now(),
-            )
+            breaker.record_failure(str(e))
+            return await serve_last_known(CACHE_KEY, PlexStatus, breaker)
+        finally:
+            breaker.release()
 
 
 plex_service = PlexService()
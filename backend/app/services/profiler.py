@@ -0,0 +1,158 @@
+"""
+On-demand sampling profiler for the event loop thread.
+
+While a profile runs, a background thread samples the loop thread's stack
+every interval and counts identical stacks. Nothing is installed when no
+profile is running, so the overhead outside a profile is zero. Output is in
+collapsed-stack format ("frame;frame;frame count" per line), ready for
+flamegraph.pl or speedscope; every stack is rooted at the service of its
+innermost app module (docker_service -> docker), or "other".
+
+A sample is idle when no callback is running: the asyncio loop waiting in
+selectors, or, for loops written in C (uvloop), the thread's innermost Python
+frame being one of the frames that run the loop (e.g. the caller of
+run_until_complete).
+"""
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Awaitable, Dict, FrozenSet, List, Tuple
+
+from app.services.loop_watchdog import APP_DIR, service_of
+
+# Samples whose innermost frame is in this module are the idle loop waiting for I/O
+IDLE_MODULE = "selectors"
+_COROUTINE_FLAGS = inspect.CO_COROUTINE | inspect.CO_ITERABLE_COROUTINE | inspect.CO_ASYNC_GENERATOR | inspect.CO_GENERATOR
+
+
+def _loop_frames(frame) -> FrozenSet[object]:
+    """Code objects of the frames running the event loop, below a coroutine's frame."""
+    while frame is not None and frame.f_code.co_flags & _COROUTINE_FLAGS:
+        frame = frame.f_back
+    codes = set()
+    while frame is not None:
+        codes.add(frame.f_code)
+        frame = frame.f_back
+    return frozenset(codes)
+
+
+def _module_name(filename: str) -> str:
+    path = os.path.abspath(filename)
+    if path.startswith(APP_DIR + os.sep):
+        relative = os.path.relpath(path, os.path.dirname(APP_DIR))
+        return os.path.splitext(relative)[0].replace(os.sep, ".")
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+class ProfileResult:
+    def __init__(self, stacks: Counter, samples: int, idle: int, duration: float, interval: float):
+        self.stacks = stacks
+        self.samples = samples
+        self.idle = idle
+        self.duration = duration
+        self.interval = interval
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def by_service(self) -> Dict[str, int]:
+        services: Counter = Counter()
+        for stack, count in self.stacks.items():
+            services[stack.split(";", 1)[0]] += count
+        return dict(services.most_common())
+
+    def to_dict(self, top: int = 50) -> Dict:
+        return {
+            "duration": round(self.duration, 3),
+            "interval": self.interval,
+            "samples": self.samples,
+            "idle_samples": self.idle,
+            "by_service": self.by_service(),
+            "stacks": [
+                {"stack": stack, "samples": count} for stack, count in self.stacks.most_common(top)
+            ],
+        }
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self.active = False
+        # code object -> (frame label, service module or None); stacks repeat
+        # the same functions, so labels are resolved once per code object
+        self._labels: Dict[object, Tuple[str, str]] = {}
+        self._loop_codes: FrozenSet[object] = frozenset()
+
+    def _label(self, code) -> Tuple[str, str]:
+        cached = self._labels.get(code)
+        if cached is None:
+            module = _module_name(code.co_filename)
+            function = getattr(code, "co_qualname", code.co_name)
+            service = service_of(code.co_filename) if module.startswith("app.") else None
+            cached = self._labels[code] = (f"{module}:{function}", service)
+        return cached
+
+    def _stack(self, frame) -> Tuple[str, bool]:
+        labels: List[str] = []
+        service = None
+        idle = False
+        first = True
+        while frame is not None:
+            code = frame.f_code
+            label, module_service = self._label(code)
+            if first:
+                idle = code in self._loop_codes or label.startswith(IDLE_MODULE + ":")
+                first = False
+            if service is None and module_service is not None:
+                service = module_service
+            labels.append(label)
+            frame = frame.f_back
+        labels.append(service or "other")
+        labels.reverse()
+        return ";".join(labels), idle
+
+    def _sample(self, thread_id: int, interval: float, stop: threading.Event, stacks: Counter, counts: List[int]) -> None:
+        while not stop.wait(interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            stack, idle = self._stack(frame)
+            del frame
+            counts[0] += 1
+            if idle:
+                counts[1] += 1
+            else:
+                stacks[stack] += 1
+
+    async def profile(self, until: Awaitable, interval: float = 0.01) -> ProfileResult:
+        """Sample the loop thread until `until` completes."""
+        if self.active:
+            raise RuntimeError("A profile is already running")
+        self.active = True
+        self._loop_codes = _loop_frames(sys._getframe())
+        stacks: Counter = Counter()
+        counts = [0, 0]  # samples, idle samples
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(), interval, stop, stacks, counts),
+            name="profiler",
+            daemon=True,
+        )
+        start = time.perf_counter()
+        thread.start()
+        try:
+            await until
+        finally:
+            stop.set()
+            await asyncio.to_thread(thread.join)
+            self.active = False
+            self._labels.clear()
+        return ProfileResult(stacks, counts[0], counts[1], time.perf_counter() - start, interval)
+
+
+# Singleton instance
+profiler = SamplingProfiler()
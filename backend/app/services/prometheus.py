@@ -0,0 +1,167 @@
+"""
+Prometheus text exposition of collected and internal metrics.
+
+Homelab metrics come from the last-known data of every service (the same data
+the snapshot persists). Each service's block is rendered once per collection
+and reused until that service's data changes; the joined body is cached per
+cache version, so scrapes between collections only render the small set of
+internal counters.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from app.models.schemas import BaseStatus
+from app.services.cache import cache_service
+from app.services.circuit_breaker import BreakerState, all_breakers
+from app.services.instrumentation import Histogram, loop_monitor
+from app.services.loop_watchdog import loop_watchdog
+from app.services.metric_extractors import EXTRACTORS, Sample
+from app.services.upstream import all_upstreams
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "homelab_"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_family(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> str:
+    """Render one metric family (HELP, TYPE and its samples)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+def render_histogram(name: str, help_text: str, histograms: List[Tuple[Dict[str, str], Histogram]]) -> str:
+    """Render labelled histograms as one histogram family."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms:
+        bounds = [str(b) for b in histogram.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, histogram.cumulative()):
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(round(histogram.sum, 6))}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def render_samples(samples: List[Sample]) -> str:
+    """Render extracted (metric, labels, value) samples as gauge families."""
+    families: Dict[str, List[Tuple[Dict[str, str], float]]] = defaultdict(list)
+    for metric, labels, value in samples:
+        families[metric].append((labels, value))
+    return "".join(
+        render_family(f"{PREFIX}{metric}", "gauge", metric.replace("_", " "), family)
+        for metric, family in families.items()
+    )
+
+
+class PrometheusExporter:
+    def __init__(self):
+        # cache key -> (collection timestamp, rendered block)
+        self._blocks: Dict[str, Tuple[datetime, str]] = {}
+        self._body_version = None
+        self._body = ""
+        self.renders = 0  # full re-renders of the collected metrics
+        self.scrapes = 0
+
+    def _service_block(self, key: str, value: BaseStatus, timestamp: datetime) -> str:
+        cached = self._blocks.get(key)
+        if cached is not None and cached[0] == timestamp:
+            return cached[1]
+        extractor = EXTRACTORS.get(key[: -len("_status")])
+        block = render_samples(extractor(value)) if extractor else ""
+        self._blocks[key] = (timestamp, block)
+        return block
+
+    async def _collected(self) -> str:
+        version = cache_service.version
+        if version == self._body_version:
+            return self._body
+
+        items = await cache_service.last_known_items()
+        statuses = {
+            key: (value, timestamp)
+            for key, (value, timestamp) in sorted(items.items())
+            if isinstance(value, BaseStatus) and key.endswith("_status")
+        }
+        for key in set(self._blocks) - set(statuses):
+            del self._blocks[key]
+
+        service_status = []
+        collected_at = []
+        blocks = []
+        for key, (value, timestamp) in statuses.items():
+            service = key[: -len("_status")]
+            service_status.append(({"service": service, "status": value.status.value}, 1))
+            collected_at.append(({"service": service}, round(timestamp.timestamp(), 3)))
+            blocks.append(self._service_block(key, value, timestamp))
+
+        self._body = (
+            render_family(f"{PREFIX}service_status", "gauge", "Status of each service's last collection", service_status)
+            + render_family(f"{PREFIX}service_collected_timestamp_seconds", "gauge", "When each service was last collected", collected_at)
+            + "".join(blocks)
+        )
+        self._body_version = version
+        self.renders += 1
+        return self._body
+
+    def _internal(self) -> str:
+        # Imported here: the job registry imports every service module
+        from app.services.job_registry import job_registry
+
+        poll_durations = sorted(job_registry.poll_durations.items())
+        upstreams = sorted(all_upstreams().items())
+        breakers = sorted(all_breakers().items())
+
+        latency = []
+        for name, upstream in upstreams:
+            for q in (50, 95, 99):
+                latency.append(({"upstream": name, "quantile": str(q / 100)}, upstream.latency.percentile(q)))
+
+        return "".join([
+            render_histogram(f"{PREFIX}poll_duration_seconds", "Time spent collecting each service",
+                             [({"service": n}, h) for n, h in poll_durations]),
+            render_family(f"{PREFIX}poll_errors_total", "counter", "Collections that failed",
+                          (({"service": n}, job_registry.poll_errors.get(n, 0)) for n, _ in poll_durations)),
+            render_family(f"{PREFIX}upstream_requests_total", "counter", "HTTP requests sent to each upstream",
+                          (({"upstream": n}, u.requests) for n, u in upstreams)),
+            render_family(f"{PREFIX}upstream_errors_total", "counter", "HTTP requests that failed without a response",
+                          (({"upstream": n}, u.errors) for n, u in upstreams)),
+            render_family(f"{PREFIX}upstream_hedged_requests_total", "counter", "GET requests that were hedged",
+                          (({"upstream": n}, u.hedged) for n, u in upstreams)),
+            render_family(f"{PREFIX}upstream_latency_seconds", "gauge", "Recent upstream response latency quantiles",
+                          latency),
+            render_family(f"{PREFIX}circuit_open", "gauge", "Whether an upstream's circuit breaker is open",
+                          (({"upstream": n}, int(b.state == BreakerState.OPEN)) for n, b in breakers)),
+            render_histogram(f"{PREFIX}event_loop_lag_seconds", "How late the event loop runs scheduled callbacks",
+                             [({}, loop_monitor.lag)]),
+            render_family(f"{PREFIX}event_loop_blocks_total", "counter", "Times the event loop was blocked, by service",
+                          (({"service": n}, c) for n, c in sorted(loop_watchdog.by_service.items()))),
+            render_family(f"{PREFIX}cache_hits_total", "counter", "Status cache hits", [({}, cache_service.hits)]),
+            render_family(f"{PREFIX}cache_misses_total", "counter", "Status cache misses", [({}, cache_service.misses)]),
+            render_family(f"{PREFIX}metrics_renders_total", "counter", "Re-renders of the collected metrics",
+                          [({}, self.renders)]),
+            render_family(f"{PREFIX}metrics_scrapes_total", "counter", "Requests to /metrics",
+                          [({}, self.scrapes)]),
+        ])
+
+    async def render(self) -> str:
+        self.scrapes += 1
+        return await self._collected() + self._internal()
+
+
+# Singleton instance
+prometheus_exporter = PrometheusExporter()
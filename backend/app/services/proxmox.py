@@ -1,5 +1,5 @@
-import httpx
 from datetime import datetime
+from typing import Optional
 import logging
 
 from app.config import get_settings
@@ -10,6 +10,8 @@ from app.models.schemas import (
     StatusLevel,
 )
 from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker, serve_last_known
+from app.services.upstream import get_upstream
 from app.utils.runtime_config import get_service_enabled
 
 logger = logging.getLogger(__name__)
@@ -17,6 +19,57 @@ logger = logging.getLogger(__name__)
 CACHE_KEY = "proxmox_status"
 
 
+def _parse_node(name: str, node_data: dict) -> ProxmoxNode:
+    """Build the node model from nodes/{node}/status data."""
+    cpu_usage = node_data.get("cpu", 0) * 100
+    memory = node_data.get("memory", {})
+    memory_used = memory.get("used", 0)
+    memory_total = memory.get("total", 1)
+    memory_usage = (memory_used / memory_total) * 100 if memory_total else 0
+
+    return ProxmoxNode(
+        name=name,
+        status="online",
+        cpu_usage=round(cpu_usage, 1),
+        memory_usage=round(memory_usage, 1),
+        memory_total=memory_total,
+        uptime=node_data.get("uptime"),
+    )
+
+
+def _parse_guest(item: dict, guest_type: str, detail: Optional[dict] = None) -> ProxmoxContainer:
+    """Build a container or VM from its list entry and status/current detail.
+
+    Without detail (the status request failed) only the list fields are set.
+    """
+    vmid = item.get("vmid")
+    default_name = f"CT {vmid}" if guest_type == "lxc" else f"VM {vmid}"
+    if detail is None:
+        return ProxmoxContainer(
+            vmid=vmid,
+            name=item.get("name", default_name),
+            status=item.get("status", "unknown"),
+            type=guest_type,
+        )
+
+    mem_used = detail.get("mem", 0)
+    mem_total = detail.get("maxmem", 1)
+    disk_used = detail.get("disk", 0)
+    disk_total = detail.get("maxdisk", 1)
+
+    return ProxmoxContainer(
+        vmid=vmid,
+        name=item.get("name", default_name),
+        status=item.get("status", "unknown"),
+        type=guest_type,
+        cpu_usage=round(detail.get("cpu", 0) * 100, 1),
+        memory_usage=round((mem_used / mem_total) * 100, 1) if mem_total else 0,
+        memory_total=mem_total,
+        disk_usage=round((disk_used / disk_total) * 100, 1) if disk_total else 0,
+        uptime=detail.get("uptime"),
+    )
+
+
 class ProxmoxService:
     def __init__(self):
         pass
@@ -51,10 +104,13 @@ class ProxmoxService:
                 last_updated=datetime.now(),
             )
 
+        breaker = get_breaker("proxmox")
+        if not breaker.allow_request():
+            return await serve_last_known(CACHE_KEY, ProxmoxStatus, breaker)
+
         try:
-            async with httpx.AsyncClient(
+            async with get_upstream("proxmox").client(
                 verify=settings.proxmox_verify_ssl,
-                timeout=10.0,
                 headers=self._get_auth_header(settings),
             ) as client:
                 base_url = f"{settings.proxmox_host}/api2/json"
@@ -64,20 +120,7 @@ class ProxmoxService:
                 node_response = await client.get(f"{base_url}/nodes/{node}/status")
                 node_data = node_response.json().get("data", {})
 
-                cpu_usage = node_data.get("cpu", 0) * 100
-                memory = node_data.get("memory", {})
-                memory_used = memory.get("used", 0)
-                memory_total = memory.get("total", 1)
-                memory_usage = (memory_used / memory_total) * 100 if memory_total else 0
-
-                proxmox_node = ProxmoxNode(
-                    name=node,
-                    status="online",
-                    cpu_usage=round(cpu_usage, 1),
-                    memory_usage=round(memory_usage, 1),
-                    memory_total=memory_total,
-                    uptime=node_data.get("uptime"),
-                )
+                proxmox_node = _parse_node(node, node_data)
 
                 # Get LXC containers
                 lxc_response = await client.get(f"{base_url}/nodes/{node}/lxc")
@@ -92,34 +135,10 @@ class ProxmoxService:
                             f"{base_url}/nodes/{node}/lxc/{vmid}/status/current"
                         )
                         detail = detail_response.json().get("data", {})
-
-                        mem_used = detail.get("mem", 0)
-                        mem_total = detail.get("maxmem", 1)
-                        disk_used = detail.get("disk", 0)
-                        disk_total = detail.get("maxdisk", 1)
-
-                        container = ProxmoxContainer(
-                            vmid=vmid,
-                            name=lxc.get("name", f"CT {vmid}"),
-                            status=lxc.get("status", "unknown"),
-                            type="lxc",
-                            cpu_usage=round(detail.get("cpu", 0) * 100, 1),
-                            memory_usage=round((mem_used / mem_total) * 100, 1) if mem_total else 0,
-                            memory_total=mem_total,
-                            disk_usage=round((disk_used / disk_total) * 100, 1) if disk_total else 0,
-                            uptime=detail.get("uptime"),
-                        )
-                        containers.append(container)
+                        containers.append(_parse_guest(lxc, "lxc", detail))
                     except Exception as e:
                         logger.warning(f"Error getting LXC {vmid} details: {e}")
-                        containers.append(
-                            ProxmoxContainer(
-                                vmid=vmid,
-                                name=lxc.get("name", f"CT {vmid}"),
-                                status=lxc.get("status", "unknown"),
-                                type="lxc",
-                            )
-                        )
+                        containers.append(_parse_guest(lxc, "lxc"))
 
                 # Get VMs
                 qemu_response = await client.get(f"{base_url}/nodes/{node}/qemu")
@@ -133,34 +152,10 @@ class ProxmoxService:
                             f"{base_url}/nodes/{node}/qemu/{vmid}/status/current"
                         )
                         detail = detail_response.json().get("data", {})
-
-                        mem_used = detail.get("mem", 0)
-                        mem_total = detail.get("maxmem", 1)
-                        disk_used = detail.get("disk", 0)
-                        disk_total = detail.get("maxdisk", 1)
-
-                        vm_obj = ProxmoxContainer(
-                            vmid=vmid,
-                            name=vm.get("name", f"VM {vmid}"),
-                            status=vm.get("status", "unknown"),
-                            type="qemu",
-                            cpu_usage=round(detail.get("cpu", 0) * 100, 1),
-                            memory_usage=round((mem_used / mem_total) * 100, 1) if mem_total else 0,
-                            memory_total=mem_total,
-                            disk_usage=round((disk_used / disk_total) * 100, 1) if disk_total else 0,
-                            uptime=detail.get("uptime"),
-                        )
-                        vms.append(vm_obj)
+                        vms.append(_parse_guest(vm, "qemu", detail))
                     except Exception as e:
                         logger.warning(f"Error getting VM {vmid} details: {e}")
-                        vms.append(
-                            ProxmoxContainer(
-                                vmid=vmid,
-                                name=vm.get("name", f"VM {vmid}"),
-                                status=vm.get("status", "unknown"),
-                                type="qemu",
-                            )
-                        )
+                        vms.append(_parse_guest(vm, "qemu"))
 
                 all_items = containers + vms
                 total_running = sum(1 for i in all_items if i.status == "running")
@@ -184,16 +179,16 @@ class ProxmoxService:
                     last_updated=datetime.now(),
                 )
 
+                breaker.record_success()
                 await cache_service.set(CACHE_KEY, result)
                 return result
 
         except Exception as e:
             logger.error(f"Proxmox error: {e}")
-            return ProxmoxStatus(
-                status=StatusLevel.ERROR,
-                error_message=str(e),
-                last_updated=datetime.now(),
-            )
+            breaker.record_failure(str(e))
+            return await serve_last_known(CACHE_KEY, ProxmoxStatus, breaker)
+        finally:
+            breaker.release()
 
 
 proxmox_service = ProxmoxService()
@@ -0,0 +1,468 @@
+"""
+Synthetic homelab for scale testing.
+
+Services listed in simulate_services are served by an in-process simulator
+instead of their real upstream. UniFi, Proxmox, Plex and Unraid requests are
+answered by SimulatorTransport under the upstream client, with payloads shaped
+like each API's, so login, parsing, caching, history and serialization all run
+as they would against real hardware; Docker gets a simulated SDK client.
+
+The simulated fleet keeps evolving between polls: clients join, leave and
+roam between access points, devices drop off and come back, containers and
+guests restart, disks spin up and warm or cool, media sessions start and end.
+Churn is expressed as rates per hour and applied for the wall time elapsed
+since the last request, so the data changes realistically at any poll interval.
+"""
+import abc
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import get_settings
+
+# Longest stretch of time simulated at once (e.g. after the machine slept)
+MAX_STEP = 600.0
+
+
+def _chance(rate_per_hour: float, dt: float) -> float:
+    """Probability that an event with this hourly rate happens within dt seconds."""
+    return 1 - math.exp(-rate_per_hour * dt / 3600)
+
+
+def _walk(value: float, step: float, dt: float, low: float, high: float, rng: random.Random) -> float:
+    """Random walk moving by about step every 30 seconds, kept within [low, high]."""
+    return min(max(value + rng.gauss(0, step * math.sqrt(dt / 30)), low), high)
+
+
+def _mac(i: int) -> str:
+    return ":".join(f"{(i >> shift) & 0xFF:02x}" for shift in (40, 32, 24, 16, 8, 0))
+
+
+class _Evolving(abc.ABC):
+    """State that moves forward with wall-clock time."""
+
+    def __init__(self):
+        self._last = time.monotonic()
+
+    def evolve(self) -> None:
+        """Advance by the time since the last call."""
+        now = time.monotonic()
+        dt = min(now - self._last, MAX_STEP)
+        self._last = now
+        if dt > 0:
+            self.advance(dt)
+
+    @abc.abstractmethod
+    def advance(self, dt: float) -> None:
+        """Apply dt seconds of churn."""
+
+
+class SimulatedService(_Evolving):
+    """Evolving state of one simulated upstream."""
+
+    def __init__(self, rng: random.Random):
+        super().__init__()
+        self.rng = rng
+
+    @abc.abstractmethod
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """Status code and JSON body for a request."""
+
+
+class UnifiSimulation(SimulatedService):
+    NETWORKS = ("LAN", "IoT", "Guest")
+
+    def __init__(self, rng: random.Random, clients: int):
+        super().__init__(rng)
+        aps = max(clients // 25, 2)
+        switches = max(aps // 4, 1)
+        self.devices = [{"name": "gateway", "mac": _mac(1), "model": "UDMPRO", "type": "udm"}]
+        self.devices += [{"name": f"switch-{i}", "mac": _mac(0x100 + i), "model": "USW24P", "type": "usw"} for i in range(switches)]
+        self.devices += [{"name": f"ap-{i}", "mac": _mac(0x200 + i), "model": "U6LR", "type": "uap"} for i in range(aps)]
+        for i, d in enumerate(self.devices):
+            d.update(ip=f"10.0.0.{i + 2}", state=1, uptime=rng.randint(3600, 10**7))
+        self.ap_macs = [d["mac"] for d in self.devices if d["type"] == "uap"]
+
+        # A pool of known devices somewhat larger than the target, most connected
+        self.target = clients
+        self.pool = []
+        for i in range(int(clients * 1.2)):
+            wired = rng.random() < 0.3
+            self.pool.append({
+                "hostname": f"host-{i}" if i % 4 else None,
+                "name": f"client-{i}",
+                "mac": _mac(1 << 32 | i),
+                "ip": f"10.1.{i // 250}.{i % 250 + 2}",
+                "network": rng.choice(self.NETWORKS),
+                "is_wired": wired,
+                "ap_mac": None if wired else rng.choice(self.ap_macs),
+                "connected": i < clients,
+            })
+        self.wan_bytes = 0
+        self.latency = 12.0
+
+    def advance(self, dt: float) -> None:
+        rng = self.rng
+        connected = sum(c["connected"] for c in self.pool)
+        # Arrivals balance departures around the target client count
+        leave = _chance(0.5, dt)
+        join = _chance(0.5 * self.target / max(len(self.pool) - self.target, 1), dt)
+        for c in self.pool:
+            if c["connected"]:
+                if rng.random() < leave and connected > self.target * 0.8:
+                    c["connected"] = False
+                    connected -= 1
+                elif not c["is_wired"] and rng.random() < _chance(2, dt):
+                    c["ap_mac"] = rng.choice(self.ap_macs)
+            elif rng.random() < join:
+                c["connected"] = True
+                connected += 1
+
+        for d in self.devices:
+            if d["state"] == 1:
+                d["uptime"] += int(dt)
+                if d["type"] != "udm" and rng.random() < _chance(0.02, dt):
+                    d["state"] = 0
+            elif rng.random() < _chance(12, dt):  # back within ~5 minutes
+                d.update(state=1, uptime=0)
+
+        self.wan_bytes += int(connected * rng.uniform(2_000, 20_000) * dt)
+        self.latency = _walk(self.latency, 1.5, dt, 4.0, 80.0, rng)
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if path.endswith("/api/auth/login"):
+            return 200, {"username": "simulator"}
+        kind = path.rsplit("/", 1)[-1]
+        if kind == "device":
+            data = self.devices
+        elif kind == "sta":
+            data = [{k: v for k, v in c.items() if k != "connected"} for c in self.pool if c["connected"]]
+        elif kind == "dashboard":
+            data = [{"wan-tx_bytes": self.wan_bytes // 5, "wan-rx_bytes": self.wan_bytes * 4 // 5, "latency_avg": round(self.latency, 1)}]
+        else:
+            return 404, {"meta": {"rc": "error"}}
+        return 200, {"meta": {"rc": "ok"}, "data": data}
+
+
+class ProxmoxSimulation(SimulatedService):
+    def __init__(self, rng: random.Random, guests: int):
+        super().__init__(rng)
+        self.guests: Dict[str, Dict[int, dict]] = {"lxc": {}, "qemu": {}}
+        for i in range(guests):
+            kind = "qemu" if i % 4 == 3 else "lxc"
+            running = rng.random() < 0.9
+            maxmem = rng.choice([1, 2, 4, 8, 16]) * 2**30
+            self.guests[kind][100 + i] = {
+                "name": f"{kind}-{i}",
+                "status": "running" if running else "stopped",
+                "cpu": rng.uniform(0, 0.3) if running else 0.0,
+                "mem": int(maxmem * rng.uniform(0.2, 0.8)) if running else 0,
+                "maxmem": maxmem,
+                "disk": rng.randint(2**30, 2**34),
+                "maxdisk": 2**35,
+                "uptime": rng.randint(0, 10**7) if running else 0,
+            }
+        self.node_memory = 128 * 2**30
+        self.node_uptime = 30 * 86400
+
+    def advance(self, dt: float) -> None:
+        rng = self.rng
+        self.node_uptime += int(dt)
+        for guests in self.guests.values():
+            for g in guests.values():
+                if g["status"] == "running":
+                    g["uptime"] += int(dt)
+                    g["cpu"] = _walk(g["cpu"], 0.05, dt, 0.0, 1.0, rng)
+                    g["mem"] = int(_walk(g["mem"], g["maxmem"] * 0.02, dt, g["maxmem"] * 0.05, g["maxmem"], rng))
+                    g["disk"] = min(g["disk"] + int(rng.uniform(0, 2**20) * dt), g["maxdisk"])
+                    if rng.random() < _chance(0.05, dt):  # restarted
+                        g["uptime"] = 0
+                    elif rng.random() < _chance(0.02, dt):
+                        g.update(status="stopped", cpu=0.0, mem=0, uptime=0)
+                elif rng.random() < _chance(1, dt):
+                    g.update(status="running", cpu=rng.uniform(0, 0.3), mem=int(g["maxmem"] * 0.3), uptime=0)
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        parts = path.split("/api2/json/nodes/", 1)[-1].split("/")
+        # <node>/status, <node>/<kind>, <node>/<kind>/<vmid>/status/current
+        if len(parts) == 2 and parts[1] == "status":
+            running = [g for guests in self.guests.values() for g in guests.values() if g["status"] == "running"]
+            used = sum(g["mem"] for g in running)
+            return 200, {"data": {
+                "cpu": min(sum(g["cpu"] for g in running) / 32, 1.0),
+                "memory": {"used": min(used, self.node_memory), "total": self.node_memory},
+                "uptime": self.node_uptime,
+            }}
+        if len(parts) >= 2 and parts[1] in self.guests:
+            guests = self.guests[parts[1]]
+            if len(parts) == 2:
+                return 200, {"data": [{"vmid": vmid, "name": g["name"], "status": g["status"]} for vmid, g in guests.items()]}
+            g = guests.get(int(parts[2])) if parts[2].isdigit() else None
+            if g is not None:
+                return 200, {"data": {k: g[k] for k in ("status", "cpu", "mem", "maxmem", "disk", "maxdisk", "uptime")}}
+        return 404, {"data": None}
+
+
+class PlexSimulation(SimulatedService):
+    def __init__(self, rng: random.Random, users: int):
+        super().__init__(rng)
+        now = int(time.time())
+        self.users = users
+        self.movies = 800 + users * 20
+        self.shows = 150 + users * 3
+        self.recent = [self._new_item(i, now - i * 3600) for i in range(50)]
+        self.sessions: List[dict] = []
+        self._counter = len(self.recent)
+
+    def _new_item(self, i: int, added_at: int) -> dict:
+        if i % 3:
+            return {"title": f"Episode {i}", "type": "episode", "grandparentTitle": f"Show {i % 40}",
+                    "parentTitle": f"Season {i % 5 + 1}", "addedAt": added_at, "grandparentThumb": f"/library/metadata/{i}/thumb"}
+        return {"title": f"Movie {i}", "type": "movie", "addedAt": added_at, "thumb": f"/library/metadata/{i}/thumb", "year": 2000 + i % 25}
+
+    def advance(self, dt: float) -> None:
+        rng = self.rng
+        if rng.random() < _chance(1, dt):
+            self._counter += 1
+            item = self._new_item(self._counter, int(time.time()))
+            self.recent = [item] + self.recent[:49]
+            self.movies += item["type"] == "movie"
+        for s in self.sessions:
+            if s["Player"]["state"] == "playing":
+                s["viewOffset"] += int(dt * 1000)
+            if rng.random() < _chance(2, dt):
+                s["Player"]["state"] = "paused" if s["Player"]["state"] == "playing" else "playing"
+        self.sessions = [s for s in self.sessions if s["viewOffset"] < s["duration"]]
+        if len(self.sessions) < self.users and rng.random() < _chance(self.users * 0.5, dt):
+            item = rng.choice(self.recent)
+            self.sessions.append({
+                **item,
+                "viewOffset": 0,
+                "duration": rng.choice([22, 45, 60, 120]) * 60_000,
+                "User": {"title": f"user{rng.randrange(self.users)}"},
+                "Player": {"state": "playing"},
+            })
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if path == "/library/recentlyAdded":
+            body = {"size": len(self.recent), "Metadata": self.recent}
+        elif path == "/library/sections":
+            body = {"size": 2, "Directory": [{"key": "1", "type": "movie", "title": "Movies"}, {"key": "2", "type": "show", "title": "TV Shows"}]}
+        elif path == "/library/sections/1/all":
+            body = {"size": 0, "totalSize": self.movies}
+        elif path == "/library/sections/2/all":
+            body = {"size": 0, "totalSize": self.shows}
+        elif path == "/status/sessions":
+            body = {"size": len(self.sessions), "Metadata": self.sessions}
+        else:
+            return 404, {}
+        return 200, {"MediaContainer": body}
+
+
+class ContainerFleet(_Evolving):
+    """Containers that crash, get stopped and come back; shared by Docker and Unraid.
+
+    It keeps its own clock, so it moves once per interval however many of
+    the services sharing it are polled.
+    """
+
+    def __init__(self, rng: random.Random, count: int):
+        super().__init__()
+        self.rng = rng
+        created = datetime.now(timezone.utc) - timedelta(days=90)
+        self.containers = [
+            {
+                "id": f"{rng.getrandbits(48):012x}",
+                "name": f"app-{i}",
+                "image": f"lscr.io/linuxserver/app{i % 40}:latest",
+                "running": rng.random() < 0.92,
+                "created": created + timedelta(minutes=i),
+                "port": 8000 + i,
+            }
+            for i in range(count)
+        ]
+
+    def advance(self, dt: float) -> None:
+        for c in self.containers:
+            if c["running"]:
+                if self.rng.random() < _chance(0.03, dt):
+                    c["running"] = False
+            elif self.rng.random() < _chance(2, dt):  # restart policy / someone starts it
+                c["running"] = True
+
+
+class UnraidSimulation(SimulatedService):
+    def __init__(self, rng: random.Random, disks: int, containers: ContainerFleet):
+        super().__init__(rng)
+        self.containers = containers
+        self.disks = []
+        for i in range(disks):
+            spinning = rng.random() < 0.5
+            self.disks.append({
+                "name": f"disk{i + 1}",
+                "device": f"sd{chr(98 + i % 25)}",
+                "size": 8_000_000_000,
+                "spinning": spinning,
+                "temp": rng.uniform(36, 42) if spinning else None,
+                "numErrors": 0,
+            })
+        self.total_kb = disks * 8_000_000_000
+        self.used_kb = int(self.total_kb * 0.6)
+        self.vms = [{"name": f"vm-{i}", "running": i % 3 != 2} for i in range(max(disks // 3, 1))]
+        self.cpu_temp = 45.0
+        self.memory_used = 20 * 2**30
+        self.uptime = 12 * 86400
+
+    def advance(self, dt: float) -> None:
+        rng = self.rng
+        self.uptime += int(dt)
+        for d in self.disks:
+            if d["spinning"]:
+                # Warms towards its working temperature, spins down when idle
+                d["temp"] += (41 - d["temp"]) * _chance(6, dt) + rng.gauss(0, 0.3 * math.sqrt(dt / 30))
+                if rng.random() < _chance(1, dt):
+                    d.update(spinning=False, temp=None)
+            elif rng.random() < _chance(1, dt):
+                d.update(spinning=True, temp=30.0)
+            if rng.random() < _chance(0.001, dt):
+                d["numErrors"] += 1
+        self.used_kb = min(self.used_kb + int(rng.uniform(0, 50_000) * dt), self.total_kb)
+        self.cpu_temp = _walk(self.cpu_temp, 0.8, dt, 35.0, 85.0, rng)
+        self.memory_used = int(_walk(self.memory_used, 2**28, dt, 4 * 2**30, 60 * 2**30, rng))
+        self.containers.evolve()
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if path == "/login":
+            return 200, "<form></form>"
+        if path != "/graphql":
+            return 404, {}
+        query = json.loads(body or b"{}").get("query", "")
+        if "vars" in query:
+            data = {
+                "vars": {"version": "7.2.0", "regTy": "Pro"},
+                "info": {
+                    "cpu": {"threads": 16, "temperature": round(self.cpu_temp)},
+                    "memory": {"total": str(64 * 2**30), "used": str(self.memory_used)},
+                    "os": {"uptime": str(self.uptime)},
+                },
+            }
+        elif "docker" in query:
+            data = {"docker": {"containers": [
+                {"names": [f"/{c['name']}"], "image": c["image"], "state": "RUNNING" if c["running"] else "EXITED"}
+                for c in self.containers.containers
+            ]}}
+        elif "vms" in query:
+            data = {"vms": {"domain": [{"name": v["name"], "state": "RUNNING" if v["running"] else "SHUTOFF"} for v in self.vms]}}
+        elif "array" in query:
+            data = {
+                "array": {
+                    "state": "STARTED",
+                    "capacity": {"kilobytes": {"total": str(self.total_kb), "used": str(self.used_kb), "free": str(self.total_kb - self.used_kb)}},
+                    "parities": [{"name": "parity", "status": "DISK_OK", "numErrors": 0}],
+                },
+                "disks": [
+                    {
+                        "name": d["name"],
+                        "device": d["device"],
+                        "size": d["size"],
+                        "status": "DISK_OK",
+                        "temp": round(d["temp"]) if d["temp"] is not None else None,
+                        "smartStatus": "PASSED",
+                        "numErrors": d["numErrors"],
+                    }
+                    for d in self.disks
+                ],
+            }
+        else:
+            return 200, {"errors": [{"message": "Unknown query"}]}
+        return 200, {"data": data}
+
+
+class DockerSimulation(_Evolving):
+    """Stands in for the Docker SDK client: containers.list(all=True)."""
+
+    def __init__(self, containers: ContainerFleet):
+        super().__init__()
+        self.fleet = containers
+        self.containers = self
+
+    def advance(self, dt: float) -> None:
+        self.fleet.evolve()
+
+    def list(self, all: bool = False) -> List[SimpleNamespace]:
+        self.evolve()
+        result = []
+        for c in self.fleet.containers:
+            if not (all or c["running"]):
+                continue
+            status = "running" if c["running"] else "exited"
+            result.append(SimpleNamespace(
+                short_id=c["id"][:10],
+                name=c["name"],
+                status=status,
+                image=SimpleNamespace(tags=[c["image"]], short_id=f"sha256:{c['id'][:10]}"),
+                attrs={
+                    "Created": c["created"].isoformat(),
+                    "State": {"Status": status},
+                    "NetworkSettings": {"Ports": {"80/tcp": [{"HostIp": "0.0.0.0", "HostPort": str(c["port"])}]}},
+                },
+            ))
+        return result
+
+
+class HomelabSimulator:
+    """The simulated services, built on first use at the configured scale."""
+
+    def __init__(self):
+        self._services: Optional[Dict[str, _Evolving]] = None
+
+    def _build(self) -> Dict[str, _Evolving]:
+        settings = get_settings()
+        rng = random.Random(settings.simulator_seed)
+        containers = ContainerFleet(rng, settings.simulator_containers)
+        return {
+            "unifi": UnifiSimulation(rng, settings.simulator_clients),
+            "proxmox": ProxmoxSimulation(rng, settings.simulator_guests),
+            "plex": PlexSimulation(rng, max(settings.simulator_clients // 100, 1)),
+            "unraid": UnraidSimulation(rng, settings.simulator_disks, containers),
+            "docker": DockerSimulation(containers),
+        }
+
+    def service(self, name: str) -> Optional[_Evolving]:
+        if self._services is None:
+            self._services = self._build()
+        return self._services.get(name)
+
+    def reset(self) -> None:
+        self._services = None
+
+
+class SimulatorTransport(httpx.AsyncBaseTransport):
+    """Answers an upstream's requests from its simulated service."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        service = simulator.service(self._name)
+        if not isinstance(service, SimulatedService):
+            raise httpx.ConnectError(f"No simulator for {self._name}", request=request)
+        service.evolve()
+        status, body = service.handle(request.method, request.url.path, request.content)
+        if isinstance(body, str):
+            response = httpx.Response(status, text=body, request=request)
+        else:
+            response = httpx.Response(status, json=body, request=request)
+        if request.url.path.endswith("login"):
+            response.headers["set-cookie"] = "session=simulated; Path=/"
+        return response
+
+
+# Singleton instance
+simulator = HomelabSimulator()
@@ -0,0 +1,218 @@
+"""
+Persisted last-known snapshot.
+
+The latest value of every cache entry is written to the config volume as
+gzip-compressed JSON so a restarted container can show the dashboard before
+any upstream has answered. Writes are throttled to one per
+snapshot_interval seconds, only happen when the cache changed, and run in a
+worker thread. Files are replaced atomically.
+
+With worker_election, only the leader process writes the snapshot (every
+worker_sync_interval seconds); the other workers mirror it into their cache.
+Only entries whose timestamp changed are serialized (leader) or validated
+(followers) again, and the file is fsynced at most every snapshot_interval
+seconds.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import config_path, get_settings
+from app.models import schemas
+from app.services.cache import cache_service
+from app.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+# $CONFIG_DIR, the persistent config volume in Docker, or the project root
+SNAPSHOT_PATH = config_path("snapshot.json.gz")
+
+
+def _write_file(path: Path, payload: Dict[str, Any], durable: bool = True) -> int:
+    data = gzip.compress(
+        json.dumps(payload, separators=(",", ":")).encode("utf-8"), compresslevel=6
+    )
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        if durable:
+            os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return len(data)
+
+
+def _read_file(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        return json.loads(gzip.decompress(f.read()))
+
+
+def _read_entries(path: Path, known: Optional[Dict[str, Tuple[Any, datetime]]] = None) -> Dict[str, Tuple[Any, datetime]]:
+    return _parse_entries(_read_file(path), known)
+
+
+def _model_class(name: str):
+    model = getattr(schemas, name, None)
+    if isinstance(model, type) and issubclass(model, schemas.BaseStatus):
+        return model
+    return None
+
+
+def _parse_entries(
+    payload: Optional[Dict[str, Any]], known: Optional[Dict[str, Tuple[Any, datetime]]] = None
+) -> Dict[str, Tuple[Any, datetime]]:
+    """Validate a snapshot's entries; those with the timestamp they have in known are reused."""
+    if not payload or payload.get("format") != SNAPSHOT_FORMAT:
+        return {}
+    known = known or {}
+    entries: Dict[str, Tuple[Any, datetime]] = {}
+    for key, entry in payload.get("entries", {}).items():
+        model = _model_class(entry.get("model", ""))
+        if model is None:
+            continue
+        try:
+            timestamp = datetime.fromisoformat(entry["timestamp"])
+            previous = known.get(key)
+            if previous is not None and previous[1] == timestamp:
+                entries[key] = previous
+                continue
+            entries[key] = (model.model_validate(entry["data"]), timestamp)
+        except Exception as e:
+            logger.warning(f"Skipping snapshot entry {key}: {e}")
+    return entries
+
+
+class SnapshotStore:
+    def __init__(self, path: Path = SNAPSHOT_PATH):
+        self.path = path
+        self._written_version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_write: Optional[datetime] = None
+        self.last_size = 0
+        # When the file was last fsynced
+        self._last_sync: Optional[datetime] = None
+        # Leader: serialized entries by key, with the timestamp they were made for
+        self._serialized: Dict[str, Tuple[datetime, Dict[str, Any]]] = {}
+        # Followers: modification time and entries of the snapshot last mirrored
+        self._followed_mtime: Optional[int] = None
+        self._followed: Dict[str, Tuple[Any, datetime]] = {}
+
+    async def load(self) -> int:
+        """Restore the snapshot into the cache's last-known data."""
+        try:
+            entries = await asyncio.to_thread(_read_entries, self.path)
+        except Exception as e:
+            logger.error(f"Failed to read snapshot: {e}")
+            return 0
+        if not entries:
+            return 0
+
+        await cache_service.restore(entries)
+        logger.info(f"Restored {len(entries)} entries from snapshot")
+        return len(entries)
+
+    async def save(self) -> bool:
+        """Write the snapshot if the cache changed since the last write."""
+        version = cache_service.version
+        if version == self._written_version:
+            return False
+
+        with span("snapshot.save", root=True) as save_span:
+            items = await cache_service.last_known_items()
+            with span("serialize"):
+                serialized = {}
+                for key, (value, timestamp) in items.items():
+                    if not isinstance(value, schemas.BaseStatus):
+                        continue
+                    cached = self._serialized.get(key)
+                    if cached is None or cached[0] != timestamp:
+                        cached = (timestamp, {
+                            "model": type(value).__name__,
+                            "timestamp": timestamp.isoformat(),
+                            "data": value.model_dump(mode="json"),
+                        })
+                    serialized[key] = cached
+                self._serialized = serialized
+            now = datetime.now()
+            payload = {
+                "format": SNAPSHOT_FORMAT,
+                "saved_at": now.isoformat(),
+                "entries": {key: entry for key, (_, entry) in serialized.items()},
+            }
+            # Followers read the file from the page cache; only fsync at the
+            # snapshot_interval rate so frequent publishes don't wear the disk
+            durable = (
+                self._last_sync is None
+                or (now - self._last_sync).total_seconds() >= get_settings().snapshot_interval
+            )
+
+            try:
+                with span("write"):
+                    self.last_size = await asyncio.to_thread(_write_file, self.path, payload, durable)
+            except Exception as e:
+                if save_span is not None:
+                    save_span.error = str(e)
+                logger.error(f"Failed to write snapshot: {e}")
+                return False
+        self._written_version = version
+        self.last_write = now
+        if durable:
+            self._last_sync = now
+        return True
+
+    async def follow(self) -> Dict[str, Tuple[Any, datetime]]:
+        """Mirror the leader's snapshot into the cache if it was rewritten.
+
+        Returns the entries that are newer than what the cache had.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return {}
+        if mtime == self._followed_mtime:
+            return {}
+        try:
+            entries = await asyncio.to_thread(_read_entries, self.path, self._followed)
+        except Exception as e:
+            # Read between the leader's writes should not happen (the file is
+            # replaced atomically); retry on the next check
+            logger.warning(f"Failed to read shared snapshot: {e}")
+            return {}
+        self._followed_mtime = mtime
+        self._followed = entries
+        return await cache_service.mirror(entries)
+
+    async def _run(self) -> None:
+        while True:
+            settings = get_settings()
+            # With several workers the snapshot is how followers see new data
+            interval = settings.worker_sync_interval if settings.worker_election else settings.snapshot_interval
+            await asyncio.sleep(interval)
+            await self.save()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer and flush pending changes."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._last_sync = None  # the last write is durable
+        await self.save()
+
+
+# Singleton instance
+snapshot_store = SnapshotStore()
@@ -0,0 +1,295 @@
+"""
+Lightweight tracing for collections and API requests.
+
+Spans are opened with `span(name, **attributes)` and nest through a context
+variable, so the current trace follows awaits and the tasks asyncio.gather
+creates. A span only starts a new trace when opened with root=True (collector
+runs, HTTP requests); anywhere else it is a no-op unless a trace is already
+active, so instrumented code paths cost one context-variable read when
+tracing is off.
+
+Finished traces go through a slow-trace sampler: a trace is kept if it failed,
+or if it is slower than tracing_min_ms and than the p95 of recent traces with
+the same root name. Kept traces are written in batches to a rotating
+JSON-lines file, and also sent to an OTLP/HTTP collector if
+tracing_otlp_endpoint is set.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+
+from app.config import config_path, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Recent root durations per name, for the slow-trace percentile
+BASELINE_SIZE = 100
+BASELINE_MIN = 20
+SLOW_PERCENTILE = 95
+# Kept traces waiting for the exporter; older ones are dropped beyond this
+MAX_PENDING = 500
+EXPORT_INTERVAL = 5
+
+
+# $CONFIG_DIR, the persistent config volume in Docker, or the project root
+TRACE_PATH = config_path("traces.jsonl")
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "duration", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "offset_ms": round((self.start - self.trace.root.start) * 1000, 3),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    __slots__ = ("trace_id", "root", "spans")
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start": round(self.root.start, 6),
+            "duration_ms": round(self.root.duration * 1000, 3),
+            "error": any(s.error for s in self.spans),
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, root: bool = False, **attributes):
+    """Time a block as a span of the current trace (or a new one if root)."""
+    parent = _current.get()
+    if parent is None and not (root and get_settings().tracing_enabled):
+        yield None
+        return
+
+    if parent is None:
+        trace = Trace()
+        current = trace.root = Span(trace, name, None, attributes)
+    else:
+        trace = parent.trace
+        current = Span(trace, name, parent.span_id, attributes)
+    trace.spans.append(current)
+    start = time.perf_counter()
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current.reset(token)
+        if parent is None:
+            tracer.finish(trace)
+
+
+class Tracer:
+    """Slow-trace sampler and batched exporter."""
+
+    def __init__(self, path: Path = TRACE_PATH):
+        self.path = path
+        self._baselines: Dict[str, Deque[float]] = {}
+        self._pending: Deque[Trace] = deque(maxlen=MAX_PENDING)
+        self._file_logger: Optional[logging.Logger] = None
+        self._task: Optional[asyncio.Task] = None
+        self.finished = 0
+        self.kept = 0
+        self.exported = 0
+
+    def _is_slow(self, trace: Trace) -> bool:
+        duration = trace.root.duration
+        baseline = self._baselines.get(trace.root.name)
+        if baseline is None:
+            baseline = self._baselines[trace.root.name] = deque(maxlen=BASELINE_SIZE)
+        slow = duration * 1000 >= get_settings().tracing_min_ms
+        if slow and len(baseline) >= BASELINE_MIN:
+            ordered = sorted(baseline)
+            index = math.ceil(SLOW_PERCENTILE / 100 * len(ordered)) - 1
+            slow = duration > ordered[index]
+        baseline.append(duration)
+        return slow
+
+    def finish(self, trace: Trace) -> None:
+        self.finished += 1
+        failed = any(s.error for s in trace.spans)
+        if self._is_slow(trace) or failed:
+            self.kept += 1
+            self._pending.append(trace)
+
+    def _open_file(self) -> logging.Logger:
+        if self._file_logger is None:
+            settings = get_settings()
+            handler = RotatingFileHandler(
+                self.path,
+                maxBytes=settings.tracing_file_max_mb * 1024 * 1024,
+                backupCount=settings.tracing_file_backups,
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            # A private logger, so traces never reach the root handlers
+            file_logger = logging.Logger("traces")
+            file_logger.addHandler(handler)
+            self._file_logger = file_logger
+        return self._file_logger
+
+    def _write(self, lines: List[str]) -> None:
+        file_logger = self._open_file()
+        for line in lines:
+            file_logger.info(line)
+
+    async def _send_otlp(self, endpoint: str, traces: List[Trace]) -> None:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.post(f"{endpoint.rstrip('/')}/v1/traces", json=to_otlp(traces))
+            response.raise_for_status()
+
+    async def export(self) -> int:
+        """Write pending kept traces; returns how many were exported."""
+        if not self._pending:
+            return 0
+        traces = list(self._pending)
+        self._pending.clear()
+
+        try:
+            lines = [json.dumps(t.to_dict(), separators=(",", ":"), default=str) for t in traces]
+            await asyncio.to_thread(self._write, lines)
+        except Exception as e:
+            logger.error(f"Failed to write traces: {e}")
+
+        endpoint = get_settings().tracing_otlp_endpoint
+        if endpoint:
+            try:
+                await self._send_otlp(endpoint, traces)
+            except Exception as e:
+                logger.warning(f"Failed to send traces to {endpoint}: {e}")
+
+        self.exported += len(traces)
+        return len(traces)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(EXPORT_INTERVAL)
+            await self.export()
+
+    def start(self) -> None:
+        if get_settings().tracing_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.export()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "finished": self.finished,
+            "kept": self.kept,
+            "exported": self.exported,
+            "pending": len(self._pending),
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(traces: List[Trace]) -> Dict[str, Any]:
+    """OTLP/HTTP JSON body for a batch of traces."""
+    spans = []
+    for trace in traces:
+        for s in trace.spans:
+            start_ns = int(s.start * 1e9)
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": 2 if s.parent_id is None else 1,  # SERVER for roots, else INTERNAL
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(start_ns + int((s.duration or 0.0) * 1e9)),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "homelab-dashboard"}}]},
+            "scopeSpans": [{"scope": {"name": "app.services.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not get_settings().tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with span(f"{scope['method']} {scope['path']}", root=True) as request_span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    request_span.set(status_code=message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+# Singleton instance
+tracer = Tracer()
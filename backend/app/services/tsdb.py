@@ -0,0 +1,311 @@
+"""
+On-disk metric history.
+
+Samples from the collectors are buffered in memory and appended in batches to
+an SQLite file on the config volume (no database server involved). Each batch
+also updates 1-minute, 1-hour and 1-day rollups (min, max, avg, last). A
+background task drops data past each resolution's retention and, if the file
+is still over tsdb_max_size_mb, the oldest data of the finest resolution
+first. Range queries read the coarsest resolution that still yields the
+requested number of points.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import config_path, get_settings
+from app.services.history import Labels, downsample, series_key
+
+logger = logging.getLogger(__name__)
+
+# Rollup bucket sizes in seconds; 0 is the raw samples
+RESOLUTIONS = (0, 60, 3600, 86400)
+# How long each resolution is kept (None: until size-based retention)
+RETENTION = {0: 2 * 86400, 60: 14 * 86400, 3600: 365 * 86400, 86400: None}
+# Seconds between compaction runs
+COMPACT_INTERVAL = 3600
+# Buffered samples that trigger an early flush
+MAX_PENDING = 5000
+
+
+# $CONFIG_DIR, the persistent config volume in Docker, or the project root
+DB_PATH = config_path("metrics.db")
+
+
+def _table(resolution: int) -> str:
+    return "raw" if resolution == 0 else f"rollup_{resolution}"
+
+
+class MetricDatabase:
+    """Synchronous SQLite access; called from worker threads."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._series_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        with self._lock:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            # auto_vacuum only takes effect before the first table is created
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS series (id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS raw (series_id INTEGER, ts INTEGER, value REAL, "
+                "PRIMARY KEY (series_id, ts)) WITHOUT ROWID"
+            )
+            for resolution in RESOLUTIONS[1:]:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_table(resolution)} ("
+                    "series_id INTEGER, ts INTEGER, min REAL, max REAL, sum REAL, "
+                    "count INTEGER, last REAL, PRIMARY KEY (series_id, ts)) WITHOUT ROWID"
+                )
+            conn.commit()
+            self._conn = conn
+            self._series_ids = {
+                key: sid for sid, key in conn.execute("SELECT id, key FROM series")
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _series_id(self, key: str) -> int:
+        sid = self._series_ids.get(key)
+        if sid is None:
+            self._conn.execute("INSERT OR IGNORE INTO series (key) VALUES (?)", (key,))
+            sid = self._conn.execute("SELECT id FROM series WHERE key = ?", (key,)).fetchone()[0]
+            self._series_ids[key] = sid
+        return sid
+
+    def _lookup(self, key: str) -> Optional[int]:
+        """Id of an existing series, including ones another process created."""
+        sid = self._series_ids.get(key)
+        if sid is None:
+            row = self._conn.execute("SELECT id FROM series WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                sid = self._series_ids[key] = row[0]
+        return sid
+
+    def write(self, samples: List[Tuple[str, float, float]]) -> None:
+        """Append (key, timestamp, value) samples and update the rollups."""
+        with self._lock:
+            conn = self._conn
+            raw_rows = []
+            rollups: Dict[Tuple[int, int, int], List[float]] = {}
+            for key, timestamp, value in samples:
+                sid = self._series_id(key)
+                ts = int(timestamp)
+                raw_rows.append((sid, ts, value))
+                for resolution in RESOLUTIONS[1:]:
+                    bucket = (resolution, sid, ts - ts % resolution)
+                    agg = rollups.get(bucket)
+                    if agg is None:
+                        rollups[bucket] = [value, value, value, 1, value]
+                    else:
+                        agg[0] = min(agg[0], value)
+                        agg[1] = max(agg[1], value)
+                        agg[2] += value
+                        agg[3] += 1
+                        agg[4] = value
+
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO raw VALUES (?, ?, ?)", raw_rows)
+                for resolution in RESOLUTIONS[1:]:
+                    rows = [
+                        (sid, bucket, *agg)
+                        for (res, sid, bucket), agg in rollups.items()
+                        if res == resolution
+                    ]
+                    conn.executemany(
+                        f"INSERT INTO {_table(resolution)} VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (series_id, ts) DO UPDATE SET "
+                        "min = MIN(min, excluded.min), max = MAX(max, excluded.max), "
+                        "sum = sum + excluded.sum, count = count + excluded.count, "
+                        "last = excluded.last",
+                        rows,
+                    )
+
+    def query(self, key: str, since: float, resolution: int) -> List[Tuple[float, float]]:
+        """(timestamp, avg) rows for a series at one resolution."""
+        with self._lock:
+            sid = self._lookup(key)
+            if sid is None:
+                return []
+            if resolution == 0:
+                sql = "SELECT ts, value FROM raw WHERE series_id = ? AND ts >= ? ORDER BY ts"
+            else:
+                sql = (
+                    f"SELECT ts, sum / count FROM {_table(resolution)} "
+                    "WHERE series_id = ? AND ts >= ? ORDER BY ts"
+                )
+            return self._conn.execute(sql, (sid, int(since))).fetchall()
+
+    def series_keys(self) -> List[str]:
+        with self._lock:
+            # Re-read: the writer may be another process
+            self._series_ids = {
+                key: sid for sid, key in self._conn.execute("SELECT id, key FROM series")
+            }
+            return sorted(self._series_ids)
+
+    def size_bytes(self) -> int:
+        """Bytes in use (excluding free pages)."""
+        conn = self._conn
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def compact(self, max_bytes: int) -> None:
+        """Apply time- and size-based retention and release free pages."""
+        with self._lock:
+            conn = self._conn
+            now = int(time.time())
+            with conn:
+                for resolution, retention in RETENTION.items():
+                    if retention is not None:
+                        conn.execute(
+                            f"DELETE FROM {_table(resolution)} WHERE ts < ?", (now - retention,)
+                        )
+
+            # Over budget: drop the older half of the finest non-empty
+            # resolution until the data fits
+            for _ in range(64):
+                if self.size_bytes() <= max_bytes:
+                    break
+                for resolution in RESOLUTIONS:
+                    table = _table(resolution)
+                    oldest, newest = conn.execute(f"SELECT MIN(ts), MAX(ts) FROM {table}").fetchone()
+                    if oldest is None:
+                        continue
+                    cutoff = oldest + max((newest - oldest) // 2, 1)
+                    with conn:
+                        conn.execute(f"DELETE FROM {table} WHERE ts < ?", (cutoff,))
+                    logger.info(f"Metric store over size limit, dropped {table} data before {cutoff}")
+                    break
+                else:
+                    break
+
+            conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def _retained(resolution: int, since: float, now: float) -> bool:
+    retention = RETENTION[resolution]
+    return retention is None or since >= now - retention
+
+
+def pick_resolution(since: float, until: float, points: int) -> int:
+    """Coarsest resolution that still gives `points` buckets over the range.
+
+    If none does, the finest resolution that still holds data back to since.
+    """
+    now = time.time()
+    for resolution in reversed(RESOLUTIONS[1:]):
+        if (until - since) / resolution >= points and _retained(resolution, since, now):
+            return resolution
+    for resolution in RESOLUTIONS:
+        if _retained(resolution, since, now):
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+class TsdbStore:
+    def __init__(self, path: Path = DB_PATH):
+        self.db = MetricDatabase(path)
+        self._pending: List[Tuple[str, float, float]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._opened = False
+
+    def append(self, samples: Iterable[Tuple[str, Labels, float]], timestamp: Optional[float] = None) -> None:
+        """Buffer (metric, labels, value) samples for the next batch write."""
+        if not self._opened:
+            return
+        timestamp = timestamp if timestamp is not None else time.time()
+        self._pending.extend(
+            (series_key(metric, labels), timestamp, float(value)) for metric, labels, value in samples
+        )
+        if len(self._pending) >= MAX_PENDING:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self.db.write, batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} metric samples: {e}")
+
+    async def query(self, key: str, since: float, points: int) -> List[Tuple[float, float]]:
+        """Downsampled (timestamp, value) points read from disk."""
+        if not self._opened:
+            return []
+        until = time.time()
+        resolution = pick_resolution(since, until, points)
+        rows = await asyncio.to_thread(self.db.query, key, since, resolution)
+        times = [row[0] for row in rows]
+        values = [row[1] for row in rows]
+        return downsample(times, values, since, until, points)
+
+    def series_keys(self) -> List[str]:
+        return self.db.series_keys() if self._opened else []
+
+    async def compact(self) -> None:
+        max_bytes = get_settings().tsdb_max_size_mb * 1024 * 1024
+        try:
+            await asyncio.to_thread(self.db.compact, max_bytes)
+        except Exception as e:
+            logger.error(f"Metric store compaction failed: {e}")
+
+    async def _run(self) -> None:
+        last_compact = time.monotonic()
+        while True:
+            await asyncio.sleep(get_settings().tsdb_flush_interval)
+            await self.flush()
+            if time.monotonic() - last_compact >= COMPACT_INTERVAL:
+                last_compact = time.monotonic()
+                await self.compact()
+
+    async def start(self, writer: bool = True) -> None:
+        """Open the store; only the writer (one process) flushes and compacts."""
+        if not get_settings().tsdb_enabled:
+            return
+        try:
+            await asyncio.to_thread(self.db.open)
+        except Exception as e:
+            logger.error(f"Failed to open metric store {self.db.path}: {e}")
+            return
+        self._opened = True
+        if writer:
+            await self.start_writer()
+
+    async def start_writer(self) -> None:
+        if self._opened and self._task is None:
+            await self.compact()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._opened:
+            await self.flush()
+            await asyncio.to_thread(self.db.close)
+            self._opened = False
+
+
+# Singleton instance
+tsdb_store = TsdbStore()
@@ -1,11 +1,13 @@
 import httpx
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 import logging
 
 from app.config import get_settings
 from app.models.schemas import UnifiStatus, UnifiDevice, UnifiClient, StatusLevel
 from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker, serve_last_known
+from app.services.upstream import get_upstream
 from app.utils.runtime_config import get_service_enabled
 
 logger = logging.getLogger(__name__)
@@ -13,6 +15,48 @@ logger = logging.getLogger(__name__)
 CACHE_KEY = "unifi_status"
 
 
+def _parse_devices(devices_data: List[dict]) -> Tuple[List[UnifiDevice], int, int]:
+    """Build devices from stat/device data; returns (devices, online, offline)."""
+    devices = []
+    devices_online = 0
+    devices_offline = 0
+
+    for d in devices_data:
+        device = UnifiDevice(
+            name=d.get("name", d.get("mac", "Unknown")),
+            mac=d.get("mac", ""),
+            model=d.get("model", "Unknown"),
+            ip=d.get("ip"),
+            status="online" if d.get("state", 0) == 1 else "offline",
+            uptime=d.get("uptime"),
+            type=d.get("type", "unknown"),
+        )
+        devices.append(device)
+        if device.status == "online":
+            devices_online += 1
+        else:
+            devices_offline += 1
+    return devices, devices_online, devices_offline
+
+
+def _parse_clients(clients_data: List[dict]) -> Tuple[List[UnifiClient], int]:
+    """Build clients from stat/sta data; returns (clients, wireless count)."""
+    clients = []
+    wireless_clients = 0
+    for c in clients_data:
+        client_obj = UnifiClient(
+            hostname=c.get("hostname") or c.get("name"),
+            mac=c.get("mac", ""),
+            ip=c.get("ip"),
+            network=c.get("network"),
+            is_wired=c.get("is_wired", False),
+        )
+        clients.append(client_obj)
+        if not client_obj.is_wired:
+            wireless_clients += 1
+    return clients, wireless_clients
+
+
 class UnifiService:
     def __init__(self):
         self._cookies: Optional[dict] = None
@@ -61,61 +105,31 @@ class UnifiService:
                 last_updated=datetime.now(),
             )
 
+        breaker = get_breaker("unifi")
+        if not breaker.allow_request():
+            return await serve_last_known(CACHE_KEY, UnifiStatus, breaker)
+
         try:
-            async with httpx.AsyncClient(
+            async with get_upstream("unifi").client(
                 verify=settings.unifi_verify_ssl,
-                timeout=10.0,
             ) as client:
                 if not await self._login(client, settings):
-                    return UnifiStatus(
-                        status=StatusLevel.ERROR,
-                        error_message="Authentication failed",
-                        last_updated=datetime.now(),
-                    )
+                    breaker.record_failure("Authentication failed")
+                    return await serve_last_known(CACHE_KEY, UnifiStatus, breaker)
 
                 # Get devices
                 devices_url = f"{settings.unifi_host}/proxy/network/api/s/{settings.unifi_site}/stat/device"
                 devices_response = await client.get(devices_url, cookies=self._cookies)
                 devices_data = devices_response.json().get("data", [])
 
-                devices = []
-                devices_online = 0
-                devices_offline = 0
-
-                for d in devices_data:
-                    device = UnifiDevice(
-                        name=d.get("name", d.get("mac", "Unknown")),
-                        mac=d.get("mac", ""),
-                        model=d.get("model", "Unknown"),
-                        ip=d.get("ip"),
-                        status="online" if d.get("state", 0) == 1 else "offline",
-                        uptime=d.get("uptime"),
-                        type=d.get("type", "unknown"),
-                    )
-                    devices.append(device)
-                    if device.status == "online":
-                        devices_online += 1
-                    else:
-                        devices_offline += 1
+                devices, devices_online, devices_offline = _parse_devices(devices_data)
 
                 # Get clients
                 clients_url = f"{settings.unifi_host}/proxy/network/api/s/{settings.unifi_site}/stat/sta"
                 clients_response = await client.get(clients_url, cookies=self._cookies)
                 clients_data = clients_response.json().get("data", [])
 
-                clients = []
-                wireless_clients = 0
-                for c in clients_data:
-                    client_obj = UnifiClient(
-                        hostname=c.get("hostname") or c.get("name"),
-                        mac=c.get("mac", ""),
-                        ip=c.get("ip"),
-                        network=c.get("network"),
-                        is_wired=c.get("is_wired", False),
-                    )
-                    clients.append(client_obj)
-                    if not client_obj.is_wired:
-                        wireless_clients += 1
+                clients, wireless_clients = _parse_clients(clients_data)
 
                 # Get dashboard stats for 24h data usage
                 dashboard_url = f"{settings.unifi_host}/proxy/network/api/s/{settings.unifi_site}/stat/dashboard"
@@ -154,16 +168,16 @@ class UnifiService:
                     last_updated=datetime.now(),
                 )
 
+                breaker.record_success()
                 await cache_service.set(CACHE_KEY, result)
                 return result
 
         except Exception as e:
             logger.error(f"Unifi error: {e}")
-            return UnifiStatus(
-                status=StatusLevel.ERROR,
-                error_message=str(e),
-                last_updated=datetime.now(),
-            )
+            breaker.record_failure(str(e))
+            return await serve_last_known(CACHE_KEY, UnifiStatus, breaker)
+        finally:
+            breaker.release()
 
 
 unifi_service = UnifiService()
@@ -15,6 +15,8 @@ from app.models.schemas import (
     StatusLevel,
 )
 from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker, serve_last_known
+from app.services.upstream import get_upstream
 from app.utils.runtime_config import get_service_enabled
 
 logger = logging.getLogger(__name__)
@@ -173,17 +175,17 @@ class UnraidService:
                 last_updated=datetime.now(),
             )
 
+        breaker = get_breaker("unraid")
+        if not breaker.allow_request():
+            return await serve_last_known(CACHE_KEY, UnraidStatus, breaker)
+
         try:
-            async with httpx.AsyncClient(
+            async with get_upstream("unraid", default_timeout=15.0).client(
                 verify=settings.unraid_verify_ssl,
-                timeout=15.0,
             ) as client:
                 if not await self._login(client, settings):
-                    return UnraidStatus(
-                        status=StatusLevel.ERROR,
-                        error_message="Authentication failed",
-                        last_updated=datetime.now(),
-                    )
+                    breaker.record_failure("Authentication failed")
+                    return await serve_last_known(CACHE_KEY, UnraidStatus, breaker)
 
                 # Fetch all data using GraphQL queries
                 array_data = await self._fetch_array_status(client, settings)
@@ -233,16 +235,16 @@ class UnraidService:
                     last_updated=datetime.now(),
                 )
 
+                breaker.record_success()
                 await cache_service.set(CACHE_KEY, result)
                 return result
 
         except Exception as e:
             logger.error(f"Unraid error: {e}")
-            return UnraidStatus(
-                status=StatusLevel.ERROR,
-                error_message=str(e),
-                last_updated=datetime.now(),
-            )
+            breaker.record_failure(str(e))
+            return await serve_last_known(CACHE_KEY, UnraidStatus, breaker)
+        finally:
+            breaker.release()
 
     async def _fetch_array_status(self, client: httpx.AsyncClient, settings) -> Optional[dict]:
         """Fetch array status from Unraid GraphQL API."""
@@ -0,0 +1,296 @@
+"""
+Shared HTTP layer for upstream APIs.
+
+Every upstream keeps rolling windows of response latencies (time until the
+response headers arrive, or until a request failed; a timeout counts as at
+least the timeout) and of connection setup times (TCP connect plus TLS
+handshake, from httpcore's trace events). Once a window has enough samples,
+the matching timeout (read, or connect) is its p99 times
+upstream_timeout_multiplier, clamped to [upstream_timeout_min,
+upstream_timeout_max]; before that the service's fixed default is used. With upstream_hedging enabled, a GET still waiting after the
+observed p95 is sent a second time and whichever answers first wins.
+upstream_mode=record or replay puts a cassette transport underneath (see
+app.services.cassette); services in simulate_services get the simulator's
+transport instead (app.services.simulator).
+"""
+import asyncio
+import logging
+import math
+import re
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.config import get_settings
+from app.services.cassette import RecordingTransport, ReplayTransport
+from app.services.instrumentation import Histogram
+from app.services.simulator import SimulatorTransport
+from app.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per upstream
+WINDOW_SIZE = 200
+# Samples needed before timeouts and hedging follow the observed latency
+MIN_SAMPLES = 20
+# Distinct endpoints tracked per upstream; the rest are counted as "other"
+MAX_ENDPOINTS = 50
+# Path segments that identify a resource (numeric ids, uuids, hashes)
+ID_SEGMENT = re.compile(r"\d+|[0-9a-fA-F-]{16,}")
+# The httpx.Timeout field behind each timeout exception
+TIMEOUT_FIELDS = {
+    httpx.ConnectTimeout: "connect",
+    httpx.ReadTimeout: "read",
+    httpx.WriteTimeout: "write",
+    httpx.PoolTimeout: "pool",
+}
+
+
+def endpoint_name(request: httpx.Request) -> str:
+    """Request method and path with resource ids collapsed, e.g. GET /lxc/{id}/status/current."""
+    segments = request.url.path.split("/")
+    path = "/".join("{id}" if ID_SEGMENT.fullmatch(s) else s for s in segments)
+    return f"{request.method} {path}"
+
+
+class LatencyWindow:
+    """Fixed-size window of recent latencies in seconds."""
+
+    def __init__(self, size: int = WINDOW_SIZE):
+        self._samples: deque = deque(maxlen=size)
+        self._sorted: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, p: float) -> float:
+        if not self._samples:
+            return 0.0
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        index = math.ceil(p / 100 * len(self._sorted)) - 1
+        return self._sorted[min(max(index, 0), len(self._sorted) - 1)]
+
+
+class Upstream:
+    def __init__(self, name: str, default_timeout: float = 10.0):
+        self.name = name
+        self.default_timeout = default_timeout
+        self.latency = LatencyWindow()
+        self.connect_latency = LatencyWindow()
+        self.requests = 0
+        self.errors = 0  # requests that raised (timeouts, connection errors)
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.in_flight = 0
+        # endpoint -> request latency histogram / failed requests
+        self.endpoints: Dict[str, Histogram] = {}
+        self.endpoint_errors: Dict[str, int] = {}
+
+    def endpoint(self, name: str) -> str:
+        """The stats key for an endpoint, bounded to MAX_ENDPOINTS per upstream."""
+        if name not in self.endpoints and len(self.endpoints) >= MAX_ENDPOINTS:
+            return "other"
+        return name
+
+    def _adaptive(self, window: LatencyWindow) -> float:
+        if len(window) < MIN_SAMPLES:
+            return self.default_timeout
+        settings = get_settings()
+        timeout = window.percentile(99) * settings.upstream_timeout_multiplier
+        return min(max(timeout, settings.upstream_timeout_min), settings.upstream_timeout_max)
+
+    def timeout_seconds(self) -> float:
+        """Current read (and write/pool) timeout, derived from the observed response p99."""
+        return self._adaptive(self.latency)
+
+    def connect_timeout_seconds(self) -> float:
+        """Current connect timeout, derived from the observed connection setup p99."""
+        return self._adaptive(self.connect_latency)
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout_seconds(), connect=self.connect_timeout_seconds())
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging a GET, or None if hedging is off."""
+        if not get_settings().upstream_hedging or len(self.latency) < MIN_SAMPLES:
+            return None
+        return self.latency.percentile(95)
+
+    def client(self, verify: bool = True, **kwargs) -> httpx.AsyncClient:
+        """An AsyncClient whose requests use this upstream's adaptive timeouts."""
+        settings = get_settings()
+        if self.name in settings.simulate_services_list:
+            inner: httpx.AsyncBaseTransport = SimulatorTransport(self.name)
+        elif settings.upstream_mode == "replay":
+            inner = ReplayTransport(self.name)
+        elif settings.upstream_mode == "record":
+            inner = RecordingTransport(self.name, httpx.AsyncHTTPTransport(verify=verify))
+        else:
+            inner = httpx.AsyncHTTPTransport(verify=verify)
+        transport = AdaptiveTransport(self, inner)
+        return httpx.AsyncClient(transport=transport, timeout=self.timeout(), **kwargs)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "samples": len(self.latency),
+            "p50": round(self.latency.percentile(50), 4),
+            "p95": round(self.latency.percentile(95), 4),
+            "p99": round(self.latency.percentile(99), 4),
+            "timeout": round(self.timeout_seconds(), 2),
+            "connect_p99": round(self.connect_latency.percentile(99), 4),
+            "connect_timeout": round(self.connect_timeout_seconds(), 2),
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "in_flight": self.in_flight,
+            "endpoints": {
+                name: {**histogram.to_dict(), "errors": self.endpoint_errors.get(name, 0)}
+                for name, histogram in sorted(self.endpoints.items())
+            },
+        }
+
+
+def _attempt(request: httpx.Request) -> httpx.Request:
+    """A copy of a GET for one hedged attempt, with its own extensions (and trace hook)."""
+    return httpx.Request(
+        request.method, request.url, headers=request.headers, extensions=dict(request.extensions)
+    )
+
+
+class _ConnectTracer:
+    """httpcore trace hook timing a new connection's TCP connect and TLS handshake."""
+
+    def __init__(self, inner):
+        self._inner = inner
+        self._started: Optional[float] = None
+        # Setup time of a connection made for this request (pooled ones have none)
+        self.connected: Optional[float] = None
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        """Seconds spent setting up a connection so far."""
+        return None if self._started is None else time.perf_counter() - self._started
+
+    async def __call__(self, name: str, info: dict) -> None:
+        if name == "connection.connect_tcp.started":
+            self._started = time.perf_counter()
+        elif name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            self.connected = self.elapsed
+        if self._inner is not None:
+            await self._inner(name, info)
+
+
+class AdaptiveTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport to apply adaptive timeouts, record latency and hedge GETs."""
+
+    def __init__(self, upstream: Upstream, transport: httpx.AsyncBaseTransport):
+        self._upstream = upstream
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Timeouts are re-evaluated per request so long-lived clients follow the window
+        request.extensions["timeout"] = self._upstream.timeout().as_dict()
+
+        upstream = self._upstream
+        endpoint = upstream.endpoint(endpoint_name(request))
+        upstream.requests += 1
+        upstream.in_flight += 1
+        delay = upstream.hedge_delay() if request.method == "GET" else None
+        start = time.perf_counter()
+        try:
+            with span(f"http {endpoint}", upstream=upstream.name) as http_span:
+                if delay is None:
+                    response = await self._send(request)
+                else:
+                    response = await self._send_hedged(request, delay)
+                if http_span is not None:
+                    http_span.set(status_code=response.status_code)
+                return response
+        except Exception:
+            upstream.errors += 1
+            upstream.endpoint_errors[endpoint] = upstream.endpoint_errors.get(endpoint, 0) + 1
+            raise
+        finally:
+            upstream.in_flight -= 1
+            histogram = upstream.endpoints.get(endpoint)
+            if histogram is None:
+                histogram = upstream.endpoints[endpoint] = Histogram()
+            histogram.observe(time.perf_counter() - start)
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        upstream = self._upstream
+        tracer = _ConnectTracer(request.extensions.get("trace"))
+        request.extensions["trace"] = tracer
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TimeoutException as e:
+            # Timeouts must count, or the p99 (and so the timeout) never grows
+            field = TIMEOUT_FIELDS.get(type(e), "read")
+            timeout = request.extensions["timeout"].get(field) or 0.0
+            if field == "connect":
+                tracer.connected = max(tracer.elapsed or 0.0, timeout)
+            upstream.latency.add(max(time.perf_counter() - start, timeout))
+            raise
+        except Exception:
+            upstream.latency.add(time.perf_counter() - start)
+            raise
+        finally:
+            if tracer.connected is not None:
+                upstream.connect_latency.add(tracer.connected)
+        upstream.latency.add(time.perf_counter() - start)
+        return response
+
+    async def _send_hedged(self, request: httpx.Request, delay: float) -> httpx.Response:
+        primary = asyncio.create_task(self._send(_attempt(request)))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self._upstream.hedged += 1
+                tasks.add(asyncio.create_task(self._send(_attempt(request))))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [t for t in done if t.exception() is None]
+                if winners:
+                    winner = winners[0]
+                    if winner is not primary:
+                        self._upstream.hedge_wins += 1
+                    for extra in winners[1:]:
+                        await extra.result().aclose()
+                    return winner.result()
+                error = next(iter(done)).exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_upstreams: Dict[str, Upstream] = {}
+
+
+def get_upstream(name: str, default_timeout: float = 10.0) -> Upstream:
+    """Get (or create) the shared state for an upstream."""
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        upstream = _upstreams[name] = Upstream(name, default_timeout)
+    return upstream
+
+
+def all_upstreams() -> Dict[str, Upstream]:
+    return dict(_upstreams)
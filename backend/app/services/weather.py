@@ -1,10 +1,11 @@
-import httpx
 from datetime import datetime
 import logging
 
 from app.config import get_settings
 from app.models.schemas import WeatherStatus, WeatherForecast, StatusLevel
 from app.services.cache import cache_service
+from app.services.circuit_breaker import get_breaker, serve_last_known
+from app.services.upstream import get_upstream
 from app.utils.runtime_config import get_service_enabled
 
 logger = logging.getLogger(__name__)
@@ -63,13 +64,14 @@ class WeatherService:
                 last_updated=datetime.now(),
             )
 
+        settings = get_settings()
+
         if use_cache:
-            cached = await cache_service.get(CACHE_KEY)
+            # Collected every weather_poll_interval, which outlives the cache TTL
+            cached = await cache_service.get_within(CACHE_KEY, settings.weather_poll_interval)
             if cached:
                 return cached
 
-        settings = get_settings()
-
         if settings.weather_latitude == 0.0 and settings.weather_longitude == 0.0:
             return WeatherStatus(
                 status=StatusLevel.UNKNOWN,
@@ -77,8 +79,12 @@ class WeatherService:
                 last_updated=datetime.now(),
             )
 
+        breaker = get_breaker("weather")
+        if not breaker.allow_request():
+            return await serve_last_known(CACHE_KEY, WeatherStatus, breaker)
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with get_upstream("weather").client() as client:
                 params = {
                     "latitude": settings.weather_latitude,
                     "longitude": settings.weather_longitude,
@@ -127,16 +133,16 @@ class WeatherService:
                     last_updated=datetime.now(),
                 )
 
+                breaker.record_success()
                 await cache_service.set(CACHE_KEY, result)
                 return result
 
         except Exception as e:
             logger.error(f"Weather error: {e}")
-            return WeatherStatus(
-                status=StatusLevel.ERROR,
-                error_message=str(e),
-                last_updated=datetime.now(),
-            )
+            breaker.record_failure(str(e))
+            return await serve_last_known(CACHE_KEY, WeatherStatus, breaker)
+        finally:
+            breaker.release()
 
 
 weather_service = WeatherService()
@@ -0,0 +1,27 @@
+"""
+API-key checks for endpoints that must not be open to the dashboard's network.
+"""
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.config import get_settings
+
+
+def check_api_key(expected: str, provided: Optional[str], setting: str) -> None:
+    """Raise unless provided matches expected; an unset key disables the endpoint."""
+    if not expected:
+        raise HTTPException(status_code=403, detail=f"Set {setting.upper()} to enable this endpoint")
+    if not provided or not secrets.compare_digest(provided.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+
+
+async def require_internal_key(x_api_key: Optional[str] = Header(default=None)) -> None:
+    """Dependency for /api/internal endpoints that expose code or memory details."""
+    check_api_key(get_settings().internal_api_key, x_api_key, "internal_api_key")
+
+
+async def require_ingest_key(x_api_key: Optional[str] = Header(default=None)) -> None:
+    """Dependency for /api/ingest, where agents push their reports."""
+    check_api_key(get_settings().ingest_api_key, x_api_key, "ingest_api_key")
@@ -0,0 +1,128 @@
+"""
+In-memory store for configuration files.
+
+runtime_config.json and .env are parsed once and served from memory instead of
+being re-read on every call. Changes made outside the app are picked up by
+comparing the file's mtime/size, checked at most every CHECK_INTERVAL
+seconds; saves made through the app update the store directly. Subscribers
+are notified with the keys whose values changed.
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between stat() calls used to detect external edits
+CHECK_INTERVAL = 2.0
+
+Subscriber = Callable[[str, Dict[str, Any]], None]
+
+
+class _CachedFile:
+    def __init__(self, path: Path, loader: Callable[[Path], Dict[str, Any]]):
+        self.path = path
+        self.loader = loader
+        self.data: Optional[Dict[str, Any]] = None
+        self.signature: Optional[Tuple[int, int]] = None
+        self.checked_at = 0.0
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Keys whose value changed (removed keys map to None)."""
+    changed = {k: v for k, v in new.items() if old.get(k) != v}
+    changed.update({k: None for k in old if k not in new})
+    return changed
+
+
+class ConfigStore:
+    def __init__(self):
+        self._files: Dict[str, _CachedFile] = {}
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: Path, loader: Callable[[Path], Dict[str, Any]]) -> None:
+        """Register a config file under a name with a function that parses it."""
+        with self._lock:
+            self._files[name] = _CachedFile(path, loader)
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """Call callback(name, changed_keys) whenever a registered file changes."""
+        self._subscribers.append(callback)
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Return a copy of the parsed file, reloading it if it changed on disk."""
+        with self._lock:
+            entry = self._files[name]
+            now = time.monotonic()
+            changed = None
+            if entry.data is None or now - entry.checked_at >= CHECK_INTERVAL:
+                entry.checked_at = now
+                signature = _signature(entry.path)
+                if entry.data is None or signature != entry.signature:
+                    changed = self._reload(entry, signature)
+            data = dict(entry.data)
+
+        if changed:
+            self._notify(name, changed)
+        return data
+
+    def update(self, name: str, data: Dict[str, Any]) -> None:
+        """Record data the app just wrote to the file."""
+        with self._lock:
+            entry = self._files[name]
+            old = entry.data or {}
+            entry.data = dict(data)
+            entry.signature = _signature(entry.path)
+            entry.checked_at = time.monotonic()
+            changed = _diff(old, entry.data)
+
+        if changed:
+            self._notify(name, changed)
+
+    def invalidate(self, name: str) -> None:
+        """Re-read the file now (e.g. after the app rewrote it)."""
+        with self._lock:
+            entry = self._files[name]
+            entry.checked_at = time.monotonic()
+            changed = self._reload(entry, _signature(entry.path), report_first_load=True)
+
+        if changed:
+            self._notify(name, changed)
+
+    def _reload(
+        self,
+        entry: _CachedFile,
+        signature: Optional[Tuple[int, int]],
+        report_first_load: bool = False,
+    ) -> Dict[str, Any]:
+        first_load = entry.data is None
+        old = entry.data or {}
+        entry.data = entry.loader(entry.path)
+        entry.signature = signature
+        if first_load and not report_first_load:
+            return {}
+        return _diff(old, entry.data)
+
+    def _notify(self, name: str, changed: Dict[str, Any]) -> None:
+        logger.info(f"Config '{name}' changed: {sorted(changed)}")
+        for callback in self._subscribers:
+            try:
+                callback(name, changed)
+            except Exception as e:
+                logger.error(f"Config subscriber failed: {e}")
+
+
+# Singleton instance
+config_store = ConfigStore()
@@ -1,6 +1,7 @@
 """
 Environment file management utilities.
 Provides safe read/write operations for .env files with backup support.
+Parsed values are cached in memory by config_store.
 """
 import os
 import shutil
@@ -9,11 +10,15 @@ from pathlib import Path
 from typing import Dict, Optional
 import logging
 
+from app.utils.config_store import config_store
+
 logger = logging.getLogger(__name__)
 
 # Path to .env file
 # In Docker: /app/config/.env (persistent volume), in development: project root
 def _get_env_path() -> Path:
+    if os.environ.get("CONFIG_DIR"):
+        return Path(os.environ["CONFIG_DIR"]) / ".env"
     # Check if we're in Docker - use config volume for persistence
     docker_config_env = Path("/app/config/.env")
     if docker_config_env.parent.exists() and docker_config_env.parent.is_dir():
@@ -24,18 +29,18 @@ def _get_env_path() -> Path:
 ENV_FILE_PATH = _get_env_path()
 
 
-def read_env() -> Dict[str, str]:
+def _parse_env(path: Path) -> Dict[str, str]:
     """
     Parse .env file and return key-value pairs.
     Preserves empty values and handles quoted strings.
     """
     env_vars: Dict[str, str] = {}
 
-    if not ENV_FILE_PATH.exists():
+    if not path.exists():
         return env_vars
 
     try:
-        with open(ENV_FILE_PATH, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             for line in f:
                 line = line.strip()
                 # Skip empty lines and comments
@@ -60,6 +65,14 @@ def read_env() -> Dict[str, str]:
     return env_vars
 
 
+config_store.register("env", ENV_FILE_PATH, _parse_env)
+
+
+def read_env() -> Dict[str, str]:
+    """Return .env key-value pairs (served from memory)."""
+    return config_store.get("env")
+
+
 def backup_env() -> Optional[str]:
     """
     Create a timestamped backup of the .env file.
@@ -153,6 +166,7 @@ def write_env(updates: Dict[str, str]) -> bool:
         # Atomic rename
         os.replace(temp_path, ENV_FILE_PATH)
         logger.info(f"Successfully updated .env with {len(updates)} changes")
+        config_store.invalidate("env")
         return True
 
     except Exception as e:
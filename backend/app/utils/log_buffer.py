@@ -16,7 +16,7 @@ class LogBuffer(logging.Handler):
     def emit(self, record):
         try:
             timestamp = datetime.now(timezone.utc).isoformat()
-            details = None
+            details = getattr(record, "details", None)
             if record.exc_info:
                 details = "".join(traceback.format_exception(*record.exc_info)).strip()
             entry = {
@@ -1,16 +1,20 @@
 """
 Runtime configuration manager for service enabled/disabled flags.
 Stores configuration in a JSON file that can be updated without container restart.
+The file is cached in memory by config_store and re-read only when it changes.
 """
 import json
 import logging
+import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from app.utils.config_store import config_store
+
 logger = logging.getLogger(__name__)
 
-# Path to runtime config file (in mounted volume)
-RUNTIME_CONFIG_PATH = Path("/app/config/runtime_config.json")
+# Path to runtime config file (in mounted volume, or $CONFIG_DIR)
+RUNTIME_CONFIG_PATH = Path(os.environ.get("CONFIG_DIR", "/app/config")) / "runtime_config.json"
 
 # Default values for all enabled flags
 DEFAULT_CONFIG = {
@@ -25,17 +29,17 @@ DEFAULT_CONFIG = {
 }
 
 
-def get_runtime_config() -> Dict[str, Any]:
+def _load_runtime_config(path: Path) -> Dict[str, Any]:
     """
     Read runtime configuration from JSON file.
     Returns default config if file doesn't exist or is invalid.
     """
-    if not RUNTIME_CONFIG_PATH.exists():
+    if not path.exists():
         logger.debug("Runtime config file not found, using defaults")
         return DEFAULT_CONFIG.copy()
 
     try:
-        with open(RUNTIME_CONFIG_PATH, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             config = json.load(f)
             # Merge with defaults to ensure all keys exist
             result = DEFAULT_CONFIG.copy()
@@ -46,6 +50,17 @@ def get_runtime_config() -> Dict[str, Any]:
         return DEFAULT_CONFIG.copy()
 
 
+config_store.register("runtime", RUNTIME_CONFIG_PATH, _load_runtime_config)
+
+
+def get_runtime_config() -> Dict[str, Any]:
+    """
+    Get runtime configuration (served from memory).
+    Returns default config if file doesn't exist or is invalid.
+    """
+    return config_store.get("runtime")
+
+
 def save_runtime_config(config: Dict[str, Any]) -> bool:
     """
     Save runtime configuration to JSON file.
@@ -72,6 +87,9 @@ def save_runtime_config(config: Dict[str, Any]) -> bool:
         with open(RUNTIME_CONFIG_PATH, "w", encoding="utf-8") as f:
             json.dump(filtered_config, f, indent=2)
         logger.info(f"Saved runtime config: {filtered_config}")
+        result = DEFAULT_CONFIG.copy()
+        result.update(filtered_config)
+        config_store.update("runtime", result)
         return True
     except Exception as e:
         logger.error(f"Failed to save runtime config: {e}")
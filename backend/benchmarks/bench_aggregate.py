@@ -0,0 +1,70 @@
+"""
+Benchmark the aggregate query engine over many series.
+
+    cd backend && python -m benchmarks.bench_aggregate [--series 2000] [--points 2880]
+
+Fills the in-memory history with synthetic series and times each
+aggregation over the whole range.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.aggregate import aggregate
+from app.services.history import history_store
+
+
+def populate(series: int, points: int, interval: float = 30.0) -> float:
+    start = time.time() - points * interval
+    hosts = max(series // 50, 1)
+    for i in range(series):
+        labels = {"guest": f"guest-{i}", "node": f"node-{i % hosts}"}
+        base = random.uniform(5, 60)
+        samples = [("bench_cpu_percent", labels, 0.0)]
+        for p in range(points):
+            samples[0] = ("bench_cpu_percent", labels, base + random.gauss(0, 5))
+            history_store.record(samples, timestamp=start + p * interval)
+    return start
+
+
+def timed(label: str, fn, repeat: int) -> None:
+    durations = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        durations.append((time.perf_counter() - t) * 1000)
+    print(
+        f"{label:<32} median {statistics.median(durations):7.1f} ms  "
+        f"max {max(durations):7.1f} ms  groups {len(result)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--series", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=2880)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    since = populate(args.series, args.points)
+    print(
+        f"{args.series} series x {args.points} points loaded in "
+        f"{time.perf_counter() - t:.1f}s ({history_store.memory_usage() / 1e6:.1f} MB)"
+    )
+
+    cases = [
+        ("avg per guest", dict(agg="avg")),
+        ("p95 per guest", dict(agg="p95")),
+        ("max per node", dict(agg="max", group_by=["node"])),
+        ("p99 per node", dict(agg="p99", group_by=["node"])),
+        ("last per guest", dict(agg="last")),
+        ("time above 45 per guest", dict(agg="time_above", threshold=45.0)),
+    ]
+    for label, kwargs in cases:
+        timed(label, lambda: aggregate("bench_cpu_percent", since, **kwargs), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
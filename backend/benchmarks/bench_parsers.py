@@ -0,0 +1,294 @@
+"""
+Benchmark the parse/transform paths that turn upstream payloads into models.
+
+    cd backend && python -m benchmarks.bench_parsers [--scales 10,100,1000,10000]
+                                                     [--only unraid] [--save]
+
+Runs offline on synthetic payloads shaped like each upstream's API response,
+at several fleet sizes. Each case is timed like timeit: --repeat rounds of
+enough calls to last --min-time each, with GC off. Every round is followed by a
+round of a fixed reference workload, and the case's cost is the median ratio
+of the two, so drift in machine speed during a run cancels out. "noise" is half
+the interquartile range of those ratios. Also reports ops/sec (best round),
+the peak memory traced during one call and the memory blocks its result keeps
+alive.
+
+benchmarks/baseline_parsers.json holds each case's cost in reference calls.
+Repeated runs stay within about 20% of it, so a case more than --tolerance
+(default 25%) costlier, or twice its noise if that is larger, is a regression
+and makes the run exit non-zero. --save rewrites the baseline.
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Tuple
+
+from app.services.calendar import _parse_event
+from app.services.docker_service import _parse_container
+from app.services.proxmox import _parse_guest
+from app.services.unifi import _parse_clients, _parse_devices
+from app.services.unraid import unraid_service
+
+BASELINE_PATH = Path(__file__).parent / "baseline_parsers.json"
+
+
+def _mac(i: int) -> str:
+    return ":".join(f"{(i >> shift) & 0xFF:02x}" for shift in (40, 32, 24, 16, 8, 0))
+
+
+def unraid_array_payload(n: int) -> dict:
+    return {
+        "array": {
+            "state": "STARTED",
+            "capacity": {"kilobytes": {"total": str(n * 8_000_000_000), "used": str(n * 5_000_000_000), "free": str(n * 3_000_000_000)}},
+            "parities": [
+                {"name": "parity", "status": "DISK_OK", "numErrors": "0"},
+                {"name": "parity2", "status": "DISK_OK", "numErrors": 0},
+            ],
+        },
+        "disks": [
+            {
+                "name": f"disk{i}",
+                "device": f"sd{chr(97 + i % 26)}{i // 26 or ''}",
+                "size": 8_000_000_000,
+                "status": None,
+                "color": "green-on",
+                "temp": random.randint(28, 45),
+                "smartStatus": "PASSED",
+                "numErrors": str(random.choice([0, 0, 0, 1])),
+            }
+            for i in range(n)
+        ],
+    }
+
+
+def unraid_docker_payload(n: int) -> dict:
+    return {
+        "docker": {
+            "containers": [
+                {
+                    "names": [f"/app-{i}"],
+                    "image": f"lscr.io/linuxserver/app{i % 40}:latest",
+                    "state": "RUNNING" if i % 7 else "EXITED",
+                    "status": "Up 3 days",
+                }
+                for i in range(n)
+            ]
+        }
+    }
+
+
+def unraid_system_payload(n: int) -> dict:
+    return {
+        "vars": {"version": "7.2.0", "uptime": "123456"},
+        "info": {
+            "os": {"uptime": "123456"},
+            "cpu": {"temperature": "47.5"},
+            "memory": {"total": str(64 * 2**30), "used": str(21 * 2**30)},
+        },
+    }
+
+
+def docker_payload(n: int) -> list:
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    containers = []
+    for i in range(n):
+        ports = {
+            f"{8000 + i % 1000}/tcp": [{"HostIp": "0.0.0.0", "HostPort": str(10000 + i)}, {"HostIp": "::", "HostPort": str(10000 + i)}],
+            "443/tcp": None,
+        }
+        containers.append(SimpleNamespace(
+            short_id=f"{i:012x}"[:10],
+            name=f"container-{i}",
+            status="running" if i % 5 else "exited",
+            image=SimpleNamespace(tags=[f"image{i % 50}:latest"] if i % 9 else [], short_id=f"sha256:{i:08x}"),
+            attrs={
+                "Created": (created + timedelta(minutes=i)).isoformat().replace("+00:00", "Z"),
+                "State": {"Status": "running" if i % 5 else "exited"},
+                "NetworkSettings": {"Ports": ports},
+            },
+        ))
+    return containers
+
+
+def proxmox_payload(n: int) -> List[Tuple[dict, dict]]:
+    return [
+        (
+            {"vmid": 100 + i, "name": f"guest-{i}", "status": "running" if i % 6 else "stopped"},
+            {
+                "cpu": random.random(),
+                "mem": random.randint(2**28, 2**32),
+                "maxmem": 2**32,
+                "disk": random.randint(2**30, 2**34),
+                "maxdisk": 2**35,
+                "uptime": random.randint(0, 10**7),
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def unifi_devices_payload(n: int) -> list:
+    return [
+        {
+            "name": f"ap-{i}",
+            "mac": _mac(i),
+            "model": random.choice(["U6LR", "U6P", "USW24P", "UDMPRO"]),
+            "ip": f"10.0.{i // 250}.{i % 250 + 2}",
+            "state": 1 if i % 13 else 0,
+            "uptime": random.randint(0, 10**7),
+            "type": random.choice(["uap", "usw", "udm"]),
+        }
+        for i in range(n)
+    ]
+
+
+def unifi_clients_payload(n: int) -> list:
+    return [
+        {
+            "hostname": f"host-{i}" if i % 4 else None,
+            "name": f"client-{i}",
+            "mac": _mac(1 << 32 | i),
+            "ip": f"10.1.{i // 250}.{i % 250 + 2}",
+            "network": random.choice(["LAN", "IoT", "Guest"]),
+            "is_wired": i % 3 == 0,
+        }
+        for i in range(n)
+    ]
+
+
+def calendar_payload(n: int) -> list:
+    start = datetime(2025, 1, 6, 9, 0, tzinfo=timezone(timedelta(hours=-5)))
+    events = []
+    for i in range(n):
+        if i % 10 == 0:
+            day = (start + timedelta(days=i)).date()
+            span = {"start": {"date": day.isoformat()}, "end": {"date": (day + timedelta(days=1)).isoformat()}}
+        else:
+            begin = start + timedelta(hours=i)
+            span = {"start": {"dateTime": begin.isoformat()}, "end": {"dateTime": (begin + timedelta(minutes=45)).isoformat()}}
+        events.append({"id": f"evt{i}", "summary": f"Event {i}", "location": "Room 1" if i % 2 else None, **span})
+    return events
+
+
+# name -> (payload builder, parse call, whether it depends on the scale)
+CASES: Dict[str, Tuple[Callable, Callable, bool]] = {
+    "unraid_array": (unraid_array_payload, unraid_service._parse_array_data, True),
+    "unraid_docker": (unraid_docker_payload, unraid_service._parse_docker_data, True),
+    "unraid_system": (unraid_system_payload, unraid_service._parse_system_data, False),
+    "docker_containers": (docker_payload, lambda cs: [_parse_container(c) for c in cs], True),
+    "proxmox_guests": (proxmox_payload, lambda gs: [_parse_guest(item, "lxc", detail) for item, detail in gs], True),
+    "unifi_devices": (unifi_devices_payload, _parse_devices, True),
+    "unifi_clients": (unifi_clients_payload, _parse_clients, True),
+    "calendar_events": (calendar_payload, lambda es: [_parse_event(e, "Primary") for e in es], True),
+}
+
+
+def reference() -> list:
+    """Fixed pure-Python workload the cases are timed against."""
+    items = [{"id": i, "name": f"item-{i}", "value": str(i * 7)} for i in range(200)]
+    return sorted((item["name"], int(item["value"])) for item in items)
+
+
+def calibrate(min_time: float) -> Tuple[timeit.Timer, int]:
+    """A timer for reference() and the calls needed to last min_time."""
+    timer = timeit.Timer(reference)
+    number, elapsed = timer.autorange()
+    return timer, max(int(number * min_time / elapsed), number)
+
+
+def measure(parse: Callable, payload, reference_timer: Tuple[timeit.Timer, int], min_time: float, repeat: int) -> Dict[str, float]:
+    # Calls per round: enough for min_time, so fast cases are not timed on a
+    # handful of calls (timeit.autorange, with a configurable target)
+    timer = timeit.Timer(lambda: parse(payload))
+    number, elapsed = timer.autorange()
+    number = max(int(number * min_time / elapsed), number)
+
+    # CPU speed can change within a run (frequency scaling, thermal limits,
+    # noisy neighbours on shared hosts), so each round is followed by a round
+    # of reference() and the case is scored by the ratio: its cost in
+    # reference() calls. timeit turns GC off for both
+    ref, ref_number = reference_timer
+    per_call, costs = [], []
+    for _ in range(repeat):
+        seconds = timer.timeit(number) / number
+        per_call.append(seconds)
+        costs.append(seconds / (ref.timeit(ref_number) / ref_number))
+    costs.sort()
+    cost = costs[len(costs) // 2]
+    # Half the interquartile range of the costs, relative to the median
+    noise = (costs[3 * len(costs) // 4] - costs[len(costs) // 4]) / 2 / cost
+
+    gc.collect()
+    gc.disable()
+    try:
+        blocks_before = sys.getallocatedblocks()
+        tracemalloc.start()
+        result = parse(payload)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        blocks = sys.getallocatedblocks() - blocks_before
+        del result
+    finally:
+        gc.enable()
+
+    return {"ops": 1 / min(per_call), "cost": cost, "noise": noise, "peak_kb": peak / 1024, "blocks": blocks}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="10,100,1000,10000")
+    parser.add_argument("--only", default="", help="run cases whose name starts with this")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per round")
+    parser.add_argument("--repeat", type=int, default=9, help="rounds per case")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    random.seed(1)
+    scales = [int(s) for s in args.scales.split(",")]
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    reference_timer = calibrate(args.min_time)
+    results: Dict[str, float] = {}
+    regressions = []
+
+    print(f"{'case':<28}{'ops/s':>12}{'us/op':>12}{'noise':>8}{'peak KB':>10}{'blocks':>9}  vs baseline")
+    for name, (build, parse, scaled) in CASES.items():
+        if not name.startswith(args.only):
+            continue
+        for n in scales if scaled else [1]:
+            key = f"{name}@{n}"
+            stats = measure(parse, build(n), reference_timer, args.min_time, args.repeat)
+            results[key] = float(f"{stats['cost']:.4g}")
+
+            comparison = ""
+            if key in baseline:
+                ratio = baseline[key] / stats["cost"]
+                comparison = f"{ratio:6.2f}x"
+                # A noisy case gets more slack than the tolerance
+                if ratio < 1 - max(args.tolerance, 2 * stats["noise"]):
+                    comparison += "  REGRESSION"
+                    regressions.append(key)
+            print(
+                f"{key:<28}{stats['ops']:>12.1f}{1e6 / stats['ops']:>12.1f}{stats['noise']:>8.1%}"
+                f"{stats['peak_kb']:>10.1f}{stats['blocks']:>9}  {comparison}"
+            )
+
+    if args.save:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Local stand-ins for the UniFi, Proxmox, Plex and Unraid APIs.
+
+Each fake serves the endpoints its service calls, with payloads built by the
+parser benchmarks at a configurable fleet size, and adds configurable latency
+(with jitter) and a random error rate to every request. Used by the load test:
+
+    cd backend && python -m benchmarks.fake_upstreams --fleet 200 --latency 20
+
+prints the environment variables that point the backend at the fakes and
+serves until interrupted.
+"""
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+from aiohttp import web
+
+from benchmarks.bench_parsers import (
+    proxmox_payload,
+    unifi_clients_payload,
+    unifi_devices_payload,
+    unraid_array_payload,
+    unraid_docker_payload,
+    unraid_system_payload,
+)
+
+NODE = "pve"
+CSRF_TOKEN = "fake-csrf-token"
+
+
+@dataclass
+class FakeConfig:
+    fleet: int = 50  # containers / clients / disks / guests per upstream
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+
+
+def _with_faults(config: FakeConfig, counter: Dict[str, int]):
+    @web.middleware
+    async def middleware(request, handler):
+        counter["requests"] += 1
+        delay = max(random.gauss(config.latency_ms, config.jitter_ms), 0.0) / 1000
+        await asyncio.sleep(delay)
+        if random.random() < config.error_rate:
+            counter["errors"] += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+        return await handler(request)
+
+    return middleware
+
+
+def unifi_app(config: FakeConfig, counter: Dict[str, int]) -> web.Application:
+    devices = unifi_devices_payload(max(config.fleet // 10, 1))
+    clients = unifi_clients_payload(config.fleet)
+    dashboard = [{"wan-tx_bytes": 10**9, "wan-rx_bytes": 4 * 10**9, "latency_avg": 12.0}]
+
+    async def login(request):
+        response = web.json_response({"username": "bench"})
+        response.set_cookie("TOKEN", "fake-session")
+        return response
+
+    async def stat(request):
+        data = {"device": devices, "sta": clients, "dashboard": dashboard}[request.match_info["kind"]]
+        return web.json_response({"meta": {"rc": "ok"}, "data": data})
+
+    app = web.Application(middlewares=[_with_faults(config, counter)])
+    app.router.add_post("/api/auth/login", login)
+    app.router.add_get("/proxy/network/api/s/{site}/stat/{kind}", stat)
+    return app
+
+
+def proxmox_app(config: FakeConfig, counter: Dict[str, int]) -> web.Application:
+    guests = {
+        "lxc": proxmox_payload(config.fleet),
+        "qemu": proxmox_payload(max(config.fleet // 4, 1)),
+    }
+    details = {
+        kind: {str(item["vmid"]): detail for item, detail in entries}
+        for kind, entries in guests.items()
+    }
+
+    async def node_status(request):
+        return web.json_response({"data": {
+            "cpu": random.random(),
+            "memory": {"used": 40 * 2**30, "total": 128 * 2**30},
+            "uptime": 864000,
+        }})
+
+    async def guest_list(request):
+        return web.json_response({"data": [item for item, _ in guests[request.match_info["kind"]]]})
+
+    async def guest_status(request):
+        detail = details[request.match_info["kind"]].get(request.match_info["vmid"])
+        if detail is None:
+            raise web.HTTPNotFound()
+        return web.json_response({"data": detail})
+
+    app = web.Application(middlewares=[_with_faults(config, counter)])
+    app.router.add_get(f"/api2/json/nodes/{NODE}/status", node_status)
+    app.router.add_get(f"/api2/json/nodes/{NODE}/{{kind}}", guest_list)
+    app.router.add_get(f"/api2/json/nodes/{NODE}/{{kind}}/{{vmid}}/status/current", guest_status)
+    return app
+
+
+def plex_app(config: FakeConfig, counter: Dict[str, int]) -> web.Application:
+    now = int(time.time())
+    recent = [
+        {"title": f"Movie {i}", "type": "movie", "addedAt": now - i * 3600, "thumb": f"/library/metadata/{i}/thumb", "year": 2020}
+        for i in range(50)
+    ]
+    sections = [{"key": "1", "type": "movie", "title": "Movies"}, {"key": "2", "type": "show", "title": "TV"}]
+    sessions = [
+        {
+            "type": "episode",
+            "title": f"Episode {i}",
+            "grandparentTitle": "Some Show",
+            "viewOffset": 600_000,
+            "duration": 2_400_000,
+            "User": {"title": f"user{i}"},
+            "Player": {"state": "playing"},
+        }
+        for i in range(min(config.fleet // 10, 20))
+    ]
+
+    def container(body: dict):
+        return web.json_response({"MediaContainer": body})
+
+    async def recently_added(request):
+        return container({"size": len(recent), "Metadata": recent})
+
+    async def library_sections(request):
+        return container({"size": len(sections), "Directory": sections})
+
+    async def section_all(request):
+        return container({"size": 0, "totalSize": config.fleet * 20})
+
+    async def status_sessions(request):
+        return container({"size": len(sessions), "Metadata": sessions})
+
+    app = web.Application(middlewares=[_with_faults(config, counter)])
+    app.router.add_get("/library/recentlyAdded", recently_added)
+    app.router.add_get("/library/sections", library_sections)
+    app.router.add_get("/library/sections/{key}/all", section_all)
+    app.router.add_get("/status/sessions", status_sessions)
+    return app
+
+
+def unraid_app(config: FakeConfig, counter: Dict[str, int]) -> web.Application:
+    array = unraid_array_payload(max(config.fleet // 5, 1))
+    docker = unraid_docker_payload(config.fleet)
+    system = unraid_system_payload(1)
+    vms = {"vms": {"domain": [
+        {"name": f"vm-{i}", "state": "RUNNING" if i % 3 else "SHUTOFF", "coreCount": 4, "ramAllocation": 8 * 2**30}
+        for i in range(max(config.fleet // 10, 1))
+    ]}}
+
+    async def login_page(request):
+        return web.Response(
+            text=f'<form><input type="hidden" name="csrf_token" value="{CSRF_TOKEN}"></form>',
+            content_type="text/html",
+        )
+
+    async def login(request):
+        response = web.Response(text="ok")
+        response.set_cookie("unraid_session", "fake-session")
+        response.set_cookie("csrf_token", CSRF_TOKEN)
+        return response
+
+    async def graphql(request):
+        query = (await request.json()).get("query", "")
+        if "array" in query:
+            data = array
+        elif "docker" in query:
+            data = docker
+        elif "vms" in query:
+            data = vms
+        else:
+            data = system
+        return web.json_response({"data": data})
+
+    app = web.Application(middlewares=[_with_faults(config, counter)])
+    app.router.add_get("/login", login_page)
+    app.router.add_post("/login", login)
+    app.router.add_post("/graphql", graphql)
+    return app
+
+
+APPS = {
+    "unifi": unifi_app,
+    "proxmox": proxmox_app,
+    "plex": plex_app,
+    "unraid": unraid_app,
+}
+
+
+class FakeUpstreams:
+    """Runs every fake on its own local port."""
+
+    def __init__(self, config: FakeConfig, host: str = "127.0.0.1"):
+        self.config = config
+        self.host = host
+        self.ports: Dict[str, int] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self._runners: List[web.AppRunner] = []
+
+    async def start(self) -> None:
+        for name, build in APPS.items():
+            counter = self.counters[name] = {"requests": 0, "errors": 0}
+            runner = web.AppRunner(build(self.config, counter), access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, self.host, 0)
+            await site.start()
+            self.ports[name] = site._server.sockets[0].getsockname()[1]
+            self._runners.append(runner)
+
+    async def stop(self) -> None:
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners.clear()
+
+    def url(self, name: str) -> str:
+        return f"http://{self.host}:{self.ports[name]}"
+
+    def backend_env(self) -> Dict[str, str]:
+        """Environment that points the backend's collectors at the fakes."""
+        return {
+            "UNIFI_HOST": self.url("unifi"),
+            "UNIFI_USERNAME": "bench",
+            "UNIFI_PASSWORD": "bench",
+            "UNIFI_ENABLED": "true",
+            "PROXMOX_HOST": self.url("proxmox"),
+            "PROXMOX_USER": "bench@pve",
+            "PROXMOX_TOKEN_NAME": "bench",
+            "PROXMOX_TOKEN_VALUE": "bench",
+            "PROXMOX_NODE": NODE,
+            "PROXMOX_ENABLED": "true",
+            "PLEX_URL": self.url("plex"),
+            "PLEX_TOKEN": "bench",
+            "PLEX_ENABLED": "true",
+            "UNRAID_HOST": self.url("unraid"),
+            "UNRAID_USERNAME": "bench",
+            "UNRAID_PASSWORD": "bench",
+            "UNRAID_ENABLED": "true",
+            # No stand-ins for these
+            "DOCKER_ENABLED": "false",
+            "CALENDAR_ENABLED": "false",
+            "WEATHER_ENABLED": "false",
+            "NEWS_ENABLED": "false",
+        }
+
+
+def add_fake_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--fleet", type=int, default=50, help="items per upstream (clients, containers, guests)")
+    parser.add_argument("--latency", type=float, default=20.0, help="mean upstream latency in ms")
+    parser.add_argument("--jitter", type=float, default=10.0, help="latency standard deviation in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream requests failing with 500")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def fake_config(args: argparse.Namespace) -> FakeConfig:
+    random.seed(args.seed)
+    return FakeConfig(
+        fleet=args.fleet, latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate
+    )
+
+
+async def serve(config: FakeConfig) -> None:
+    fakes = FakeUpstreams(config)
+    await fakes.start()
+    for key, value in fakes.backend_env().items():
+        print(f"{key}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fakes.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(fake_config(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+End-to-end load test of the real backend against local fake upstreams.
+
+    cd backend && python -m benchmarks.loadtest [--clients 20] [--duration 30]
+        [--fleet 200] [--latency 20] [--error-rate 0.01]
+        [--env CACHE_TTL=5 --env UPSTREAM_HEDGING=true] [--label hedging]
+        [--output results/hedging.json]
+    python -m benchmarks.loadtest --compare results/*.json
+
+Starts the fake UniFi/Proxmox/Plex/Unraid servers (benchmarks.fake_upstreams),
+runs the backend under uvicorn in a subprocess pointed at them, then drives
+concurrent /api/dashboard clients for the given duration. Reports request
+latency percentiles and throughput, poll-cycle time per collector (from
+/api/internal/stats), upstream request counts and the backend's memory.
+
+Backend settings are passed with --env, so caching, concurrency and
+serialization modes can be compared with the same seed and fleet. The backend
+runs with CONFIG_DIR set to a temporary directory, so it starts without a .env,
+runtime config or snapshot and leaves the real ones (and the leader lock and
+ingest spool) untouched; its only settings are the fake upstreams,
+TSDB_ENABLED=false and --env.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.fake_upstreams import FakeUpstreams, add_fake_arguments, fake_config
+
+BACKEND_DIR = Path(__file__).parent.parent
+API_KEY = "loadtest"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    index = math.ceil(p / 100 * len(ordered)) - 1
+    return ordered[min(max(index, 0), len(ordered) - 1)]
+
+
+def _memory(pid: int) -> Dict[str, int]:
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split()[:2]
+                    memory[key.rstrip(":").lower()] = int(value) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+def start_backend(port: int, env: Dict[str, str], log_file) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float) -> float:
+    """Wait for /api/ready; returns seconds until every collector ran once."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited with code {process.returncode}")
+        try:
+            response = await client.get("/api/ready")
+            if response.status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Backend not ready after {timeout}s")
+
+
+async def drive(client: httpx.AsyncClient, clients: int, duration: float) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get("/api/dashboard")
+                response.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(_percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round((latencies[-1] if latencies else 0.0) * 1000, 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    fakes = FakeUpstreams(fake_config(args))
+    await fakes.start()
+
+    port = _free_port()
+    config_dir = tempfile.TemporaryDirectory(prefix="loadtest-config-")
+    env = {
+        "CONFIG_DIR": config_dir.name,
+        **fakes.backend_env(),
+        "TSDB_ENABLED": "false",
+        "INTERNAL_API_KEY": API_KEY,
+        "POLL_INTERVAL": str(args.poll_interval),
+        **dict(item.split("=", 1) for item in args.env),
+    }
+    log_file = open(args.backend_log, "w")
+    process = start_backend(port, env, log_file)
+    limits = httpx.Limits(max_connections=args.clients + 5)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            ready = await wait_ready(client, process, args.ready_timeout)
+            idle_memory = _memory(process.pid)
+            upstream_before = {name: dict(c) for name, c in fakes.counters.items()}
+
+            load = await drive(client, args.clients, args.duration)
+
+            stats = (await client.get("/api/internal/stats")).json()
+            memory = _memory(process.pid)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log_file.close()
+        await fakes.stop()
+        config_dir.cleanup()
+
+    return {
+        "label": args.label,
+        "settings": {
+            "clients": args.clients,
+            "duration": args.duration,
+            "fleet": args.fleet,
+            "latency_ms": args.latency,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "env": args.env,
+        },
+        "ready_seconds": round(ready, 2),
+        "backend_log": str(args.backend_log),
+        "dashboard": load,
+        "poll_cycle": {
+            name: {key: c[key] for key in ("count", "avg", "p95", "max", "errors")}
+            for name, c in stats["collectors"].items()
+        },
+        "upstream_requests": {
+            name: c["requests"] - upstream_before[name]["requests"] for name, c in fakes.counters.items()
+        },
+        "event_loop_lag_p99": stats["event_loop"]["lag"]["p99"],
+        "memory": {"idle": idle_memory, "after_load": memory},
+    }
+
+
+def print_report(result: Dict) -> None:
+    load = result["dashboard"]
+    print(f"\n== {result['label'] or 'run'} ==")
+    print(f"ready after {result['ready_seconds']}s (backend log: {result['backend_log']})")
+    print(
+        f"/api/dashboard: {load['requests']} requests, {load['errors']} errors, "
+        f"{load['throughput']} req/s, p50 {load['p50_ms']} ms, p90 {load['p90_ms']} ms, "
+        f"p99 {load['p99_ms']} ms, max {load['max_ms']} ms"
+    )
+    print("poll cycle (s):")
+    for name, c in result["poll_cycle"].items():
+        print(f"  {name:<10} n={c['count']:<4} avg {c['avg']:.3f}  p95 {c['p95']:.3f}  max {c['max']:.3f}  errors {c['errors']}")
+    print(f"upstream requests during load: {result['upstream_requests']}")
+    print(f"event loop lag p99: {result['event_loop_lag_p99'] * 1000:.1f} ms")
+    rss = result["memory"]["after_load"]
+    if rss:
+        print(f"memory: rss {rss.get('vmrss', 0) / 2**20:.1f} MB, peak {rss.get('vmhwm', 0) / 2**20:.1f} MB")
+
+
+def compare(paths: List[Path]) -> None:
+    results = [json.loads(p.read_text()) for p in paths]
+    rows = [
+        ("throughput (req/s)", lambda r: r["dashboard"]["throughput"]),
+        ("p50 (ms)", lambda r: r["dashboard"]["p50_ms"]),
+        ("p99 (ms)", lambda r: r["dashboard"]["p99_ms"]),
+        ("errors", lambda r: r["dashboard"]["errors"]),
+        ("poll avg, slowest (s)", lambda r: max((c["avg"] for c in r["poll_cycle"].values()), default=0)),
+        ("upstream requests", lambda r: sum(r["upstream_requests"].values())),
+        ("loop lag p99 (ms)", lambda r: round(r["event_loop_lag_p99"] * 1000, 1)),
+        ("rss (MB)", lambda r: round(r["memory"]["after_load"].get("vmrss", 0) / 2**20, 1)),
+    ]
+    labels = [r["label"] or p.stem for r, p in zip(results, paths)]
+    width = max(max(len(label) for label in labels), 10) + 2
+    print(f"{'':<24}" + "".join(f"{label:>{width}}" for label in labels))
+    for title, value in rows:
+        print(f"{title:<24}" + "".join(f"{value(r):>{width}}" for r in results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_fake_arguments(parser)
+    parser.add_argument("--clients", type=int, default=20, help="concurrent dashboard clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--poll-interval", type=int, default=10)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--env", action="append", default=[], help="backend setting, KEY=VALUE (repeatable)")
+    parser.add_argument("--backend-log", type=Path, default=Path(tempfile.gettempdir()) / "loadtest-backend.log")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--compare", type=Path, nargs="+", help="compare saved results instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
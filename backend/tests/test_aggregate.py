@@ -0,0 +1,118 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+import app.services.aggregate as aggregate_module
+from app.config import get_settings
+from app.services.aggregate import aggregate
+from app.services.history import HistoryStore
+
+AGGREGATIONS = ["avg", "min", "max", "count", "last", "p50", "p95", "p99.9", "time_above"]
+CAPACITY = 60
+THRESHOLD = 50.0
+
+
+@pytest.fixture
+def store(monkeypatch):
+    # Small ring buffers, so longer series wrap around
+    monkeypatch.setenv("HISTORY_POINTS", str(CAPACITY))
+    get_settings.cache_clear()
+    store = HistoryStore()
+    monkeypatch.setattr(aggregate_module, "history_store", store)
+    yield store
+    get_settings.cache_clear()
+
+
+def _fill(store, lengths, seed=1):
+    """Record series of the given lengths; returns {labels: [(t, v), ...]} as stored."""
+    rng = random.Random(seed)
+    kept = {}
+    for i, length in enumerate(lengths):
+        labels = {"guest": f"g{i}", "node": f"n{i % 3}"}
+        start = 1000.0 + rng.uniform(0, 100)
+        samples = []
+        for p in range(length):
+            timestamp = start + p * 30 + rng.uniform(0, 5)
+            value = rng.uniform(0, 100)
+            store.record([("cpu", labels, value)], timestamp)
+            samples.append((timestamp, float(np.float32(value))))
+        kept[tuple(sorted(labels.items()))] = samples[-CAPACITY:]
+    return kept
+
+
+def _reference(kept, since, agg, group_by):
+    groups = {}
+    for key, samples in kept.items():
+        labels = dict(key)
+        group = tuple(labels[label] for label in group_by) if group_by else key
+        window = [(t, v) for t, v in samples if t >= since]
+        if window:
+            groups.setdefault(group, []).append(window)
+
+    result = {}
+    for group, series in groups.items():
+        values = [v for window in series for _, v in window]
+        if agg == "avg":
+            value = sum(values) / len(values)
+        elif agg == "min":
+            value = min(values)
+        elif agg == "max":
+            value = max(values)
+        elif agg == "count":
+            value = len(values)
+        elif agg == "last":
+            value = max((window[-1] for window in series), key=lambda sample: sample[0])[1]
+        elif agg == "time_above":
+            value = sum(
+                t2 - t1
+                for window in series
+                for (t1, v), (t2, _) in zip(window, window[1:])
+                if v > THRESHOLD
+            )
+        else:
+            ordered = sorted(values)
+            pos = float(agg[1:]) / 100 * (len(ordered) - 1)
+            lo, hi = math.floor(pos), math.ceil(pos)
+            value = ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+        result[group] = (round(value, 3), len(series), len(values))
+    return result
+
+
+def _check(kept, since, agg, group_by=None):
+    rows = aggregate("cpu", since, agg, group_by, THRESHOLD if agg == "time_above" else None)
+    got = {
+        tuple(r["labels"][label] for label in group_by) if group_by else tuple(sorted(r["labels"].items())):
+        (r["value"], r["series"], r["samples"])
+        for r in rows
+    }
+    expected = _reference(kept, since, agg, group_by)
+    assert got.keys() == expected.keys()
+    for group, (value, series, samples) in expected.items():
+        assert got[group][1:] == (series, samples)
+        assert got[group][0] == pytest.approx(value, abs=1e-3, rel=1e-5), (agg, group)
+
+
+@pytest.mark.parametrize("agg", AGGREGATIONS)
+def test_even_series_match_the_reference(store, agg):
+    # Similar lengths: one padded row per group
+    kept = _fill(store, [40, 45, 50, 55, 58, 60, 70, 90, 35])
+    _check(kept, 0, agg)
+    _check(kept, 0, agg, ["node"])
+    _check(kept, 1600, agg, ["node"])
+
+
+@pytest.mark.parametrize("agg", AGGREGATIONS)
+def test_uneven_series_match_the_reference(store, agg):
+    # One long series and many short ones: too much padding for rows
+    kept = _fill(store, [200] + [2] * 30, seed=2)
+    _check(kept, 0, agg)
+    _check(kept, 0, agg, ["node"])
+    _check(kept, 1200, agg)
+
+
+def test_unknown_metric_or_empty_window(store):
+    _fill(store, [10])
+    assert aggregate("missing", 0, "avg") == []
+    assert aggregate("cpu", 10**9, "avg") == []
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import app.services.circuit_breaker as breaker_module
+from app.config import get_settings
+from app.models.schemas import PlexStatus, StatusLevel
+from app.services.cache import CacheService
+from app.services.circuit_breaker import BreakerState, CircuitBreaker, serve_last_known
+
+
+def _open(breaker):
+    for _ in range(get_settings().circuit_failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure("connection refused")
+
+
+def _wait_out(breaker):
+    breaker._opened_at -= get_settings().circuit_reset_timeout
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("opens")
+    threshold = get_settings().circuit_failure_threshold
+    for _ in range(threshold - 1):
+        breaker.record_failure("timeout")
+    breaker.record_success()
+    assert breaker.failures == 0
+
+    _open(breaker)
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow_request()
+    assert 0 < breaker.retry_in() <= get_settings().circuit_reset_timeout
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("probe")
+    _open(breaker)
+    _wait_out(breaker)
+
+    async def run():
+        assert breaker.allow_request()
+        assert breaker.state == BreakerState.HALF_OPEN
+        assert not breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == BreakerState.CLOSED
+        assert breaker.allow_request()
+
+    asyncio.run(run())
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("reopen")
+    _open(breaker)
+    _wait_out(breaker)
+
+    async def run():
+        assert breaker.allow_request()
+        breaker.record_failure("still down")
+        assert breaker.state == BreakerState.OPEN
+        assert not breaker.allow_request()
+        assert breaker.last_error == "still down"
+
+    asyncio.run(run())
+
+
+def test_cancelled_probe_is_released_by_its_owner_only():
+    breaker = CircuitBreaker("cancel")
+    _open(breaker)
+    _wait_out(breaker)
+
+    async def probe(started):
+        try:
+            assert breaker.allow_request()
+            started.set()
+            await asyncio.sleep(10)
+        finally:
+            breaker.release()
+
+    async def run():
+        started = asyncio.Event()
+        task = asyncio.create_task(probe(started))
+        await started.wait()
+        # Other tasks can neither probe nor end the running probe
+        assert not breaker.allow_request()
+        breaker.release()
+        assert not breaker.allow_request()
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert breaker.state == BreakerState.HALF_OPEN
+        assert breaker.allow_request()
+
+    asyncio.run(run())
+
+
+def test_serve_last_known_marks_data_stale(monkeypatch):
+    cache = CacheService()
+    monkeypatch.setattr(breaker_module, "cache_service", cache)
+    breaker = CircuitBreaker("stale")
+    _open(breaker)
+
+    async def run():
+        missing = await serve_last_known("plex_status", PlexStatus, breaker)
+        await cache.restore({
+            "plex_status": (
+                PlexStatus(status=StatusLevel.HEALTHY, last_updated=datetime.now()),
+                datetime.now() - timedelta(seconds=90),
+            )
+        })
+        return missing, await serve_last_known("plex_status", PlexStatus, breaker)
+
+    missing, stale = asyncio.run(run())
+    assert missing.status == StatusLevel.ERROR and not missing.stale
+    assert stale.stale and stale.status == StatusLevel.ERROR
+    assert stale.stale_seconds >= 90
+    assert stale.error_message.startswith("connection refused (retrying in")
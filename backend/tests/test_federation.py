@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+
+import app.routers.dashboard as dashboard_module
+import app.services.federation as federation_module
+from app.config import get_settings
+from app.models.schemas import DashboardStatus, StatusLevel
+from app.services.cache import CacheService
+from app.services.federation import FederationService
+from app.services.job_registry import job_registry
+
+ETAG = 'W/"abc123"'
+
+
+def _dashboard() -> dict:
+    now = datetime.now()
+    services = {
+        name: {"status": "healthy", "last_updated": now.isoformat()}
+        for name in DashboardStatus.model_fields
+        if name != "last_updated"
+    }
+    return {**services, "last_updated": now.isoformat()}
+
+
+class _Peer:
+    """Fake peer dashboard; `down` makes it refuse connections."""
+
+    def __init__(self):
+        self.down = False
+        self.seen = []
+
+    def handler(self, request):
+        self.seen.append(request.headers.get("if-none-match"))
+        if self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.headers.get("if-none-match") == ETAG:
+            return httpx.Response(304, headers={"ETag": ETAG})
+        return httpx.Response(200, json=_dashboard(), headers={"ETag": ETAG})
+
+
+class _Upstream:
+    def __init__(self, peer):
+        self.peer = peer
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.peer.handler))
+
+
+@pytest.fixture
+def peer(monkeypatch):
+    monkeypatch.setenv("FEDERATION_PEERS", "lab=http://lab.test")
+    get_settings.cache_clear()
+    peer = _Peer()
+    monkeypatch.setattr(federation_module, "get_upstream", lambda name, default_timeout: _Upstream(peer))
+    monkeypatch.setattr(federation_module, "cache_service", CacheService())
+    yield peer
+    get_settings.cache_clear()
+
+
+def test_unchanged_peer_answers_304_and_keeps_its_dashboard(peer):
+    service = FederationService()
+
+    async def run():
+        first = await service.get_status(use_cache=False)
+        second = await service.get_status(use_cache=False)
+        return first.peers[0], second.peers[0]
+
+    first, second = asyncio.run(run())
+    assert peer.seen == [None, ETAG]
+    assert first.status == StatusLevel.HEALTHY and first.dashboard is not None
+    assert second.reachable and not second.stale
+    assert second.dashboard == first.dashboard
+    assert second.last_success >= first.last_success
+
+
+def test_failed_peer_keeps_its_last_dashboard_marked_stale(peer):
+    service = FederationService()
+
+    async def run():
+        await service.get_status(use_cache=False)
+        peer.down = True
+        failed = await service.get_status(use_cache=False)
+        peer.down = False
+        recovered = await service.get_status(use_cache=False)
+        return failed, recovered
+
+    failed, recovered = asyncio.run(run())
+    site = failed.peers[0]
+    assert failed.status == StatusLevel.ERROR and failed.peers_reachable == 0
+    assert not site.reachable and site.stale and site.stale_seconds is not None
+    assert site.dashboard is not None and "connection refused" in site.error_message
+    # The peer's ETag still matches, so it answers 304 and the site is fresh again
+    assert peer.seen[-1] == ETAG
+    assert recovered.peers[0].reachable and not recovered.peers[0].stale
+
+
+def test_peer_down_from_the_start_has_no_dashboard(peer):
+    peer.down = True
+    result = asyncio.run(FederationService().get_status(use_cache=False))
+    site = result.peers[0]
+    assert site.status == StatusLevel.ERROR and not site.reachable
+    assert site.dashboard is None and not site.stale
+
+
+def test_dashboard_etag_follows_freshness_and_warmth(monkeypatch):
+    cache = CacheService()
+    monkeypatch.setattr(dashboard_module, "cache_service", cache)
+    monkeypatch.setattr(job_registry, "_last_collected", {})
+
+    async def run():
+        etags = [await dashboard_module._dashboard_etag()]
+        job_registry.mark_collected("plex", datetime.now())
+        etags.append(await dashboard_module._dashboard_etag())
+        await cache.set("plex_status", DashboardStatus.model_validate(_dashboard()).plex)
+        etags.append(await dashboard_module._dashboard_etag())
+        assert await dashboard_module._dashboard_etag() == etags[-1]
+        # Expired: served from last-known, marked stale
+        cache._cache.expire(cache._cache.timer() + cache._cache.ttl + 1)
+        etags.append(await dashboard_module._dashboard_etag())
+        return etags
+
+    etags = asyncio.run(run())
+    assert len(set(etags)) == len(etags)
@@ -0,0 +1,270 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from app.services.ics_calendar import (
+    IcsCalendarService,
+    IcsStreamParser,
+    _iter_rule_dates,
+    build_events,
+)
+
+UTC = timezone.utc
+WINDOW_START = datetime(2026, 3, 2, tzinfo=UTC)  # a Monday
+WINDOW_END = WINDOW_START + timedelta(days=8)
+
+
+def _calendar(*events: str) -> str:
+    body = "".join(f"BEGIN:VEVENT\r\n{event.strip()}\r\nEND:VEVENT\r\n" for event in events)
+    return f"BEGIN:VCALENDAR\r\nX-WR-CALNAME:Family\r\n{body}END:VCALENDAR\r\n"
+
+
+def _events(text: str, start=WINDOW_START, end=WINDOW_END):
+    parser = IcsStreamParser(start, end)
+    parser.feed_text(text)
+    return build_events(parser.close(), parser.calendar_name, start, end)
+
+
+def _starts(events):
+    return [event.start for event in events]
+
+
+def test_weekly_rule_with_byday():
+    events = _events(_calendar("""
+UID:standup
+SUMMARY:Standup
+DTSTART:20260105T100000Z
+DTEND:20260105T101500Z
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE
+"""))
+    assert _starts(events) == [
+        datetime(2026, 3, 2, 10, tzinfo=UTC),
+        datetime(2026, 3, 4, 10, tzinfo=UTC),
+        datetime(2026, 3, 9, 10, tzinfo=UTC),
+    ]
+    assert events[0].end - events[0].start == timedelta(minutes=15)
+    assert events[0].id == "standup_20260302T100000Z"
+    assert events[0].calendar_name == "Family"
+
+
+def test_rule_keeps_local_time_across_dst():
+    # Europe/Berlin moves to summer time on 2026-03-29
+    start = datetime(2026, 3, 26, tzinfo=UTC)
+    events = _events(_calendar("""
+UID:gym
+DTSTART;TZID=Europe/Berlin:20260101T090000
+DTEND;TZID=Europe/Berlin:20260101T100000
+RRULE:FREQ=DAILY
+"""), start, start + timedelta(days=5))
+    hours = [event.start.hour for event in events]
+    assert hours[:3] == [8, 8, 8]
+    assert hours[-1] == 7
+
+
+def test_count_and_until_end_the_series():
+    events = _events(_calendar("""
+UID:counted
+DTSTART:20260301T080000Z
+RRULE:FREQ=DAILY;COUNT=3
+""", """
+UID:until
+DTSTART:20260301T090000Z
+RRULE:FREQ=DAILY;UNTIL=20260303T090000Z
+"""))
+    assert [e.start.day for e in events if e.id.startswith("counted")] == [2, 3]
+    assert [e.start.day for e in events if e.id.startswith("until")] == [2, 3]
+
+
+def test_monthly_and_yearly_rules():
+    events = _events(_calendar("""
+UID:bins
+DTSTART:20250113T070000Z
+RRULE:FREQ=MONTHLY;BYDAY=1TU
+""", """
+UID:birthday
+DTSTART;VALUE=DATE:19900305
+RRULE:FREQ=YEARLY
+"""))
+    by_uid = {event.id.split("_")[0]: event for event in events}
+    assert by_uid["bins"].start == datetime(2026, 3, 3, 7, tzinfo=UTC)
+    assert by_uid["birthday"].start == datetime(2026, 3, 5, tzinfo=UTC)
+
+
+def test_monthly_and_yearly_rules_skip_to_the_window():
+    start = datetime(1990, 1, 15, 9)
+    skip_before = datetime(2026, 3, 1)
+    assert next(_iter_rule_dates(start, {"FREQ": "MONTHLY"}, skip_before)) == datetime(2026, 3, 15, 9)
+    assert next(_iter_rule_dates(start, {"FREQ": "MONTHLY", "INTERVAL": "5"}, skip_before)) == datetime(2025, 11, 15, 9)
+    assert next(_iter_rule_dates(start, {"FREQ": "YEARLY"}, skip_before)) == datetime(2026, 1, 15, 9)
+    assert next(_iter_rule_dates(start, {"FREQ": "YEARLY", "INTERVAL": "4"}, skip_before)) == datetime(2026, 1, 15, 9)
+    assert next(_iter_rule_dates(start, {"FREQ": "YEARLY", "INTERVAL": "5"}, skip_before)) == datetime(2025, 1, 15, 9)
+
+
+def test_exdate_and_recurrence_id():
+    events = _events(_calendar("""
+UID:daily
+SUMMARY:Walk
+DTSTART:20260301T180000Z
+DURATION:PT30M
+RRULE:FREQ=DAILY;COUNT=5
+EXDATE:20260303T180000Z,20260304T180000Z
+""", """
+UID:daily
+SUMMARY:Late walk
+RECURRENCE-ID:20260302T180000Z
+DTSTART:20260302T200000Z
+DTEND:20260302T203000Z
+"""))
+    assert [(e.summary, e.start) for e in events] == [
+        ("Walk", datetime(2026, 3, 5, 18, tzinfo=UTC)),
+        ("Late walk", datetime(2026, 3, 2, 20, tzinfo=UTC)),
+    ]
+
+
+def test_all_day_event():
+    events = _events(_calendar("""
+UID:holiday
+SUMMARY:Bank\\, holiday
+DESCRIPTION:folded
+ line
+DTSTART;VALUE=DATE:20260303
+"""))
+    assert len(events) == 1
+    event = events[0]
+    assert event.all_day
+    assert event.summary == "Bank, holiday"
+    assert event.start == datetime(2026, 3, 3, tzinfo=UTC)
+    assert event.end == datetime(2026, 3, 4, tzinfo=UTC)
+
+
+def test_events_outside_the_window_are_dropped():
+    events = _events(_calendar("""
+UID:past
+DTSTART:20260101T100000Z
+DTEND:20260101T110000Z
+""", """
+UID:future
+DTSTART:20260401T100000Z
+"""))
+    assert events == []
+
+
+def test_local_file_is_reparsed_only_when_it_changes(tmp_path):
+    path = tmp_path / "family.ics"
+    path.write_text(_calendar("UID:a\nDTSTART:20260303T100000Z"))
+    service = IcsCalendarService()
+    state = service._state(str(path))
+
+    asyncio.run(service._load_file(str(path), state, WINDOW_START, WINDOW_END))
+    asyncio.run(service._load_file(str(path), state, WINDOW_START, WINDOW_END))
+    assert state.version == 1
+
+    path.write_text(_calendar("UID:a\nDTSTART:20260303T100000Z", "UID:b\nDTSTART:20260304T100000Z"))
+    os.utime(path, (1, 1))
+    asyncio.run(service._load_file(str(path), state, WINDOW_START, WINDOW_END))
+    assert state.version == 2
+    assert [event.uid for event in state.events] == ["a", "b"]
+
+
+def _load(service, handler, method, source, *args):
+    """Run one of the service's loaders against an HTTP stand-in."""
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await getattr(service, method)(client, source, *args, service._state(source), WINDOW_START, WINDOW_END)
+
+    asyncio.run(run())
+
+
+def test_feed_is_fetched_with_conditional_requests():
+    feed = {"etag": '"v1"', "body": _calendar("UID:a\nDTSTART:20260303T100000Z")}
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == feed["etag"]:
+            return httpx.Response(304)
+        return httpx.Response(200, text=feed["body"], headers={"ETag": feed["etag"]})
+
+    service = IcsCalendarService()
+    url = "https://example.test/family.ics"
+    _load(service, handler, "_load_url", url)
+    _load(service, handler, "_load_url", url)
+    state = service._state(url)
+    assert state.version == 1
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+
+    feed.update(etag='"v2"', body=_calendar("UID:b\nDTSTART:20260304T100000Z"))
+    _load(service, handler, "_load_url", url)
+    assert state.version == 2
+    assert [event.uid for event in state.events] == ["b"]
+
+
+def test_caldav_collection_is_reloaded_only_when_its_ctag_changes():
+    collection = {"ctag": "1"}
+    reports = []
+
+    def handler(request):
+        if request.method == "PROPFIND":
+            return httpx.Response(207, text=(
+                '<d:multistatus xmlns:d="DAV:" xmlns:cs="http://calendarserver.org/ns/">'
+                "<d:response><d:propstat><d:prop>"
+                f"<d:displayname>Work</d:displayname><cs:getctag>{collection['ctag']}</cs:getctag>"
+                "</d:prop></d:propstat></d:response></d:multistatus>"
+            ))
+        reports.append(request)
+        data = _calendar("UID:review\nDTSTART:20260305T140000Z")
+        return httpx.Response(207, text=(
+            '<d:multistatus xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">'
+            f"<d:response><d:propstat><d:prop><c:calendar-data>{data}</c:calendar-data>"
+            "</d:prop></d:propstat></d:response></d:multistatus>"
+        ))
+
+    service = IcsCalendarService()
+    url = "https://dav.example.test/calendars/work/"
+    _load(service, handler, "_load_caldav", url, None)
+    _load(service, handler, "_load_caldav", url, None)
+    assert len(reports) == 1
+
+    collection["ctag"] = "2"
+    _load(service, handler, "_load_caldav", url, None)
+    assert len(reports) == 2
+    state = service._state(url)
+    assert state.calendar_name == "Work"
+    assert [event.uid for event in state.events] == ["review"]
+
+
+def test_rules_without_occurrences_end():
+    skip_before = datetime(2026, 10, 1)
+    monthly = {"FREQ": "MONTHLY", "INTERVAL": "12", "BYMONTHDAY": "30"}
+    assert list(_iter_rule_dates(datetime(2026, 2, 10, 9), monthly, skip_before)) == []
+    # Past year 9999 every period fails, like a Feb 29 in a non-leap year
+    leap_day = datetime(9996, 2, 29, 9)
+    assert list(_iter_rule_dates(leap_day, {"FREQ": "YEARLY"}, datetime(9997, 1, 1))) == []
+
+    events = _events(_calendar("""
+UID:never
+DTSTART:20260210T090000Z
+RRULE:FREQ=MONTHLY;INTERVAL=12;BYMONTHDAY=30
+"""))
+    assert events == []
+
+
+def test_override_moved_out_of_the_window_hides_the_original():
+    events = _events(_calendar("""
+UID:daily
+SUMMARY:Walk
+DTSTART:20260301T180000Z
+RRULE:FREQ=DAILY;COUNT=4
+""", """
+UID:daily
+SUMMARY:Walk, postponed
+RECURRENCE-ID:20260303T180000Z
+DTSTART:20260320T180000Z
+"""))
+    assert _starts(events) == [
+        datetime(2026, 3, 2, 18, tzinfo=UTC),
+        datetime(2026, 3, 4, 18, tzinfo=UTC),
+    ]
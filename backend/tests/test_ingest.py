@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from app.models.schemas import StatusLevel
+from app.services.history import history_store, series_key
+from app.services.ingest import IngestService, Report
+
+
+def _report(agent, timestamp=None, status=None, labels=None, **metrics):
+    return Report(agent, timestamp, status, None, labels or {}, metrics)
+
+
+def _apply(service, *reports):
+    asyncio.run(service._apply(list(reports)))
+
+
+def _times(metric, agent):
+    data = history_store.window(series_key(f"agent_{metric}", {"agent": agent}), 0)
+    return list(data[0]) if data else []
+
+
+def test_future_timestamp_is_clamped_to_now(tmp_path):
+    service = IngestService(tmp_path / "spool")
+    before = time.time()
+    _apply(service, _report("clock-ahead", before + 200, cpu=1.0))
+    _apply(service, _report("clock-ahead", cpu=2.0))
+
+    assert service.late == 0
+    assert service.applied == 2
+    times = _times("cpu", "clock-ahead")
+    assert len(times) == 2
+    assert times[0] <= time.time()
+
+
+def test_ordering_is_per_series(tmp_path):
+    service = IngestService(tmp_path / "spool")
+    now = time.time()
+    _apply(service, _report("per-series", now - 10, cpu=1.0))
+    # Older than the agent's last report, but the first sample of its series
+    _apply(service, _report("per-series", now - 100, disk=50.0))
+
+    assert service.late == 0
+    assert _times("disk", "per-series") == [now - 100]
+
+
+def test_late_sample_keeps_the_report(tmp_path):
+    service = IngestService(tmp_path / "spool")
+    now = time.time()
+    _apply(service, _report("backfill", now - 10, StatusLevel.HEALTHY, cpu=1.0))
+    _apply(service, _report("backfill", now - 100, StatusLevel.ERROR, cpu=9.0, mem=40.0))
+
+    # Only the late cpu sample skips the in-memory history
+    assert service.late == 1
+    assert service.applied == 2
+    assert _times("cpu", "backfill") == [now - 10]
+    assert _times("mem", "backfill") == [now - 100]
+    # The older report does not replace the latest state
+    agent = service._build_status().agents[0]
+    assert agent.status == StatusLevel.HEALTHY
+    assert agent.metrics["cpu"] == 1.0
+    assert agent.metrics["mem"] == 40.0
+
+
+def test_reports_in_one_batch_apply_in_time_order(tmp_path):
+    service = IngestService(tmp_path / "spool")
+    now = time.time()
+    _apply(
+        service,
+        _report("batch", now - 5, cpu=3.0),
+        _report("batch", now - 30, cpu=1.0),
+        _report("batch", now - 20, cpu=2.0),
+    )
+
+    assert service.late == 0
+    assert _times("cpu", "batch") == [now - 30, now - 20, now - 5]
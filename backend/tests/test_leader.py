@@ -0,0 +1,154 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import app.services.leader as leader_module
+import app.services.snapshot as snapshot_module
+from app.config import get_settings
+from app.models.schemas import StatusLevel, WeatherStatus
+from app.services.cache import CacheService
+from app.services.job_registry import job_registry
+from app.services.leader import LeaderElection
+from app.services.snapshot import SnapshotStore
+
+
+def _status(error: str = "") -> WeatherStatus:
+    return WeatherStatus(status=StatusLevel.HEALTHY, error_message=error or None, last_updated=datetime.now())
+
+
+def _bump(path):
+    # Make sure the follower sees a new modification time
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_follower_mirrors_only_changed_entries(tmp_path, monkeypatch):
+    path = tmp_path / "snapshot.json.gz"
+    leader_cache, follower_cache = CacheService(), CacheService()
+    writer, reader = SnapshotStore(path), SnapshotStore(path)
+
+    async def run():
+        monkeypatch.setattr(snapshot_module, "cache_service", leader_cache)
+        await leader_cache.set("weather_status", _status())
+        await leader_cache.set("news_status", _status())
+        await writer.save()
+
+        monkeypatch.setattr(snapshot_module, "cache_service", follower_cache)
+        assert set(await reader.follow()) == {"weather_status", "news_status"}
+        assert await reader.follow() == {}
+
+        monkeypatch.setattr(snapshot_module, "cache_service", leader_cache)
+        await leader_cache.set("weather_status", _status("changed"))
+        await leader_cache.delete("news_status")
+        await writer.save()
+        _bump(path)
+
+        monkeypatch.setattr(snapshot_module, "cache_service", follower_cache)
+        changed = await reader.follow()
+        assert list(changed) == ["weather_status"]
+        assert changed["weather_status"][0].error_message == "changed"
+        # Deleted on the leader, so gone here too
+        assert await follower_cache.get_last_known("news_status") is None
+
+    asyncio.run(run())
+
+
+def test_unchanged_entries_are_not_validated_again(tmp_path, monkeypatch):
+    path = tmp_path / "snapshot.json.gz"
+    cache = CacheService()
+    monkeypatch.setattr(snapshot_module, "cache_service", cache)
+    writer, reader = SnapshotStore(path), SnapshotStore(path)
+
+    async def run():
+        await cache.set("weather_status", _status())
+        await cache.set("news_status", _status())
+        await writer.save()
+        await reader.follow()
+        weather = reader._followed["weather_status"][0]
+
+        await cache.set("news_status", _status("new"))
+        await writer.save()
+        _bump(path)
+        await reader.follow()
+        assert reader._followed["weather_status"][0] is weather
+        assert reader._followed["news_status"][0].error_message == "new"
+
+    asyncio.run(run())
+
+
+def test_frequent_saves_fsync_at_the_snapshot_interval(tmp_path, monkeypatch):
+    cache = CacheService()
+    monkeypatch.setattr(snapshot_module, "cache_service", cache)
+    syncs = []
+    monkeypatch.setattr(snapshot_module.os, "fsync", syncs.append)
+    store = SnapshotStore(tmp_path / "snapshot.json.gz")
+
+    async def run():
+        for error in ("a", "b", "c"):
+            await cache.set("weather_status", _status(error))
+            assert await store.save()
+        assert len(syncs) == 1
+
+        store._last_sync -= timedelta(seconds=get_settings().snapshot_interval)
+        await cache.set("weather_status", _status("d"))
+        await store.save()
+        assert len(syncs) == 2
+
+    asyncio.run(run())
+
+
+def test_follower_takes_over_when_the_leader_exits(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKER_ELECTION", "true")
+    monkeypatch.setenv("WORKER_SYNC_INTERVAL", "0.05")
+    get_settings.cache_clear()
+    monkeypatch.setattr(leader_module, "snapshot_store", SnapshotStore(tmp_path / "snapshot.json.gz"))
+    lock = tmp_path / "leader.lock"
+    promoted = []
+
+    async def run():
+        first, second = LeaderElection(lock), LeaderElection(lock)
+
+        async def on_promote(name):
+            promoted.append(name)
+
+        await first.start(lambda: on_promote("first"))
+        await second.start(lambda: on_promote("second"))
+        assert first.is_leader and not second.is_leader
+        assert lock.read_text() == str(os.getpid())
+
+        await first.stop()
+        for _ in range(40):
+            if second.is_leader:
+                break
+            await asyncio.sleep(0.05)
+        assert second.is_leader
+        await second.stop()
+
+    try:
+        asyncio.run(run())
+    finally:
+        get_settings.cache_clear()
+    assert promoted == ["first", "second"]
+
+
+def test_follower_marks_only_fresh_leader_data_collected(tmp_path, monkeypatch):
+    cache = CacheService()
+    monkeypatch.setattr(leader_module, "cache_service", cache)
+    monkeypatch.setattr(snapshot_module, "cache_service", cache)
+    monkeypatch.setattr(leader_module, "snapshot_store", SnapshotStore(tmp_path / "snapshot.json.gz"))
+    follower = LeaderElection(tmp_path / "leader.lock")
+    follower._started = datetime.now()
+
+    async def run():
+        old = datetime.now() - timedelta(hours=1)
+        await cache.restore({
+            "weather_status": (_status(), old),
+            "news_status": (_status(), datetime.now() + timedelta(seconds=1)),
+        })
+        job_registry._last_collected.pop("weather", None)
+        await follower._sync(initial=True)
+
+    asyncio.run(run())
+    assert job_registry.last_collected("weather") is None
+    assert job_registry.is_warm("news")
+    job_registry._last_collected.pop("news", None)
@@ -0,0 +1,72 @@
+import time
+
+from app.services.tsdb import MetricDatabase, RETENTION, pick_resolution
+
+
+def _open(path):
+    db = MetricDatabase(path)
+    db.open()
+    return db
+
+
+def test_rollups_keep_min_max_avg_and_last(tmp_path):
+    db = _open(tmp_path / "metrics.db")
+    base = 1_700_000_000 - 1_700_000_000 % 86400
+    db.write([("cpu", base + 1, 4.0), ("cpu", base + 30, 2.0)])
+    # A second batch into the same minute merges with the first
+    db.write([("cpu", base + 50, 6.0), ("cpu", base + 3600, 10.0)])
+
+    minute = db._conn.execute(
+        "SELECT ts, min, max, sum, count, last FROM rollup_60 ORDER BY ts"
+    ).fetchall()
+    assert minute == [(base, 2.0, 6.0, 12.0, 3, 6.0), (base + 3600, 10.0, 10.0, 10.0, 1, 10.0)]
+    assert db.query("cpu", base, 60) == [(base, 4.0), (base + 3600, 10.0)]
+    assert db.query("cpu", base, 86400) == [(base, 5.5)]
+    assert [ts for ts, _ in db.query("cpu", base + 10, 0)] == [base + 30, base + 50, base + 3600]
+
+
+def test_compact_drops_data_past_retention(tmp_path):
+    db = _open(tmp_path / "metrics.db")
+    now = time.time()
+    old = now - RETENTION[0] - 3600
+    db.write([("mem", old, 1.0), ("mem", now, 2.0)])
+    db.compact(max_bytes=1 << 30)
+
+    assert [value for _, value in db.query("mem", 0, 0)] == [2.0]
+    # Coarser rollups of the same samples are retained longer
+    assert len(db.query("mem", 0, 60)) == 2
+
+
+def test_compact_trims_to_the_size_limit(tmp_path):
+    db = _open(tmp_path / "metrics.db")
+    now = int(time.time())
+    db.write([(f"disk{i}", now - 3600 + t, float(t)) for i in range(20) for t in range(0, 3600, 10)])
+    before = db.size_bytes()
+    db.compact(max_bytes=before // 2)
+
+    assert db.size_bytes() <= before // 2
+    # The newest raw samples survive
+    assert db.query("disk0", now - 20, 0)
+
+
+def test_reader_sees_series_created_after_it_opened(tmp_path):
+    writer = _open(tmp_path / "metrics.db")
+    reader = _open(tmp_path / "metrics.db")
+    now = time.time()
+    writer.write([("agent_cpu{agent=nas}", now, 12.0)])
+
+    assert reader.query("agent_cpu{agent=nas}", now - 60, 0) == [(int(now), 12.0)]
+    assert reader.series_keys() == ["agent_cpu{agent=nas}"]
+    assert reader.query("missing", now - 60, 0) == []
+
+
+def test_pick_resolution():
+    now = time.time()
+    # Coarsest resolution that still yields the points
+    assert pick_resolution(now - 3600, now, 60) == 60
+    assert pick_resolution(now - 7 * 86400, now, 100) == 3600
+    assert pick_resolution(now - 300 * 86400, now, 200) == 86400
+    # Too few points at any rollup: raw samples while they are retained
+    assert pick_resolution(now - 600, now, 100) == 0
+    # Raw samples are gone past their retention, so the minute rollups
+    assert pick_resolution(now - 3 * 86400, now, 100000) == 60
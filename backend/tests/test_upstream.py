@@ -0,0 +1,64 @@
+import asyncio
+import http.server
+import threading
+
+import httpx
+
+from app.services.upstream import MIN_SAMPLES, AdaptiveTransport, Upstream
+
+
+def _get(upstream, transport, url="http://upstream.test/status"):
+    async def run():
+        async with httpx.AsyncClient(transport=AdaptiveTransport(upstream, transport)) as client:
+            return await client.get(url)
+
+    return asyncio.run(run())
+
+
+def test_connect_and_read_timeouts_follow_their_own_latency():
+    upstream = Upstream("split", default_timeout=10.0)
+    for _ in range(MIN_SAMPLES):
+        upstream.latency.add(4.0)
+        upstream.connect_latency.add(0.01)
+    seen = []
+
+    def handler(request):
+        seen.append(request.extensions["timeout"])
+        return httpx.Response(200)
+
+    _get(upstream, httpx.MockTransport(handler))
+    # p99 * upstream_timeout_multiplier, clamped to [min, max]
+    assert seen[0]["read"] == 12.0
+    assert seen[0]["connect"] == 2.0
+
+
+def test_timeouts_record_the_limit_that_fired():
+    upstream = Upstream("timeouts", default_timeout=0.5)
+
+    def connect_timeout(request):
+        raise httpx.ConnectTimeout("connect", request=request)
+
+    def read_timeout(request):
+        raise httpx.ReadTimeout("read", request=request)
+
+    for handler in (connect_timeout, read_timeout):
+        try:
+            _get(upstream, httpx.MockTransport(handler))
+        except httpx.TimeoutException:
+            pass
+    assert len(upstream.connect_latency) == 1
+    assert upstream.connect_latency.percentile(50) == 0.5
+    assert len(upstream.latency) == 2
+    assert upstream.errors == 2
+
+
+def test_connection_setup_time_is_measured():
+    server = http.server.HTTPServer(("127.0.0.1", 0), http.server.BaseHTTPRequestHandler)
+    threading.Thread(target=server.handle_request, daemon=True).start()
+    upstream = Upstream("local")
+    try:
+        _get(upstream, httpx.AsyncHTTPTransport(), f"http://127.0.0.1:{server.server_port}/")
+    finally:
+        server.server_close()
+    assert len(upstream.connect_latency) == 1
+    assert len(upstream.latency) == 1
@@ -1,4 +1,5 @@
 import React from 'react';
+import { formatUptime } from '../hooks/useDashboard';
 
 function formatEventTime(event) {
   if (event.all_day) {
@@ -56,7 +57,13 @@ export function CalendarCard({ data }) {
         </div>
       </div>
       <div className="card-body">
-        {data.error_message ? (
+        {data.stale && (
+          <div className="card-stale">
+            {data.error_message ? `${data.error_message} - ` : ''}showing last known data
+            {data.stale_seconds >= 60 ? ` (${formatUptime(data.stale_seconds)} old)` : ''}
+          </div>
+        )}
+        {data.error_message && !data.stale ? (
           <div className="error-message">{data.error_message}</div>
         ) : sortedEvents.length > 0 ? (
           <div className="event-cards-row">
@@ -41,23 +41,23 @@ export function Dashboard({ onOpenSetup }) {
       )}
 
       <div className="dashboard-grid">
-        {config?.unifi_enabled && data?.unifi?.status !== 'unknown' && (
+        {config?.unifi_enabled && (data?.unifi?.status !== 'unknown' || data?.unifi?.loading) && (
           <UnifiCard data={data?.unifi} />
         )}
-        {config?.proxmox_enabled && data?.proxmox?.status !== 'unknown' && (
+        {config?.proxmox_enabled && (data?.proxmox?.status !== 'unknown' || data?.proxmox?.loading) && (
           <ProxmoxCard data={data?.proxmox} />
         )}
-        {config?.docker_enabled && data?.docker?.status !== 'unknown' && (
+        {config?.docker_enabled && (data?.docker?.status !== 'unknown' || data?.docker?.loading) && (
           <DockerCard data={data?.docker} />
         )}
         {config?.unraid_enabled && data?.unraid && (
           <UnraidCard data={data?.unraid} />
         )}
-        {config?.plex_enabled && data?.plex?.status !== 'unknown' && (
+        {config?.plex_enabled && (data?.plex?.status !== 'unknown' || data?.plex?.loading) && (
           <PlexCard data={data?.plex} />
         )}
         <DailyByteCard />
-        {config?.calendar_enabled && data?.calendar?.status !== 'unknown' && (
+        {config?.calendar_enabled && (data?.calendar?.status !== 'unknown' || data?.calendar?.loading) && (
           <CalendarCard data={data?.calendar} />
         )}
       </div>
@@ -81,6 +81,10 @@ export function PlexCard({ data }) {
       icon="🎬"
       status={data.status}
       error={data.error_message}
+      loading={data.loading}
+      stale={data.stale}
+      staleSeconds={data.stale_seconds}
+      anomalies={data.anomalies}
     >
       <div className="metrics-grid spaced">
         <div className="metric">
@@ -32,6 +32,10 @@ export function ProxmoxCard({ data }) {
       icon="🖥️"
       status={data.status}
       error={data.error_message}
+      loading={data.loading}
+      stale={data.stale}
+      staleSeconds={data.stale_seconds}
+      anomalies={data.anomalies}
     >
       {data.node && (
         <div className="node-info">
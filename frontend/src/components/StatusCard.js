@@ -1,9 +1,20 @@
 import React from 'react';
-import { getStatusClass } from '../hooks/useDashboard';
+import { getStatusClass, formatUptime } from '../hooks/useDashboard';
 
-export function StatusCard({ title, icon, status, error, children }) {
+function formatSeries(series) {
+  // metric{label=value,...} -> "metric (value, ...)"
+  const match = series.match(/^([^{]+)\{(.*)\}$/);
+  const name = (match ? match[1] : series).replace(/_/g, ' ');
+  if (!match) return name;
+  const labels = match[2].split(',').map((part) => part.split('=')[1]).join(', ');
+  return `${name} (${labels})`;
+}
+
+export function StatusCard({ title, icon, status, error, loading, stale, staleSeconds, anomalies, children }) {
   const statusClass = getStatusClass(status);
-  const statusLabel = status ? status.charAt(0).toUpperCase() + status.slice(1) : 'Unknown';
+  const statusLabel = loading
+    ? 'Loading'
+    : status ? status.charAt(0).toUpperCase() + status.slice(1) : 'Unknown';
 
   return (
     <div className="card">
@@ -18,10 +29,29 @@ export function StatusCard({ title, icon, status, error, children }) {
         </div>
       </div>
       <div className="card-body">
-        {error ? (
+        {loading ? (
+          <div className="card-loading">Collecting data...</div>
+        ) : error && !stale ? (
           <div className="error-message">{error}</div>
         ) : (
-          children
+          <>
+            {stale && (
+              <div className="card-stale">
+                {error ? `${error} - ` : ''}showing last known data
+                {staleSeconds >= 60 ? ` (${formatUptime(staleSeconds)} old)` : ''}
+              </div>
+            )}
+            {anomalies && anomalies.length > 0 && (
+              <div className="card-anomalies">
+                {anomalies.map((anomaly) => (
+                  <div key={anomaly.series} className="card-anomaly">
+                    Unusual {formatSeries(anomaly.series)}: {anomaly.value} (usually ~{anomaly.expected})
+                  </div>
+                ))}
+              </div>
+            )}
+            {children}
+          </>
         )}
       </div>
     </div>
@@ -11,6 +11,10 @@ export function UnifiCard({ data }) {
       icon="🌐"
       status={data.status}
       error={data.error_message}
+      loading={data.loading}
+      stale={data.stale}
+      staleSeconds={data.stale_seconds}
+      anomalies={data.anomalies}
     >
       <div className="metrics-grid">
         <div className="metric">
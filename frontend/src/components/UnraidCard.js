@@ -224,6 +224,10 @@ export function UnraidCard({ data }) {
       icon="&#128229;"
       status={data.status}
       error={data.error_message}
+      loading={data.loading}
+      stale={data.stale}
+      staleSeconds={data.stale_seconds}
+      anomalies={data.anomalies}
     >
       <div className="unraid-grid">
         <div className="unraid-top-row">